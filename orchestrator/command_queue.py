@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command Queue - Bounded, ordered ingestion of webhook commands
+
+/webhook/command only validates and enqueues; a single control-loop thread
+executes commands one at a time in arrival order. Callers get a command id
+straight away and can fetch the result later, so bursts of retries can't pile
+up request threads on the orchestrator lock. When the queue is full the server
+answers 429 with Retry-After, and each secret is rate limited with a token
+bucket.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+
+class QueueFull(Exception):
+    """The command queue has no room; retry later"""
+
+
+class RateLimiter:
+    """Token bucket per key (here: per webhook secret)"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key):
+        """
+        Take a token for a key
+
+        Returns:
+            0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                return 0
+
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class Command:
+    """A queued webhook command and, once run, its result"""
+
+    def __init__(self, name, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.params = params
+        self.state = "queued"
+        self.queued_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.result = None
+        self.status_code = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        """Convert command to dictionary for JSON serialization"""
+        return {
+            "command_id": self.id,
+            "command": self.name,
+            "state": self.state,
+            "queued_at": self.queued_at,
+            "finished_at": self.finished_at,
+            "status_code": self.status_code,
+            "result": self.result
+        }
+
+
+class CommandQueue:
+    """Bounded FIFO of commands consumed by a single control loop"""
+
+    def __init__(self, execute, maxsize=100, keep_results=1000):
+        """
+        Args:
+            execute: Callable (name, params) -> (result dict, status code)
+            maxsize: Commands that may wait before submit() raises QueueFull
+            keep_results: How many finished commands to remember for lookups
+        """
+        self.execute = execute
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.keep_results = keep_results
+        self.commands = OrderedDict()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.average_seconds = 0.5
+
+    def start(self):
+        """Start the control loop (idempotent)"""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._loop, daemon=True, name="command-loop")
+            self.thread.start()
+
+    def submit(self, name, params):
+        """
+        Enqueue a command
+
+        Raises:
+            QueueFull: when the queue is at capacity
+        """
+        self.start()
+        command = Command(name, params)
+
+        with self.lock:
+            try:
+                self.queue.put_nowait(command)
+            except queue.Full:
+                raise QueueFull()
+
+            self.commands[command.id] = command
+            while len(self.commands) > self.keep_results:
+                self.commands.popitem(last=False)
+
+        return command
+
+    def get(self, command_id):
+        """Look up a recent command by id"""
+        with self.lock:
+            return self.commands.get(command_id)
+
+    def retry_after(self):
+        """Rough seconds until there is room again, for the Retry-After header"""
+        return max(1, round(self.queue.qsize() * self.average_seconds / 2))
+
+    def depth(self):
+        """Number of commands waiting to run"""
+        return self.queue.qsize()
+
+    def _loop(self):
+        while True:
+            command = self.queue.get()
+            command.state = "running"
+            started = time.monotonic()
+
+            try:
+                command.result, command.status_code = self.execute(command.name, command.params)
+            except Exception as e:
+                command.result, command.status_code = {'error': str(e)}, 500
+
+            # Smoothed execution time, used to estimate Retry-After
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * (time.monotonic() - started)
+
+            command.state = "done"
+            command.finished_at = datetime.now().isoformat()
+            command.done.set()
+            self.queue.task_done()
+
+
+class IdempotencyCache:
+    """
+    Recent commands by idempotency key (LRU, bounded by size and age)
+
+    A retried delivery with the same key gets the original command back
+    instead of running it again.
+    """
+
+    def __init__(self, max_entries=1000, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.entries:
+            key, (stored_at, _) = next(iter(self.entries.items()))
+            if now - stored_at < self.ttl_seconds:
+                break
+            del self.entries[key]
+
+    def get_or_create(self, key, create):
+        """
+        Get the command stored under a key, or create and store a new one
+
+        create() runs under the cache lock, so concurrent duplicates can't
+        both create a command. If it raises, nothing is stored.
+
+        Returns:
+            (command, True if it was just created)
+        """
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+
+            # Hits move to the back, so entries behind the front may have expired too
+            entry = self.entries.get(key)
+            if entry and now - entry[0] < self.ttl_seconds:
+                self.entries.move_to_end(key)
+                return entry[1], False
+
+            command = create()
+            self.entries.pop(key, None)
+            self.entries[key] = (now, command)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+            return command, True
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conflict Analyzer - Estimates which parts of the repo a task will touch, so
+only tasks that can't collide run at the same time
+
+A task's footprint is a set of repo paths (files or directories), taken from:
+
+    - paths and file names mentioned in its title, description, acceptance
+      criteria and instruction (checked against `git ls-files`)
+    - modules it names - "people", "mass liturgies", ... - mapped to their
+      directories and files under config["conflict_module_roots"]
+    - paths every task of its type touches (config["conflict_type_paths"],
+      e.g. supabase/migrations for database tasks)
+    - files past tasks actually changed (from their worktree diffs): the same
+      instruction gets exactly those files again, a module gets the files
+      that at least two of its past tasks changed
+
+Two tasks conflict when a path in one footprint equals or contains a path in
+the other. A task with an empty footprint conflicts with nothing, so it
+doesn't serialize a parallel run; worktree merges (git apply --check) still
+catch real collisions. With config["conflict_unknown_exclusive"] on, it
+conflicts with everything instead and runs alone.
+"""
+
+import hashlib
+import json
+import re
+import subprocess
+import threading
+from pathlib import Path
+
+from duration_history import instruction_key
+
+HISTORY_VERSION = 1
+
+PATH_PATTERN = re.compile(r'(?<![\w/])((?:[\w.@()\[\]-]+/)+[\w.@()\[\]-]*)')
+FILE_NAME_PATTERN = re.compile(r'\b[\w.-]+\.(?:tsx?|jsx?|mjs|sql|md|py|css|json|ya?ml|toml)\b')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Entries under the module roots that are not modules
+NOT_MODULES = {'layout', 'page', 'index', 'types', 'utils', 'constants', 'helpers'}
+
+# A bare file name matching more files than this is too ambiguous to use
+MAX_NAME_MATCHES = 3
+
+# Files a module's past tasks must have changed this often to join its footprint
+MIN_MODULE_CHANGES = 2
+
+# Longest module name, in words
+MAX_MODULE_WORDS = 3
+
+
+def singular(word):
+    """Naive singular form, enough to match "groups" with "group" """
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def module_key(name):
+    """Normalized module name: lowercase singular words joined by spaces"""
+    return ' '.join(singular(word) for word in WORD_PATTERN.findall(name.lower()))
+
+
+def paths_overlap(a, b):
+    """Whether two repo paths are the same or one contains the other"""
+    return a == b or a.startswith(b + '/') or b.startswith(a + '/')
+
+
+def files_in_patch(patch):
+    """Files changed by a git diff"""
+    files = []
+    for line in patch.splitlines():
+        if line.startswith('diff --git a/'):
+            name = line.split(' b/', 1)[-1]
+            if name not in files:
+                files.append(name)
+    return files
+
+
+class ConflictAnalyzer:
+    """Task footprints and the conflict graph between tasks"""
+
+    def __init__(self, repo_root, history_file, module_roots, type_paths=None, unknown_exclusive=False):
+        self.repo_root = Path(repo_root)
+        self.history_file = Path(history_file)
+        self.module_roots = module_roots
+        self.type_paths = type_paths or {}
+        self.unknown_exclusive = unknown_exclusive
+        self.lock = threading.Lock()
+
+        self.files = set()
+        self.dirs = set()
+        self.by_name = {}
+        self.modules = {}
+        self.footprints = {}
+        # Footprint pairs already compared, and the last graph() with its input
+        self.pairs = {}
+        self.last_graph = None
+        self.history = {'version': HISTORY_VERSION, 'instructions': {}, 'modules': {}}
+
+        self._index_repo()
+        self._load_history()
+
+    def _index_repo(self):
+        result = subprocess.run(
+            ['git', 'ls-files'], cwd=self.repo_root, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"⚠️  Conflict analysis without a file list: {result.stderr.strip()}")
+            return
+
+        for name in result.stdout.splitlines():
+            self.files.add(name)
+            self.by_name.setdefault(name.rsplit('/', 1)[-1], []).append(name)
+            parts = name.split('/')
+            for i in range(1, len(parts)):
+                self.dirs.add('/'.join(parts[:i]))
+
+        for root in self.module_roots:
+            prefix = root.rstrip('/') + '/'
+            for path in self.files | self.dirs:
+                if not path.startswith(prefix) or '/' in path[len(prefix):]:
+                    continue
+                stem = path[len(prefix):].split('.', 1)[0]
+                key = module_key(stem)
+                if key and key not in NOT_MODULES:
+                    self.modules.setdefault(key, set()).add(path)
+
+    def _load_history(self):
+        if not self.history_file.exists():
+            return
+        try:
+            with open(self.history_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == HISTORY_VERSION:
+            # Older histories keyed instructions by the bare digest
+            data['instructions'] = {
+                key if key.startswith('instruction:') else f"instruction:{key}": files
+                for key, files in data.get('instructions', {}).items()
+            }
+            self.history = data
+
+    def _save_history(self):
+        self.history_file.parent.mkdir(exist_ok=True)
+        tmp_file = self.history_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.history, f)
+        tmp_file.replace(self.history_file)
+
+    def task_text(self, task):
+        return '\n'.join([task.title, task.description, *task.acceptance_criteria, task.instruction])
+
+    def mentioned_paths(self, text):
+        """Repo paths mentioned in a text, as existing files or directories"""
+        paths = set()
+
+        for mention in PATH_PATTERN.findall(text):
+            mention = mention.rstrip('.,:;\'"`/')
+            if mention.startswith('./'):
+                mention = mention[2:]
+            if mention in self.files or mention in self.dirs:
+                paths.add(mention)
+                continue
+            # A partial path like actions/people.ts
+            matches = [
+                name for name in self.by_name.get(mention.rsplit('/', 1)[-1], [])
+                if name.endswith('/' + mention)
+            ]
+            if 0 < len(matches) <= MAX_NAME_MATCHES:
+                paths.update(matches)
+
+        for name in FILE_NAME_PATTERN.findall(text):
+            matches = self.by_name.get(name, [])
+            if len(matches) <= MAX_NAME_MATCHES:
+                paths.update(matches)
+
+        return paths
+
+    def mentioned_modules(self, text):
+        """Module names mentioned in a text (one to three word phrases)"""
+        words = [singular(word) for word in WORD_PATTERN.findall(text.lower())]
+        found = set()
+        for size in range(1, MAX_MODULE_WORDS + 1):
+            for i in range(len(words) - size + 1):
+                phrase = ' '.join(words[i:i + size])
+                if phrase in self.modules:
+                    found.add(phrase)
+        return found
+
+    def footprint(self, task):
+        """
+        Estimated repo paths a task will touch
+
+        Returns:
+            frozenset of repo-relative paths (files or directories)
+        """
+        text = self.task_text(task)
+        cache_key = (task.id, hashlib.sha256(f"{task.type}\n{text}".encode()).hexdigest())
+
+        with self.lock:
+            cached = self.footprints.get(cache_key)
+            if cached is not None:
+                return cached
+
+            paths = self.mentioned_paths(text)
+            modules = self.mentioned_modules(text)
+            for module in modules:
+                paths.update(self.modules[module])
+                learned = self.history['modules'].get(module, {})
+                paths.update(name for name, count in learned.items() if count >= MIN_MODULE_CHANGES)
+
+            paths.update(self.type_paths.get((task.type or '').lower(), []))
+            paths.update(self.history['instructions'].get(instruction_key(task.instruction), []))
+
+            footprint = frozenset(paths)
+            self.footprints[cache_key] = footprint
+            return footprint
+
+    def conflicts(self, a, b):
+        """Whether two tasks may edit the same files"""
+        return self._footprints_conflict(self.footprint(a), self.footprint(b))
+
+    def _footprints_conflict(self, footprint_a, footprint_b):
+        if not footprint_a or not footprint_b:
+            return self.unknown_exclusive
+
+        key = (footprint_a, footprint_b)
+        overlap = self.pairs.get(key)
+        if overlap is None:
+            overlap = any(paths_overlap(x, y) for x in footprint_a for y in footprint_b)
+            self.pairs[key] = overlap
+        return overlap
+
+    def graph(self, tasks):
+        """
+        Conflict graph: task id -> ids of the tasks it conflicts with
+
+        The status snapshot asks on every state change, so the last graph is
+        returned as long as the tasks and their footprints are the same, and
+        a changed task set only compares the footprint pairs it hasn't seen.
+        """
+        footprints = [(task.id, self.footprint(task)) for task in tasks]
+        key = tuple(footprints)
+        last = self.last_graph
+        if last and last[0] == key:
+            return last[1]
+
+        graph = {task_id: [] for task_id, _ in footprints}
+        for i, (id_a, footprint_a) in enumerate(footprints):
+            for id_b, footprint_b in footprints[i + 1:]:
+                if self._footprints_conflict(footprint_a, footprint_b):
+                    graph[id_a].append(id_b)
+                    graph[id_b].append(id_a)
+
+        self.last_graph = (key, graph)
+        return graph
+
+    def record_changes(self, task, files):
+        """
+        Learn from the files a finished task actually changed
+
+        The instruction's footprint becomes exactly these files (plus what its
+        text mentions); each module the task names counts them.
+        """
+        if not files:
+            return
+
+        with self.lock:
+            self.history['instructions'][instruction_key(task.instruction)] = sorted(files)
+            for module in self.mentioned_modules(self.task_text(task)):
+                counts = self.history['modules'].setdefault(module, {})
+                for name in files:
+                    counts[name] = counts.get(name, 0) + 1
+
+            self.footprints.clear()
+            self.pairs.clear()
+            self._save_history()
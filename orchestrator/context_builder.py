@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Context Builder - Stable project-context prefixes for Claude prompts
+
+Each task type maps to a fixed set of project docs (config["context_docs"]).
+The docs are assembled once into a prefix that is byte-identical for every
+task of that type, so Claude doesn't have to rediscover the conventions for
+each task and repeated prompts can reuse the API's prompt cache.
+
+Prefixes are cached in memory for the session and on disk between sessions,
+keyed by a fingerprint of the source files (path, size, mtime). They are only
+rebuilt when one of those docs changes.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+
+
+def render_docs(repo_root, names, max_chars):
+    """
+    Docs as prompt sections ("## name" + content), within a size budget
+
+    The doc that crosses max_chars is truncated with a note to read the rest
+    from the file; later docs are left out.
+
+    Args:
+        repo_root: Root the doc names are relative to
+        names: Doc paths relative to repo_root, in order
+        max_chars: Total content budget
+
+    Returns:
+        Concatenated sections ('' if there are none)
+    """
+    parts = []
+    remaining = max_chars
+
+    for name in names:
+        if remaining <= 0:
+            break
+
+        content = (Path(repo_root) / name).read_text(errors='replace').strip()
+        if len(content) > remaining:
+            content = content[:remaining] + f"\n\n[... truncated - read {name} for the rest]"
+        remaining -= len(content)
+
+        parts.append(f"\n## {name}\n\n{content}\n")
+
+    return ''.join(parts)
+
+
+class ContextBuilder:
+    """Builds and caches the project-context prefix for each task type"""
+
+    def __init__(self, repo_root, cache_dir, docs_by_type, max_chars=60000):
+        self.repo_root = Path(repo_root)
+        self.cache_dir = Path(cache_dir)
+        self.docs_by_type = docs_by_type
+        self.max_chars = max_chars
+        self.cache = {}
+        self.lock = threading.Lock()
+
+        self.cache_dir.mkdir(exist_ok=True)
+
+    def doc_paths(self, task_type):
+        """Docs for a task type: the shared '*' docs first, then type-specific ones"""
+        names = list(self.docs_by_type.get('*', []))
+        for name in self.docs_by_type.get((task_type or '').lower(), []):
+            if name not in names:
+                names.append(name)
+        return [self.repo_root / name for name in names if (self.repo_root / name).is_file()]
+
+    def fingerprint(self, paths):
+        """Cheap change detector for a set of docs (no file contents read)"""
+        digest = hashlib.sha256(str(self.max_chars).encode())
+        for path in paths:
+            stat = path.stat()
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()[:16]
+
+    def get_prefix(self, task_type):
+        """
+        Get the context prefix for a task type
+
+        Returns:
+            (prefix text, list of included doc names) - empty when no docs apply
+        """
+        task_type = (task_type or '').lower() or 'default'
+        paths = self.doc_paths(task_type)
+        if not paths:
+            return '', []
+
+        key = self.fingerprint(paths)
+        with self.lock:
+            cached = self.cache.get(task_type)
+            if cached and cached[0] == key:
+                return cached[1], cached[2]
+
+            prefix, included = self._load_or_build(task_type, key, paths)
+            self.cache[task_type] = (key, prefix, included)
+            return prefix, included
+
+    def _load_or_build(self, task_type, key, paths):
+        cache_file = self.cache_dir / f"{task_type}-{key}.md"
+        included = [str(path.relative_to(self.repo_root)) for path in paths]
+
+        if cache_file.exists():
+            return cache_file.read_text(), included
+
+        prefix = self.build(paths)
+
+        # Drop stale prefixes for this type before writing the new one
+        for old in self.cache_dir.glob(f"{task_type}-*.md"):
+            old.unlink()
+        cache_file.write_text(prefix)
+
+        print(f"📚 Built {task_type} context ({len(paths)} docs, {len(prefix)} chars)")
+        return prefix, included
+
+    def build(self, paths):
+        """Assemble the docs into a prefix, truncating once max_chars is reached"""
+        names = [path.relative_to(self.repo_root) for path in paths]
+        return (
+            "# Project Context\n\n"
+            "The following project documentation applies to this task. "
+            "Follow these conventions; you do not need to re-read these files.\n"
+            + render_docs(self.repo_root, names, self.max_chars)
+        )
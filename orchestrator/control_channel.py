@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Control Channel - Hands skip/pause/prioritize/approve requests to the run loop
+
+While a run is active its loop is the only thread that changes the session
+(task statuses, queue order, approvals, the session status). Other threads -
+webhook handlers, the command queue - don't touch the orchestrator directly:
+they send a control request and the loop applies it between steps, then
+publishes a new status snapshot. Senders can wait for the result.
+
+When no run loop is active (idle session, distributed session driven by the
+work queue) requests are applied right away by the sender instead.
+"""
+
+import queue
+import threading
+from datetime import datetime
+
+
+class ControlRequest:
+    """A control command for the run loop and, once applied, its result"""
+
+    def __init__(self, command, params):
+        self.command = command
+        self.params = params
+        self.sent_at = datetime.now().isoformat()
+        self.result = None
+        self.done = threading.Event()
+
+    def finish(self, result):
+        self.result = result
+        self.done.set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the run loop to apply the request
+
+        Returns:
+            The result dict, or None if it wasn't applied within timeout
+        """
+        if not self.done.wait(timeout):
+            return None
+        return self.result
+
+
+class ControlChannel:
+    """Queue of control requests, drained by the run loop between steps"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.active = False
+
+    def open(self):
+        """The run loop started: requests are queued from now on"""
+        with self.lock:
+            self.active = True
+
+    def close(self):
+        """
+        The run loop is ending: requests are applied by their senders again
+
+        Returns:
+            Requests that were queued but not applied yet
+        """
+        with self.lock:
+            self.active = False
+            return self.drain()
+
+    def send(self, command, params, apply_now):
+        """
+        Queue a request for the run loop, or apply it directly without one
+
+        Args:
+            command: Control command name
+            params: Its parameters
+            apply_now: Called as apply_now(command, params) when no loop is active
+
+        Returns:
+            ControlRequest
+        """
+        control = ControlRequest(command, params)
+        with self.lock:
+            if self.active:
+                self.queue.put(control)
+                return control
+
+        control.finish(apply_now(command, params))
+        return control
+
+    def drain(self):
+        """Requests waiting to be applied, oldest first"""
+        controls = []
+        while True:
+            try:
+                controls.append(self.queue.get_nowait())
+            except queue.Empty:
+                return controls
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Doc Index - Offline BM25 retrieval over the project's markdown docs
+
+Picks the few docs most relevant to a task (from its title, description, type
+and acceptance criteria) so they can be attached to the prompt.
+
+The index is persisted as JSON. Refreshing only re-reads files whose size or
+mtime changed and drops deleted ones, so keeping it current costs a stat() per
+doc.
+"""
+
+import json
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'for', 'from',
+    'has', 'have', 'how', 'if', 'in', 'into', 'is', 'it', 'its', 'not', 'of',
+    'on', 'or', 'should', 'so', 'that', 'the', 'their', 'then', 'there', 'this',
+    'to', 'use', 'was', 'we', 'when', 'which', 'will', 'with', 'you', 'your'
+}
+
+# Words in a doc's file name say more about it than words in its body
+NAME_WEIGHT = 5
+
+INDEX_VERSION = 1
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords or single characters"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+class DocIndex:
+    """Incrementally maintained BM25 index over markdown docs"""
+
+    def __init__(self, repo_root, index_file, sources, k1=1.5, b=0.75):
+        self.repo_root = Path(repo_root)
+        self.index_file = Path(index_file)
+        self.sources = sources
+        self.k1 = k1
+        self.b = b
+        self.docs = {}
+        self.doc_freq = Counter()
+        self.lock = threading.Lock()
+
+        self._load()
+
+    def _load(self):
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') == INDEX_VERSION:
+            self.docs = data.get('docs', {})
+            self._count_doc_freq()
+
+    def _save(self):
+        self.index_file.parent.mkdir(exist_ok=True)
+        with open(self.index_file, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'docs': self.docs}, f)
+
+    def _count_doc_freq(self):
+        self.doc_freq = Counter()
+        for doc in self.docs.values():
+            self.doc_freq.update(doc['terms'].keys())
+
+    def _source_files(self):
+        files = set()
+        for pattern in self.sources:
+            files.update(p for p in self.repo_root.glob(pattern) if p.is_file())
+        return files
+
+    def refresh(self):
+        """
+        Bring the index up to date with the files on disk
+
+        Returns:
+            Number of docs (re)indexed or removed
+        """
+        with self.lock:
+            seen = set()
+            changed = 0
+
+            for path in self._source_files():
+                name = str(path.relative_to(self.repo_root))
+                seen.add(name)
+
+                stat = path.stat()
+                doc = self.docs.get(name)
+                if doc and doc['size'] == stat.st_size and doc['mtime_ns'] == stat.st_mtime_ns:
+                    continue
+
+                self.docs[name] = self._index_file(path, name, stat)
+                changed += 1
+
+            for name in set(self.docs) - seen:
+                del self.docs[name]
+                changed += 1
+
+            if changed:
+                self._count_doc_freq()
+                self._save()
+
+            return changed
+
+    def _index_file(self, path, name, stat):
+        terms = Counter(tokenize(path.read_text(errors='replace')))
+        for token in tokenize(Path(name).stem.replace('_', ' ')):
+            terms[token] += NAME_WEIGHT
+
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'length': sum(terms.values()),
+            'terms': dict(terms)
+        }
+
+    def search(self, query, top_k=3, exclude=()):
+        """
+        Rank docs against a query with BM25
+
+        Returns:
+            List of (doc name, score), best first, only docs that match at all
+        """
+        query_terms = set(tokenize(query))
+
+        with self.lock:
+            if not self.docs or not query_terms:
+                return []
+
+            total = len(self.docs)
+            avg_length = sum(doc['length'] for doc in self.docs.values()) / total
+
+            scores = []
+            for name, doc in self.docs.items():
+                if name in exclude:
+                    continue
+
+                score = 0.0
+                for term in query_terms:
+                    tf = doc['terms'].get(term)
+                    if not tf:
+                        continue
+                    df = self.doc_freq[term]
+                    idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                    norm = tf + self.k1 * (1 - self.b + self.b * doc['length'] / avg_length)
+                    score += idf * tf * (self.k1 + 1) / norm
+
+                if score > 0:
+                    scores.append((name, score))
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:top_k]
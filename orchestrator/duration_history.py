@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Duration History - Runtime history used to predict how long tasks take
+
+Wall times of successful runs are kept per instruction (hash of its text),
+per task type and overall. They are used to:
+
+    - predict a task's duration, so parallel runs can start the longest
+      tasks first (shorter total run time)
+    - give each task a timeout from a high percentile of its own history,
+      so a hung task is caught long before the global timeout would fire
+
+Timed-out and failed runs are not recorded: their wall time says nothing
+about how long the task needs.
+"""
+
+import hashlib
+import json
+import math
+import statistics
+import threading
+from pathlib import Path
+
+HISTORY_VERSION = 1
+
+
+def instruction_key(instruction):
+    """History key for a task's instruction text"""
+    digest = hashlib.sha256(' '.join((instruction or '').split()).encode()).hexdigest()
+    return f"instruction:{digest[:16]}"
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class DurationHistory:
+    """Persisted wall-time samples by instruction, task type and overall"""
+
+    def __init__(self, history_file, max_samples=50):
+        self.history_file = Path(history_file)
+        self.max_samples = max_samples
+        self.samples = {}
+        self.lock = threading.Lock()
+
+        self._load()
+
+    def _load(self):
+        if not self.history_file.exists():
+            return
+        try:
+            with open(self.history_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') == HISTORY_VERSION:
+            self.samples = data.get('samples', {})
+
+    def _save(self):
+        tmp_file = self.history_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({'version': HISTORY_VERSION, 'samples': self.samples}, f)
+        tmp_file.replace(self.history_file)
+
+    def keys_for(self, task):
+        """History keys for a task, most specific first"""
+        return [
+            instruction_key(task.instruction),
+            f"type:{(task.type or '').lower()}",
+            "all"
+        ]
+
+    def record(self, task, seconds):
+        """Add a successful run's wall time to the task's history"""
+        with self.lock:
+            for key in self.keys_for(task):
+                samples = self.samples.setdefault(key, [])
+                samples.append(round(seconds, 2))
+                del samples[:-self.max_samples]
+            self._save()
+
+    def predict(self, task):
+        """
+        Predicted duration of a task in seconds
+
+        Median of the most specific history that has any samples, or None
+        when nothing has run yet.
+        """
+        with self.lock:
+            for key in self.keys_for(task):
+                samples = self.samples.get(key)
+                if samples:
+                    return statistics.median(samples)
+        return None
+
+    def timeout_for(self, task, pct=95, margin=1.5, min_samples=5):
+        """
+        Timeout from a high percentile of the task's own history
+
+        Only the instruction and task-type histories are used (not the
+        overall one), and only once they have min_samples runs.
+
+        Returns:
+            Seconds (percentile x margin), or None without enough history
+        """
+        with self.lock:
+            for key in self.keys_for(task)[:2]:
+                samples = self.samples.get(key) or []
+                if len(samples) >= min_samples:
+                    return percentile(samples, pct) * margin
+        return None
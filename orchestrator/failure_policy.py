@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Failure Policy - Decides what happens after a task fails, without asking
+
+Failures are classified by the task's result (timeout, error = non-zero exit,
+exception, conflict, verification = failed its verification checks). Each
+task type can configure how many times each kind is retried, the backoff
+between attempts (exponential, with jitter), whether timed-out tasks get a
+longer timeout, and what to do once retries run out:
+
+    continue         - carry on with the rest of the tasks
+    skip_dependents  - skip every task that depends on the failed one
+    halt             - stop scheduling new tasks and end the session
+
+The whole configuration is checked when the policy is built (before a run
+starts), so a typo fails the start instead of the first failed task.
+"""
+
+import random
+
+ACTIONS = ('continue', 'skip_dependents', 'halt')
+
+DEFAULT_RULES = {
+    "retries": {"timeout": 1, "error": 1, "exception": 2, "conflict": 0, "verification": 1},
+    "backoff_seconds": 10,
+    "backoff_multiplier": 2,
+    "max_backoff_seconds": 300,
+    "jitter": 0.25,
+    "timeout_multiplier": 2,
+    "on_failure": "continue"
+}
+
+
+class Decision:
+    """What to do with a failed task"""
+
+    def __init__(self, action, kind, delay=0, timeout=None):
+        self.action = action
+        self.kind = kind
+        self.delay = delay
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f"Decision({self.action}, kind={self.kind}, delay={self.delay:.1f}, timeout={self.timeout})"
+
+
+class FailurePolicy:
+    """Per-task-type retry and failure handling rules"""
+
+    def __init__(self, policies=None, base_timeout=300):
+        """
+        Raises:
+            ValueError: if an entry has an unknown rule, failure kind or
+                on_failure action, or a value of the wrong type
+        """
+        self.policies = policies or {}
+        self.base_timeout = base_timeout
+        self.validate()
+
+    def validate(self):
+        """Check every configured entry (see __init__)"""
+        for key, overrides in self.policies.items():
+            if not isinstance(overrides, dict):
+                raise ValueError(f"failure_policy[{key!r}] must be a mapping")
+
+            for name, value in overrides.items():
+                if name not in DEFAULT_RULES:
+                    raise ValueError(f"failure_policy[{key!r}]: unknown rule {name!r}")
+                if name == "on_failure":
+                    if value not in ACTIONS:
+                        raise ValueError(
+                            f"failure_policy[{key!r}]: unknown on_failure action {value!r}"
+                            f" (expected one of {', '.join(ACTIONS)})"
+                        )
+                elif name == "retries":
+                    if not isinstance(value, dict):
+                        raise ValueError(f"failure_policy[{key!r}].retries must be a mapping")
+                    for kind, count in value.items():
+                        if kind not in DEFAULT_RULES["retries"]:
+                            raise ValueError(f"failure_policy[{key!r}].retries: unknown failure kind {kind!r}")
+                        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+                            raise ValueError(f"failure_policy[{key!r}].retries.{kind} must be a non-negative integer")
+                elif not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+                    raise ValueError(f"failure_policy[{key!r}].{name} must be a non-negative number")
+
+    def rules_for(self, task_type):
+        """Default rules overlaid with the 'default' and task-type entries"""
+        rules = dict(DEFAULT_RULES)
+        rules["retries"] = dict(DEFAULT_RULES["retries"])
+
+        for key in ('default', (task_type or '').lower()):
+            overrides = self.policies.get(key) or {}
+            for name, value in overrides.items():
+                if name == "retries":
+                    rules["retries"].update(value)
+                else:
+                    rules[name] = value
+
+        return rules
+
+    def classify(self, task):
+        """Kind of failure, from the task result"""
+        if task.result in ('timeout', 'conflict', 'exception'):
+            return task.result
+        if task.result == 'verification_failed':
+            return 'verification'
+        return 'error'
+
+    def decide(self, task):
+        """
+        Decide what to do after a task failed
+
+        Uses task.attempts (number of attempts already made) to count retries.
+        """
+        rules = self.rules_for(task.type)
+        kind = self.classify(task)
+        retries_allowed = rules["retries"].get(kind, 0)
+        retries_made = task.attempts - 1
+
+        if retries_made >= retries_allowed:
+            return Decision(rules["on_failure"], kind)
+
+        delay = min(
+            rules["backoff_seconds"] * rules["backoff_multiplier"] ** retries_made,
+            rules["max_backoff_seconds"]
+        )
+        delay *= 1 + random.uniform(-rules["jitter"], rules["jitter"])
+
+        timeout = task.timeout
+        if kind == 'timeout':
+            timeout = int((task.timeout or self.base_timeout) * rules["timeout_multiplier"])
+
+        return Decision('retry', kind, delay=max(0, delay), timeout=timeout)
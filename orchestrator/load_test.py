@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Load test for the webhook server
+
+USAGE:
+    # Spawn a throwaway server (own temp dir, stub Claude, local n8n stand-in)
+    python3 load_test.py --clients 20 --duration 30
+
+    # Different request mix (weights per operation)
+    python3 load_test.py --mix status=5,logs=3,search=1,command=1
+
+    # Against a server that is already running (no stub/stand-in); read-only
+    # operations unless --allow-start is given with a task file on that server
+    python3 load_test.py --url http://localhost:5000 --secret your-webhook-secret
+
+WHAT IT DOES:
+    - Copies the orchestrator into a temp directory and starts webhook_server.py
+      there on a free port, so it never touches your state.json or logs
+    - Points CLAUDE_COMMAND at a stub script that prints a few lines and
+      sleeps, and N8N_NOTIFY_URL at a local HTTP server that counts
+      notifications
+    - Runs N concurrent clients for the given duration, each picking an
+      operation by the mix weights:
+          command - POST /webhook/command (start a session of stub tasks)
+          status  - POST /webhook/status
+          logs    - POST /webhook/logs
+          search  - POST /webhook/logs/search
+    - With --url, "command" would start real Claude sessions on that server,
+      so it is left out of the default mix there and refused unless
+      --allow-start and --task-file are given
+    - Reports throughput, p50/p99 latency, error and 429 rates per operation,
+      and orchestrator_lock contention from /webhook/metrics
+
+    Add --json for machine-readable output.
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from duration_history import percentile
+
+OPERATIONS = ('command', 'status', 'logs', 'search')
+
+DEFAULT_MIX = 'status=6,logs=2,search=1,command=1'
+
+# Against a running server (--url): no "command", which starts real sessions
+REMOTE_DEFAULT_MIX = 'status=6,logs=2,search=1'
+
+STUB_CLAUDE = """#!/bin/sh
+cat > /dev/null
+for i in $(seq 1 {lines}); do
+    echo "stub output line $i"
+    sleep {sleep}
+done
+"""
+
+TASK_TEMPLATE = """## Task {n}: Load test task {n}
+**Type:** testing
+**Priority:** low
+**Requires Approval:** false
+**Description:** Stub task for the load test
+**Acceptance Criteria:**
+- Stub output printed
+
+**Claude Instruction:**
+Print some stub output.
+
+---
+
+"""
+
+
+def free_port():
+    """A port nothing is listening on right now"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def parse_mix(mix):
+    """'status=6,logs=2' -> ([operations], [weights])"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name} (choose from {', '.join(OPERATIONS)})")
+        weights[name] = float(weight or 1)
+    return list(weights), list(weights.values())
+
+
+class N8nStandIn:
+    """Local HTTP server standing in for the n8n notify webhook"""
+
+    def __init__(self):
+        self.received = Counter()
+        lock = threading.Lock()
+        received = self.received
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                try:
+                    message_type = json.loads(body).get('type', 'unknown')
+                except ValueError:
+                    message_type = 'invalid'
+                with lock:
+                    received[message_type] += 1
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook/orchestrator-notify"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class ServerUnderTest:
+    """webhook_server.py running from a temp copy of the orchestrator"""
+
+    def __init__(self, secret, n8n_url, tasks, stub_lines, stub_sleep, rate_limit):
+        self.workdir = Path(tempfile.mkdtemp(prefix='orchestrator-load-'))
+        source = Path(__file__).parent
+        for path in source.glob('*.py'):
+            shutil.copy(path, self.workdir)
+        # No config.yaml: its placeholders would override the env below
+
+        stub = self.workdir / 'stub_claude.sh'
+        stub.write_text(STUB_CLAUDE.format(lines=stub_lines, sleep=stub_sleep))
+        stub.chmod(0o755)
+
+        self.task_file = self.workdir / 'load-tasks.md'
+        self.task_file.write_text("# Tasks - Load test\n\n" + ''.join(
+            TASK_TEMPLATE.format(n=n) for n in range(1, tasks + 1)
+        ))
+
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        env = dict(
+            os.environ,
+            WEBHOOK_SECRET=secret,
+            N8N_NOTIFY_URL=n8n_url,
+            CLAUDE_COMMAND=str(stub),
+            RATE_LIMIT_PER_SECOND=str(rate_limit),
+            RATE_LIMIT_BURST=str(max(1, int(rate_limit))),
+            PYTHONUNBUFFERED='1'
+        )
+        self.log = open(self.workdir / 'server.log', 'w')
+        self.process = subprocess.Popen(
+            [sys.executable, 'webhook_server.py', '--port', str(self.port)],
+            cwd=self.workdir, env=env, stdout=self.log, stderr=subprocess.STDOUT
+        )
+
+    def wait_ready(self, timeout=15):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited; see {self.workdir / 'server.log'}")
+            try:
+                requests.get(f"{self.url}/health", timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise RuntimeError("Server did not start in time")
+
+    def stop(self, keep=False):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+        if not keep:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class LoadTest:
+    """Concurrent clients driving the webhook endpoints"""
+
+    def __init__(self, url, secret, operations, weights, task_file):
+        self.url = url.rstrip('/')
+        self.secret = secret
+        self.operations = operations
+        self.weights = weights
+        self.task_file = task_file
+        self.lock = threading.Lock()
+        self.latencies = {op: [] for op in OPERATIONS}
+        self.codes = {op: Counter() for op in OPERATIONS}
+
+    def payload(self, operation):
+        if operation == 'command':
+            return '/webhook/command', {
+                'command': 'start',
+                'params': {'task_file': self.task_file, 'auto_approve': True}
+            }
+        if operation == 'status':
+            return '/webhook/status', {}
+        if operation == 'logs':
+            return '/webhook/logs', {'lines': 50}
+        return '/webhook/logs/search', {'query': random.choice(['stub', 'output', 'line', 'task']), 'limit': 20}
+
+    def client(self, stop_at):
+        session = requests.Session()
+        while time.time() < stop_at:
+            operation = random.choices(self.operations, self.weights)[0]
+            endpoint, payload = self.payload(operation)
+            payload['secret'] = self.secret
+
+            started = time.perf_counter()
+            try:
+                response = session.post(self.url + endpoint, json=payload, timeout=30)
+                code = response.status_code
+            except requests.RequestException:
+                code = 'error'
+            elapsed = time.perf_counter() - started
+
+            with self.lock:
+                self.latencies[operation].append(elapsed)
+                self.codes[operation][code] += 1
+
+    def run(self, clients, duration):
+        stop_at = time.time() + duration
+        threads = [threading.Thread(target=self.client, args=(stop_at,), daemon=True) for _ in range(clients)]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.time() - started
+
+    def metrics(self, reset=False):
+        """orchestrator_lock and queue statistics from the server"""
+        try:
+            response = requests.post(
+                f"{self.url}/webhook/metrics", json={'secret': self.secret, 'reset': reset}, timeout=10
+            )
+            return response.json() if response.status_code == 200 else None
+        except requests.RequestException:
+            return None
+
+    def report(self, elapsed):
+        operations = {}
+        total = 0
+        for operation in OPERATIONS:
+            latencies = self.latencies[operation]
+            if not latencies:
+                continue
+            codes = self.codes[operation]
+            count = len(latencies)
+            total += count
+            errors = sum(n for code, n in codes.items() if code == 'error' or code >= 500)
+            operations[operation] = {
+                'requests': count,
+                'per_second': round(count / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                'error_rate': round(errors / count, 4),
+                'throttled_rate': round(codes.get(429, 0) / count, 4),
+                'status_codes': {str(code): n for code, n in sorted(codes.items(), key=str)}
+            }
+        return {
+            'duration_seconds': round(elapsed, 1),
+            'requests': total,
+            'per_second': round(total / elapsed, 1),
+            'operations': operations
+        }
+
+
+def print_report(report):
+    print(f"\n📊 Load Test Results ({report['duration_seconds']}s, {report['clients']} clients)\n")
+    print(f"Total: {report['requests']} requests, {report['per_second']} req/s\n")
+    print(f"{'Operation':<10}{'Requests':>10}{'Req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'Errors':>9}{'429s':>8}")
+    for operation, stats in report['operations'].items():
+        print(
+            f"{operation:<10}{stats['requests']:>10}{stats['per_second']:>9}"
+            f"{stats['p50_ms']:>9}{stats['p99_ms']:>9}"
+            f"{stats['error_rate'] * 100:>8.1f}%{stats['throttled_rate'] * 100:>7.1f}%"
+        )
+
+    server = report.get('server')
+    if server:
+        lock = server['orchestrator_lock']
+        print(f"\norchestrator_lock: {lock['acquisitions']} acquisitions, "
+              f"{lock['contention_rate'] * 100:.1f}% contended")
+        print(f"   wait avg {lock['avg_wait_ms']} ms, max {lock['max_wait_ms']} ms; "
+              f"held avg {lock['avg_held_ms']} ms, max {lock['max_held_ms']} ms")
+        print(f"Command queue depth at the end: {server['command_queue']['depth']}")
+    else:
+        print("\n⚠️  No server metrics (is /webhook/metrics available and the secret right?)")
+
+    if 'n8n_notifications' in report:
+        received = report['n8n_notifications']
+        print(f"n8n stand-in received {sum(received.values())} notifications: "
+              f"{', '.join(f'{k}={v}' for k, v in sorted(received.items())) or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the orchestrator webhook server")
+    parser.add_argument('--url', help='Test a running server instead of spawning one')
+    parser.add_argument('--secret', default='load-test-secret', help='Webhook secret (default matches the spawned server)')
+    parser.add_argument('--clients', type=int, default=10, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+    parser.add_argument('--mix', help=f'Operation weights (default: {DEFAULT_MIX}; with --url: {REMOTE_DEFAULT_MIX})')
+    parser.add_argument('--allow-start', action='store_true', help='With --url, allow "command" in the mix: it starts real Claude sessions on that server')
+    parser.add_argument('--task-file', help='With --url and --allow-start, the task file (on the server) that "command" starts')
+    parser.add_argument('--tasks', type=int, default=5, help='Stub tasks per started session')
+    parser.add_argument('--stub-lines', type=int, default=20, help='Lines the stub Claude prints per task')
+    parser.add_argument('--stub-sleep', type=float, default=0.05, help='Seconds the stub sleeps between lines')
+    parser.add_argument('--rate-limit', type=float, default=1000, help='RATE_LIMIT_PER_SECOND for the spawned server')
+    parser.add_argument('--keep', action='store_true', help='Keep the spawned server\'s temp directory')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    if args.mix is None:
+        args.mix = REMOTE_DEFAULT_MIX if args.url else DEFAULT_MIX
+    operations, weights = parse_mix(args.mix)
+
+    if args.url and 'command' in operations and not (args.allow_start and args.task_file):
+        parser.error('"command" against --url starts real Claude sessions there; '
+                     'add --allow-start and --task-file to do that on purpose')
+
+    n8n = server = None
+    if args.url:
+        url, task_file = args.url, args.task_file
+    else:
+        n8n = N8nStandIn()
+        server = ServerUnderTest(args.secret, n8n.url, args.tasks, args.stub_lines, args.stub_sleep, args.rate_limit)
+        url, task_file = server.url, str(server.task_file)
+
+    try:
+        if server:
+            server.wait_ready()
+            print(f"🚀 Server on {server.url} (workdir {server.workdir})", file=sys.stderr)
+
+        test = LoadTest(url, args.secret, operations, weights, task_file)
+        test.metrics(reset=True)
+
+        print(f"⏳ {args.clients} clients for {args.duration}s, mix {args.mix}", file=sys.stderr)
+        elapsed = test.run(args.clients, args.duration)
+
+        report = test.report(elapsed)
+        report['clients'] = args.clients
+        report['mix'] = args.mix
+        report['server'] = test.metrics()
+        if n8n:
+            report['n8n_notifications'] = dict(n8n.received)
+    finally:
+        if server:
+            server.stop(keep=args.keep)
+        if n8n:
+            n8n.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
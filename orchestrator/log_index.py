@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Log Index - Full-text search over task logs (SQLite FTS5)
+
+Every line of orchestrator_logs/task-*.log is indexed with the log's task id,
+session, task type and start time, so searches can be filtered and return
+the matching lines with a few lines of context around them.
+
+Logs only ever grow while a task runs, so refreshing reads just the bytes
+appended since the last refresh (a stat() per unchanged log). Logs that got
+shorter are re-indexed from scratch and deleted logs are dropped.
+
+A last line without a newline is usually still being written, so it waits -
+until the log hasn't changed for settle_seconds (end-of-task markers such as
+TIMEOUT: may be the last thing in a finished log). It is then indexed, and
+indexed again should the log grow after all.
+
+start() refreshes in a background thread every few seconds (and right away
+after refresh_soon()), so searches never wait for indexing.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+LOG_NAME_PATTERN = re.compile(r'task-(\d+)-(\d{8}-\d{6})')
+HEADER_PATTERN = re.compile(r'^(Type|Session): (.*)$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    task_id INTEGER,
+    session_id TEXT,
+    type TEXT,
+    started_at TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime_ns INTEGER NOT NULL DEFAULT 0,
+    lines INTEGER NOT NULL DEFAULT 0,
+    partial INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS logs_started ON logs (started_at);
+CREATE TABLE IF NOT EXISTS log_lines (
+    id INTEGER PRIMARY KEY,
+    log_id INTEGER NOT NULL,
+    line_no INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS log_lines_position ON log_lines (log_id, line_no);
+CREATE VIRTUAL TABLE IF NOT EXISTS log_lines_fts USING fts5 (
+    text, content='log_lines', content_rowid='id'
+);
+"""
+
+
+class LogIndex:
+    """Incrementally maintained full-text index over task logs"""
+
+    def __init__(self, logs_dir, db_file, settle_seconds=5):
+        self.logs_dir = Path(logs_dir)
+        self.db_file = Path(db_file)
+        self.settle_seconds = settle_seconds
+        self.lock = threading.Lock()
+
+        # Background refresh (see start)
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.refreshed_at = None
+
+        self.db_file.parent.mkdir(exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            # Indexes created before unfinished last lines were indexed
+            columns = [row['name'] for row in db.execute("PRAGMA table_info(logs)")]
+            if 'partial' not in columns:
+                db.execute("ALTER TABLE logs ADD COLUMN partial INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connect(self):
+        """A connection for one transaction (committed, or rolled back on error), closed afterwards"""
+        with closing(sqlite3.connect(self.db_file)) as db:
+            db.row_factory = sqlite3.Row
+            with db:
+                yield db
+
+    def start(self, interval=5):
+        """
+        Keep the index up to date from a background thread
+
+        An unfinished last line is indexed once its log has been unchanged
+        for one interval.
+        """
+        with self.lock:
+            self.settle_seconds = interval
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._refresh_loop, args=(interval,), daemon=True, name="log-index")
+            self.thread.start()
+
+    def refresh_soon(self):
+        """Ask the background thread for a refresh now instead of at its next interval"""
+        self.wakeup.set()
+
+    def _refresh_loop(self, interval):
+        while True:
+            try:
+                self.refresh()
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️  Log index refresh failed: {e}")
+            self.wakeup.wait(timeout=interval)
+            self.wakeup.clear()
+
+    def refresh(self):
+        """
+        Bring the index up to date with the logs on disk
+
+        Returns:
+            Number of lines added
+        """
+        with self.lock, self._connect() as db:
+            known = {row['path']: row for row in db.execute("SELECT * FROM logs")}
+            seen = set()
+            added = 0
+
+            for path in self.logs_dir.glob('task-*.log'):
+                name = path.name
+                seen.add(name)
+                stat = path.stat()
+                row = known.get(name)
+
+                if row and row['size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns:
+                    continue
+
+                if row and stat.st_size < row['size']:
+                    self._delete_log(db, row['id'])
+                    row = None
+
+                added += self._index_log(db, path, row, stat)
+
+            for name in set(known) - seen:
+                self._delete_log(db, known[name]['id'])
+
+            self.refreshed_at = datetime.now().isoformat()
+            return added
+
+    def _delete_log(self, db, log_id):
+        db.execute(
+            "INSERT INTO log_lines_fts (log_lines_fts, rowid, text) "
+            "SELECT 'delete', id, text FROM log_lines WHERE log_id = ?",
+            (log_id,)
+        )
+        db.execute("DELETE FROM log_lines WHERE log_id = ?", (log_id,))
+        db.execute("DELETE FROM logs WHERE id = ?", (log_id,))
+
+    def _index_log(self, db, path, row, stat):
+        offset = row['size'] if row else 0
+        # An unfinished last line indexed earlier has grown: read it again
+        if row and row['partial']:
+            offset -= row['partial']
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(stat.st_size - offset)
+
+        stale = 0
+        if row and row['partial']:
+            stale = len(data[:row['partial']].decode('utf-8', errors='replace').splitlines())
+            self._delete_lines(db, row['id'], row['lines'] - stale + 1)
+
+        # Leave a partly written last line for the next refresh, unless the
+        # log has stopped changing
+        end = data.rfind(b'\n') + 1
+        partial = 0
+        if end < len(data) and time.time() - stat.st_mtime >= self.settle_seconds:
+            partial = len(data) - end
+            end = len(data)
+        lines = data[:end].decode('utf-8', errors='replace').splitlines()
+
+        if row:
+            log_id, line_no = row['id'], row['lines'] - stale
+        else:
+            log_id, line_no = self._create_log(db, path, lines), 0
+
+        for text in lines:
+            line_no += 1
+            cursor = db.execute(
+                "INSERT INTO log_lines (log_id, line_no, text) VALUES (?, ?, ?)",
+                (log_id, line_no, text)
+            )
+            db.execute("INSERT INTO log_lines_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+
+        db.execute(
+            "UPDATE logs SET size = ?, mtime_ns = ?, lines = ?, partial = ? WHERE id = ?",
+            (offset + end, stat.st_mtime_ns, line_no, partial, log_id)
+        )
+        return len(lines)
+
+    def _delete_lines(self, db, log_id, from_line):
+        """Drop a log's lines from line number from_line on"""
+        db.execute(
+            "INSERT INTO log_lines_fts (log_lines_fts, rowid, text) "
+            "SELECT 'delete', id, text FROM log_lines WHERE log_id = ? AND line_no >= ?",
+            (log_id, from_line)
+        )
+        db.execute("DELETE FROM log_lines WHERE log_id = ? AND line_no >= ?", (log_id, from_line))
+
+    def _create_log(self, db, path, lines):
+        """Register a new log, with metadata from its name and header"""
+        task_id = started_at = None
+        match = LOG_NAME_PATTERN.match(path.name)
+        if match:
+            task_id = int(match.group(1))
+            started_at = datetime.strptime(match.group(2), "%Y%m%d-%H%M%S").isoformat()
+
+        header = {}
+        for line in lines[:10]:
+            field = HEADER_PATTERN.match(line)
+            if field:
+                header[field.group(1)] = field.group(2).strip()
+
+        cursor = db.execute(
+            "INSERT INTO logs (path, task_id, session_id, type, started_at) VALUES (?, ?, ?, ?, ?)",
+            (path.name, task_id, header.get('Session'), (header.get('Type') or '').lower() or None, started_at)
+        )
+        return cursor.lastrowid
+
+    def search(self, query, session_id=None, task_id=None, task_type=None,
+               since=None, until=None, context=2, limit=20, offset=0):
+        """
+        Find log lines matching an FTS5 query, newest log first
+
+        Args:
+            query: FTS5 query (words, "phrases", AND/OR/NOT, prefix*)
+            session_id, task_id, task_type: Optional filters
+            since, until: Optional ISO timestamps bounding the log's start time
+            context: Lines to include before and after each match
+            limit, offset: Pagination
+
+        Raises:
+            sqlite3.OperationalError: for an invalid query
+
+        Returns:
+            (list of match dicts, True if there are more results)
+        """
+        sql = [
+            "SELECT logs.id AS log_id, logs.path, logs.task_id, logs.session_id, logs.type,",
+            "       logs.started_at, log_lines.line_no, log_lines.text",
+            "FROM log_lines_fts",
+            "JOIN log_lines ON log_lines.id = log_lines_fts.rowid",
+            "JOIN logs ON logs.id = log_lines.log_id",
+            "WHERE log_lines_fts MATCH ?"
+        ]
+        args = [query]
+
+        for column, value in (('logs.session_id', session_id), ('logs.task_id', task_id), ('logs.type', task_type)):
+            if value is not None:
+                sql.append(f"AND {column} = ?")
+                args.append(value.lower() if column == 'logs.type' else value)
+        if since:
+            sql.append("AND logs.started_at >= ?")
+            args.append(since)
+        if until:
+            sql.append("AND logs.started_at <= ?")
+            args.append(until)
+
+        sql.append("ORDER BY logs.started_at DESC, logs.id DESC, log_lines.line_no LIMIT ? OFFSET ?")
+        args.extend([limit + 1, offset])
+
+        with self._connect() as db:
+            rows = db.execute('\n'.join(sql), args).fetchall()
+            has_more = len(rows) > limit
+
+            matches = []
+            for row in rows[:limit]:
+                match = {
+                    'log': row['path'],
+                    'task_id': row['task_id'],
+                    'session_id': row['session_id'],
+                    'type': row['type'],
+                    'started_at': row['started_at'],
+                    'line': row['line_no'],
+                    'text': row['text']
+                }
+                if context:
+                    around = db.execute(
+                        "SELECT line_no, text FROM log_lines WHERE log_id = ? AND line_no BETWEEN ? AND ? ORDER BY line_no",
+                        (row['log_id'], row['line_no'] - context, row['line_no'] + context)
+                    ).fetchall()
+                    match['before'] = [line['text'] for line in around if line['line_no'] < row['line_no']]
+                    match['after'] = [line['text'] for line in around if line['line_no'] > row['line_no']]
+                matches.append(match)
+
+        return matches, has_more
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Notification Digest - Batches routine n8n notifications so Telegram only
+pings for what needs attention
+
+Every status update goes through a NotificationDigest before it is delivered:
+
+    - immediate types (questions, approval requests, failures, errors) are
+      sent right away
+    - everything else (task starts, retries, progress, ...) is collected and
+      sent as one "digest" message once the oldest collected update is
+      digest_seconds old, or when the run ends
+
+Immediate messages are rate limited to max_per_minute. Over the limit they
+are folded into the next digest instead, except questions and approval
+requests, which the run is waiting on. A digest lists at most max_items
+updates (deferred immediate ones first); the rest are only counted per type.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+# Never deferred: the run waits for an answer to these
+WAITING_TYPES = {'question', 'approval_request'}
+
+
+class NotificationDigest:
+    """Immediate delivery for important notifications, periodic digests for the rest"""
+
+    def __init__(self, deliver, immediate_types, digest_seconds=300, max_per_minute=10, max_items=20):
+        """
+        Args:
+            deliver: Called as deliver(message, message_type, data) to send one notification
+            immediate_types: Notification types sent without waiting for a digest
+            digest_seconds: Longest a collected update waits (0 = send everything immediately)
+            max_per_minute: Rate limit for immediate notifications
+            max_items: Updates listed per digest; the rest are counted
+        """
+        self.deliver = deliver
+        self.immediate_types = set(immediate_types)
+        self.digest_seconds = digest_seconds
+        self.max_per_minute = max_per_minute
+        self.max_items = max_items
+        self.lock = threading.Lock()
+
+        self.pending = []
+        self.pending_counts = Counter()
+        self.omitted = Counter()
+        self.first_pending_at = None
+        self.sent_at = deque()
+
+        self.sent = Counter()
+        self.digested = Counter()
+        self.deferred = Counter()
+        self.dropped = Counter()
+        self.digests = 0
+
+        self.closed = threading.Event()
+        self.thread = None
+
+    def submit(self, message_type, message, data=None):
+        """Send a notification now or collect it for the next digest"""
+        with self.lock:
+            send_now = (
+                not self.digest_seconds
+                or message_type in WAITING_TYPES
+                or (message_type in self.immediate_types and self._allow())
+            )
+            if send_now:
+                self.sent[message_type] += 1
+                self.sent_at.append(time.monotonic())
+            else:
+                deferred = message_type in self.immediate_types
+                if deferred:
+                    self.deferred[message_type] += 1
+                self._collect(message_type, message, data, deferred)
+
+        if send_now:
+            self.deliver(message, message_type, data)
+        else:
+            self._ensure_thread()
+
+    def _allow(self):
+        """Whether the rate limit leaves room for another immediate message"""
+        now = time.monotonic()
+        while self.sent_at and now - self.sent_at[0] >= 60:
+            self.sent_at.popleft()
+        return len(self.sent_at) < self.max_per_minute
+
+    def _collect(self, message_type, message, data, deferred):
+        if self.first_pending_at is None:
+            self.first_pending_at = time.monotonic()
+        self.pending_counts[message_type] += 1
+        self.digested[message_type] += 1
+
+        # Deferred failures are always listed; routine updates up to max_items
+        if deferred or len(self.pending) < self.max_items:
+            self.pending.append({
+                'type': message_type,
+                'message': message,
+                'at': datetime.now().isoformat(),
+                'data': data or {}
+            })
+        else:
+            self.omitted[message_type] += 1
+            self.dropped[message_type] += 1
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.closed.clear()
+            self.thread = threading.Thread(target=self._flush_when_due, daemon=True)
+            self.thread.start()
+
+    def _flush_when_due(self):
+        while not self.closed.wait(timeout=1):
+            with self.lock:
+                due = (
+                    self.first_pending_at is not None
+                    and time.monotonic() - self.first_pending_at >= self.digest_seconds
+                )
+            if due:
+                self.flush()
+
+    def flush(self):
+        """Send the collected updates as one digest (if there are any)"""
+        with self.lock:
+            if not self.pending_counts:
+                return
+            items = self.pending
+            counts = dict(self.pending_counts)
+            omitted = dict(self.omitted)
+            waited = time.monotonic() - self.first_pending_at
+
+            self.pending = []
+            self.pending_counts = Counter()
+            self.omitted = Counter()
+            self.first_pending_at = None
+            self.digests += 1
+
+        summary = ', '.join(f"{count} {message_type}" for message_type, count in counts.items())
+        lines = [f"{sum(counts.values())} updates in the last {max(1, round(waited / 60))} min: {summary}"]
+        lines.extend(f"- {item['message']}" for item in items)
+        if omitted:
+            lines.append(
+                f"...and {sum(omitted.values())} more not listed "
+                f"({', '.join(f'{count} {message_type}' for message_type, count in omitted.items())})"
+            )
+
+        self.deliver('\n'.join(lines), 'digest', {'counts': counts, 'omitted': omitted, 'items': items})
+
+    def close(self):
+        """Send what is still collected and stop the digest thread"""
+        self.closed.set()
+        self.flush()
+
+    def stats(self):
+        """Per-type counts since the orchestrator started"""
+        with self.lock:
+            return {
+                'sent': dict(self.sent),
+                'digested': dict(self.digested),
+                'deferred': dict(self.deferred),
+                'not_listed': dict(self.dropped),
+                'digests': self.digests,
+                'waiting': sum(self.pending_counts.values())
+            }
@@ -8,6 +8,8 @@ Loads tasks from markdown file and executes them one at a time.
 
 import os
 import sys
+import signal
+import itertools
 import subprocess
 import json
 import argparse
@@ -15,18 +17,45 @@ from datetime import datetime
 from pathlib import Path
 import re
 import time
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 import requests
 from dotenv import load_dotenv
 
+from control_channel import ControlChannel
+from failure_policy import FailurePolicy
+from resource_usage import add_usage, summarize_usage, usage_from_rusage
+from stream_output import StreamParser
+
 # Load environment variables from .env file
 load_dotenv()
 
+# State versions are unique across sessions in a process, so a client's
+# "since version N" never matches a newer session by accident
+_state_versions = itertools.count(1)
+
+# Published after every state transition and never modified afterwards:
+# status is a read-only view of get_status() and body its JSON encoding
+StatusSnapshot = namedtuple('StatusSnapshot', ['version', 'status', 'body'])
+
+# How often a task's thread checks for a cancel request while Claude runs
+CANCEL_POLL_SECONDS = 0.25
+
+# How often a task's thread checks whether its Claude process has exited
+PROCESS_POLL_SECONDS = 0.05
+
+
+class TaskCancelled(Exception):
+    """A running task was cancelled (see Orchestrator.cancel_task)"""
+
 
 class Task:
     """Represents a single task to be executed"""
 
     def __init__(self, task_id, title, task_type, priority, requires_approval,
-                 description, acceptance_criteria, instruction):
+                 description, acceptance_criteria, instruction, depends_on=None):
         self.id = task_id
         self.title = title
         self.type = task_type
@@ -35,11 +64,21 @@ class Task:
         self.description = description
         self.acceptance_criteria = acceptance_criteria
         self.instruction = instruction
+        self.depends_on = depends_on or []
         self.status = "pending"
         self.started_at = None
         self.completed_at = None
         self.result = None
         self.output_log = None
+        self.attempts = 0
+        self.timeout = None  # overrides the configured timeout (e.g. for retries)
+        self.not_before = None  # earliest time.time() a retry may start
+        self.approval = None  # None | "approved" | "rejected"
+        self.approval_requested_at = None
+        self.metrics = None  # tokens, tool calls and timings of the last attempt
+        self.source = None  # "file.md#N" for tasks queued by the daemon
+        self.changed_files = []  # repo paths the last attempt changed
+        self.verification = None  # results of the last verification (see verification.py)
 
     def to_dict(self):
         """Convert task to dictionary for JSON serialization"""
@@ -52,13 +91,49 @@ class Task:
             "description": self.description,
             "acceptance_criteria": self.acceptance_criteria,
             "instruction": self.instruction,
+            "depends_on": self.depends_on,
             "status": self.status,
             "started_at": self.started_at,
             "completed_at": self.completed_at,
             "result": self.result,
-            "output_log": self.output_log
+            "output_log": self.output_log,
+            "attempts": self.attempts,
+            "timeout": self.timeout,
+            "approval": self.approval,
+            "metrics": self.metrics,
+            "source": self.source,
+            "changed_files": self.changed_files,
+            "verification": self.verification
         }
 
+    @classmethod
+    def from_dict(cls, task_data):
+        """Rebuild a task from its dictionary form (state file or work queue)"""
+        task = cls(
+            task_id=task_data["id"],
+            title=task_data["title"],
+            task_type=task_data["type"],
+            priority=task_data["priority"],
+            requires_approval=task_data["requires_approval"],
+            description=task_data["description"],
+            acceptance_criteria=task_data["acceptance_criteria"],
+            instruction=task_data["instruction"],
+            depends_on=task_data.get("depends_on", [])
+        )
+        task.status = task_data.get("status", "pending")
+        task.started_at = task_data.get("started_at")
+        task.completed_at = task_data.get("completed_at")
+        task.result = task_data.get("result")
+        task.output_log = task_data.get("output_log")
+        task.attempts = task_data.get("attempts", 0)
+        task.timeout = task_data.get("timeout")
+        task.approval = task_data.get("approval")
+        task.metrics = task_data.get("metrics")
+        task.source = task_data.get("source")
+        task.changed_files = task_data.get("changed_files", [])
+        task.verification = task_data.get("verification")
+        return task
+
 
 class Orchestrator:
     """Main orchestrator class"""
@@ -72,6 +147,39 @@ class Orchestrator:
         self.started_at = None
         self.pending_question = None
         self.question_response = None
+        self.auto_approve = False
+
+        # Task files seen by the daemon's TaskWatcher (saved with the state)
+        self.task_sources = {}
+
+        # Set to wake the run loop (task finished, approval decided, ...)
+        self.wakeup = threading.Event()
+
+        # Skip/pause/prioritize/approve requests from other threads, applied by
+        # the run loop between steps (see control_channel.py)
+        self.controls = ControlChannel()
+        self.pause_requested = False
+        # Held while a request is applied outside a run loop (a WorkQueue
+        # swaps in its own lock, so requests and leases don't interleave)
+        self.control_lock = threading.Lock()
+        # Ids of tasks moved to the front of the queue, most recent first
+        self.prioritized = []
+
+        # Running tasks to stop: task id -> "pause" (requeue) or "cancel" (skip);
+        # each task's thread checks while its Claude process runs
+        self.cancel_requests = {}
+
+        # Bumped on every state transition; listeners are called after each bump
+        self.state_version = next(_state_versions)
+        self.change_listeners = []
+
+        # Extra sections of get_status() (e.g. a WorkQueue's leases): name ->
+        # callable returning a JSON-ready view, called on every publish
+        self.status_sections = {}
+
+        # Latest StatusSnapshot; readers take the reference without locking
+        self.snapshot_lock = threading.Lock()
+        self.status_snapshot = None
 
         # Paths
         self.base_dir = Path(__file__).parent
@@ -79,6 +187,30 @@ class Orchestrator:
         self.tasks_dir = self.base_dir / "orchestrator_tasks"
         self.state_file = self.base_dir / "state.json"
         self.response_file = self.base_dir / "response.json"
+        self.worktrees_dir = self.base_dir / "orchestrator_worktrees"
+        self.context_dir = self.base_dir / "orchestrator_context"
+        self.history_file = self.base_dir / "duration_history.json"
+        self.run_history_dir = self.base_dir / "orchestrator_history"
+        self.repo_root = None
+
+        # Set by enable_worktrees() for isolated/parallel runs
+        self.worktree_pool = None
+
+        # Created by run() from config["failure_policy"]
+        self.failure_policy = None
+
+        # Created by run() when config["verification"] is on
+        self.verifier = None
+        # Task id -> snapshot of the main checkout its checks run against
+        self.verification_bases = {}
+
+        # Created on first use; shared across tasks in the session
+        self.context_builder = None
+        self.doc_index = None
+        self.duration_history = None
+        self.run_history = None
+        self.conflict_analyzer = None
+        self.notifier = None
 
         # Create directories if they don't exist
         self.logs_dir.mkdir(exist_ok=True)
@@ -86,13 +218,89 @@ class Orchestrator:
 
         # Config (will be loaded from file in future)
         self.config = {
-            "claude_command": "claude -p",
+            "claude_command": os.getenv("CLAUDE_COMMAND", "claude -p"),
             "claude_flags": "",
-            "timeout": 300,  # 5 minutes
+            # "stream-json" parses Claude's events for per-task metrics; "text" is plain output
+            "output_format": "stream-json",
+            "timeout": 300,  # 5 minutes, until a task has runtime history
+            # Seconds a cancelled or timed-out Claude process gets after SIGTERM before SIGKILL
+            "cancel_grace_seconds": 5,
+            # Runtime history (see duration_history.py): per-task timeouts from a
+            # high percentile of past runs, and longest-predicted-first scheduling
+            "duration_history": True,
+            "adaptive_timeout": True,
+            "timeout_percentile": 95,
+            "timeout_margin": 1.5,
+            "timeout_min_samples": 5,
+            "min_timeout": 60,
+            "max_timeout": 1800,
+            "longest_first": True,
+            # Only start tasks whose estimated file footprints don't overlap
+            # with running ones (see conflict_analyzer.py)
+            "conflict_analysis": True,
+            "conflict_module_roots": ["src/app/(main)", "src/lib/actions", "src/lib/schemas"],
+            "conflict_type_paths": {"database": ["supabase/migrations"]},
+            # True: a task with no recognisable footprint runs alone (with worktrees,
+            # git apply --check still catches real collisions either way)
+            "conflict_unknown_exclusive": False,
+            # Append every finished attempt to orchestrator_history/ for --report
+            "run_history": True,
+            # Checks a completed task must pass before it counts as completed, run
+            # while the next tasks already execute (see verification.py)
+            "verification": False,
+            "verification_checks": [
+                {"name": "lint", "command": "npx eslint --no-warn-ignored {files}",
+                 "files": ["*.ts", "*.tsx", "*.js", "*.mjs"]},
+                {"name": "typecheck", "command": "npx tsc --noEmit", "files": ["*.ts", "*.tsx"]},
+                {"name": "unit tests", "command": "npx vitest related --run {files}", "files": ["src/*"]},
+                {"name": "acceptance criteria", "claude": True}
+            ],
+            "verification_timeout": 600,  # per check
+            "max_verifications": 2,  # verifications running at once
             "approval_mode": "required",
-            "n8n_notify_url": os.getenv("N8N_NOTIFY_URL", "")
+            "max_parallel": 1,
+            # How many upcoming tasks to request approval for in advance
+            "approval_lookahead": 3,
+            # Retries and what to do once they run out, by task type (see failure_policy.py)
+            "failure_policy": {
+                "default": {"on_failure": "continue"},
+                "database": {"on_failure": "halt"},
+                "deployment": {"on_failure": "halt"}
+            },
+            "worktree_shared_dirs": ["node_modules"],
+            # Project docs sent ahead of each task, by task type ('*' = all types)
+            "project_context": True,
+            "context_max_chars": 60000,
+            "context_docs": {
+                "*": ["CLAUDE.md", "docs/CODE_CONVENTIONS.md"],
+                "database": ["docs/DATABASE-CRITICAL.md", "docs/DATABASE.md"],
+                "backend": ["docs/MODULE-PATTERNS-CRITICAL.md", "docs/DATABASE-CRITICAL.md"],
+                "frontend": [
+                    "docs/MODULE-PATTERNS-CRITICAL.md",
+                    "docs/FORMS-CRITICAL.md",
+                    "docs/STYLES-CRITICAL.md",
+                    "docs/LIST-VIEW-CRITICAL.md"
+                ],
+                "testing": ["docs/testing/TESTING.md"],
+                "documentation": ["docs/README.md", "docs/CONTENT_STYLE_GUIDE.md"]
+            },
+            # Per-task docs picked from a BM25 index (see doc_index.py)
+            "doc_retrieval": True,
+            "retrieval_sources": ["docs/**/*.md", "*.md"],
+            "retrieval_top_k": 3,
+            "retrieval_max_chars": 30000,
+            "n8n_notify_url": os.getenv("N8N_NOTIFY_URL", ""),
+            # Routine updates are batched into one digest per notify_digest_seconds
+            # (0 = send each one); these types go out immediately, at most
+            # notify_max_per_minute of them (see notification_digest.py)
+            "notify_digest_seconds": 300,
+            "notify_immediate": ["question", "approval_request", "task_failed", "error", "warning"],
+            "notify_max_per_minute": 10,
+            "notify_digest_max_items": 20
         }
 
+        self.publish_status()
+
     def notify_n8n(self, message, message_type='info', data=None):
         """Send notification to n8n webhook"""
         if not self.config.get('n8n_notify_url'):
@@ -136,10 +344,10 @@ class Orchestrator:
         self.save_state()
 
         # Send question to n8n
-        self.notify_n8n(
-            message=question,
-            message_type='question',
-            data={
+        self.send_status_update(
+            'question',
+            question,
+            {
                 'options': options,
                 'question_id': f"q-{self.session_id}-{self.current_task_index}"
             }
@@ -174,18 +382,29 @@ class Orchestrator:
             time.sleep(1)
 
         # Timeout
-        self.notify_n8n("Question timed out", "warning")
+        self.send_status_update('warning', "Question timed out")
         self.pending_question = None
         self.status = 'running'
         return None
 
     def send_status_update(self, update_type, message, data=None):
-        """Send status update to n8n"""
-        self.notify_n8n(
-            message=message,
-            message_type=update_type,
-            data=data
-        )
+        """Send status update to n8n, now or in the next digest"""
+        if not self.config.get('n8n_notify_url'):
+            return
+        self.get_notifier().submit(update_type, message, data)
+
+    def get_notifier(self):
+        """The notification digest in front of notify_n8n, created on first use"""
+        if self.notifier is None:
+            from notification_digest import NotificationDigest
+            self.notifier = NotificationDigest(
+                self.notify_n8n,
+                self.config["notify_immediate"],
+                digest_seconds=self.config["notify_digest_seconds"],
+                max_per_minute=self.config["notify_max_per_minute"],
+                max_items=self.config["notify_digest_max_items"]
+            )
+        return self.notifier
 
     def load_tasks(self, task_file):
         """Load tasks from markdown file"""
@@ -194,12 +413,25 @@ class Orchestrator:
         with open(task_file, 'r') as f:
             content = f.read()
 
+        self.tasks.extend(self.parse_tasks(content))
+
+        print(f" Loaded {len(self.tasks)} tasks from {task_file}")
+        return len(self.tasks)
+
+    def parse_tasks(self, content):
+        """
+        Parse tasks from task-file markdown
+
+        Returns:
+            List of Task objects (ids as numbered in the file)
+        """
         # Parse tasks from markdown
         # Expected format:
         # ## Task N: Title
         # **Type:** type
         # **Priority:** priority
         # **Requires Approval:** true/false
+        # **Depends On:** 1, 2              (optional)
         # **Description:** description
         # **Acceptance Criteria:**
         # - criterion 1
@@ -207,22 +439,22 @@ class Orchestrator:
         # **Claude Instruction:**
         # instruction text
 
-        task_pattern = r'## Task (\d+): (.+?)\n\*\*Type:\*\* (.+?)\n\*\*Priority:\*\* (.+?)\n\*\*Requires Approval:\*\* (.+?)\n\*\*Description:\*\* (.+?)\n\*\*Acceptance Criteria:\*\*\n((?:- .+?\n)+)\n\*\*Claude Instruction:\*\*\n(.+?)(?=\n---|\n##|\Z)'
+        task_pattern = r'## Task (\d+): (.+?)\n\*\*Type:\*\* (.+?)\n\*\*Priority:\*\* (.+?)\n\*\*Requires Approval:\*\* (.+?)\n(?:\*\*Depends On:\*\* (.+?)\n)?\*\*Description:\*\* (.+?)\n\*\*Acceptance Criteria:\*\*\n((?:- .+?\n)+)\n\*\*Claude Instruction:\*\*\n(.+?)(?=\n---|\n##|\Z)'
 
-        matches = re.finditer(task_pattern, content, re.DOTALL)
-
-        for match in matches:
+        tasks = []
+        for match in re.finditer(task_pattern, content, re.DOTALL):
             task_id = int(match.group(1))
             title = match.group(2).strip()
             task_type = match.group(3).strip()
             priority = match.group(4).strip()
             requires_approval = match.group(5).strip().lower() == 'true'
-            description = match.group(6).strip()
+            depends_on = [int(n) for n in re.findall(r'\d+', match.group(6) or '')]
+            description = match.group(7).strip()
             acceptance_criteria = [
                 line.strip('- ').strip()
-                for line in match.group(7).strip().split('\n')
+                for line in match.group(8).strip().split('\n')
             ]
-            instruction = match.group(8).strip()
+            instruction = match.group(9).strip()
 
             task = Task(
                 task_id=task_id,
@@ -232,13 +464,13 @@ class Orchestrator:
                 requires_approval=requires_approval,
                 description=description,
                 acceptance_criteria=acceptance_criteria,
-                instruction=instruction
+                instruction=instruction,
+                depends_on=depends_on
             )
 
-            self.tasks.append(task)
+            tasks.append(task)
 
-        print(f" Loaded {len(self.tasks)} tasks from {task_file}")
-        return len(self.tasks)
+        return tasks
 
     def get_current_task(self):
         """Get the current task to execute"""
@@ -246,16 +478,35 @@ class Orchestrator:
             return self.tasks[self.current_task_index]
         return None
 
-    def execute_task(self, task):
-        """Execute a single task using Claude CLI"""
+    def execute_task(self, task, on_output=None):
+        """
+        Execute a single task using Claude CLI
+
+        Args:
+            task: The task to execute
+            on_output: Optional callback receiving each chunk of Claude's
+                output as it arrives (used by remote workers to stream logs)
+
+        Returns:
+            True if the task completed successfully
+        """
         print(f"\n{'='*60}")
-        print(f"�  Executing Task {task.id}/{len(self.tasks)}")
+        print(f"�  Executing Task {task.id}/{len(self.tasks)}")
         print(f"=� {task.title}")
         print(f"Type: {task.type}")
+        predicted = self.predict_duration(task)
+        if predicted is not None:
+            print(f"Predicted: ~{predicted:.0f}s (timeout {self.get_timeout(task):.0f}s)")
         print(f"{'='*60}\n")
 
         task.status = "running"
         task.started_at = datetime.now().isoformat()
+        task.attempts += 1
+        task.changed_files = []
+        started = time.time()
+        # Without worktrees, files already changed before the task aren't its changes
+        track_changes = self.verifier or self.get_conflict_analyzer()
+        dirty_before = self.dirty_files() if track_changes and not self.worktree_pool else None
 
         # Send status update: task started
         self.send_status_update(
@@ -271,40 +522,252 @@ class Orchestrator:
 
         # Create log file for this task
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        log_file = self.logs_dir / f"task-{task.id}-{timestamp}.log"
+        retry = f"-retry{task.attempts - 1}" if task.attempts > 1 else ""
+        log_file = self.logs_dir / f"task-{task.id}-{timestamp}{retry}.log"
         task.output_log = str(log_file)
 
-        # Build Claude command
-        # echo "instruction" | claude -p "execute this following project conventions"
-        claude_cmd = f'{self.config["claude_command"]} {self.config["claude_flags"]} "Execute this task following all project conventions and documentation"'
-
+        worktree = None
         try:
-            # Execute using subprocess with piped input
-            process = subprocess.Popen(
-                claude_cmd,
-                shell=True,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            if self.worktree_pool:
+                worktree = self.worktree_pool.acquire()
+                print(f"🌳 Worktree: {worktree.path}")
+
+            success = self._run_claude(task, log_file, on_output, cwd=worktree.path if worktree else None)
+
+            if success and worktree:
+                success = self._merge_worktree(task, worktree, log_file)
+            elif success and dirty_before is not None:
+                task.changed_files = self.files_changed_since(started, dirty_before)
+
+            # Also after a merge conflict: those are the files to keep apart next time
+            self.record_changes(task)
+
+            if success and self.needs_verification(task):
+                # Completed once its checks pass (see verify_task); its duration
+                # is recorded then
+                self.verification_bases[task.id] = self.verification_base()
+                task.status = "verifying"
+            elif success:
+                self.record_duration(task)
+
+            return success
+
+        except Exception as e:
+            # Worktree setup or merge failed (Claude errors are handled in _run_claude)
+            task.status = "failed"
+            task.result = "exception"
+            task.completed_at = datetime.now().isoformat()
+
+            print(f"\nL Task {task.id} failed with exception: {str(e)}")
+
+            with open(log_file, 'a') as f:
+                f.write(f"\n\nEXCEPTION: {str(e)}\n")
+
+            return False
+
+        finally:
+            if worktree:
+                self.worktree_pool.release(worktree)
+            # A cancel that arrived after Claude finished must not hit a retry
+            self.cancel_requests.pop(task.id, None)
+            # A verifying task's attempt is recorded once the checks are done
+            if task.status != "verifying":
+                self.record_attempt(task)
+
+    def get_timeout(self, task):
+        """
+        Timeout in seconds for a task's next attempt
+
+        A retry's own timeout wins; otherwise the task's history decides
+        (clamped to min/max_timeout), falling back to config["timeout"].
+        """
+        if task.timeout:
+            return task.timeout
+
+        history = self.get_duration_history()
+        if history and self.config["adaptive_timeout"]:
+            adaptive = history.timeout_for(
+                task,
+                pct=self.config["timeout_percentile"],
+                margin=self.config["timeout_margin"],
+                min_samples=self.config["timeout_min_samples"]
             )
+            if adaptive is not None:
+                return int(min(max(adaptive, self.config["min_timeout"]), self.config["max_timeout"]))
+
+        return self.config["timeout"]
 
-            # Send task instruction as input
-            stdout, stderr = process.communicate(
-                input=task.instruction,
-                timeout=self.config["timeout"]
+    def get_duration_history(self):
+        """The runtime history, loaded on first use (None if disabled)"""
+        if not self.config["duration_history"]:
+            return None
+        if self.duration_history is None:
+            from duration_history import DurationHistory
+            self.duration_history = DurationHistory(self.history_file)
+        return self.duration_history
+
+    def predict_duration(self, task):
+        """Predicted seconds for a task, or None without history"""
+        history = self.get_duration_history()
+        return history.predict(task) if history else None
+
+    def get_run_history(self):
+        """The cross-session attempt history, created on first use"""
+        if self.run_history is None:
+            from run_history import RunHistory
+            self.run_history = RunHistory(self.run_history_dir)
+        return self.run_history
+
+    def record_attempt(self, task):
+        """Append a finished attempt to the run history (for --report)"""
+        if not self.config["run_history"]:
+            return
+        try:
+            self.get_run_history().record(self.session_id, task)
+        except OSError as e:
+            print(f"⚠️  Failed to record run history: {e}")
+
+    def record_duration(self, task):
+        """Add a successful run's wall time to the history"""
+        history = self.get_duration_history()
+        wall_seconds = (task.metrics or {}).get("wall_seconds")
+        if history and wall_seconds:
+            history.record(task, wall_seconds)
+
+    def build_prompt(self, task):
+        """
+        Build the text sent to Claude on stdin
+
+        The cached project-context prefix for the task type comes first so it
+        is identical across tasks of that type. The docs most relevant to this
+        particular task follow, then the task itself.
+
+        Returns:
+            (prompt text, list of attached doc names)
+        """
+        parts = []
+        docs = []
+
+        if self.config["project_context"]:
+            if self.context_builder is None:
+                from context_builder import ContextBuilder
+                self.context_builder = ContextBuilder(
+                    self.get_repo_root(),
+                    self.context_dir,
+                    self.config["context_docs"],
+                    max_chars=self.config["context_max_chars"]
+                )
+
+            prefix, docs = self.context_builder.get_prefix(task.type)
+            if prefix:
+                parts.append(prefix)
+
+        if self.config["doc_retrieval"]:
+            relevant = self.find_relevant_docs(task, exclude=docs)
+            if relevant:
+                parts.append(self.format_relevant_docs(relevant))
+                docs = docs + relevant
+
+        failures = self.format_verification_failures(task)
+
+        if not parts:
+            return task.instruction + failures, []
+
+        parts.append(f"# Task\n\n{task.instruction}\n{failures}")
+        return '\n'.join(parts), docs
+
+    def format_verification_failures(self, task):
+        """The checks a retried task failed last time, for its prompt ('' otherwise)"""
+        if not task.verification or task.verification["status"] != "failed":
+            return ""
+
+        parts = ["\n## Previous Attempt Failed Verification\n\n"
+                 "Your previous attempt was rejected by these checks. Fix what they report.\n"]
+        for check in task.verification["checks"]:
+            if check["status"] == "failed":
+                parts.append(f"\n### {check['name']}\n\n```\n{check['output'].strip()}\n```\n")
+        if task.verification.get("error"):
+            parts.append(f"\nVerification error: {task.verification['error']}\n")
+        return ''.join(parts)
+
+    def find_relevant_docs(self, task, exclude=()):
+        """Pick the top-k indexed docs for a task's title, description, type and criteria"""
+        if self.doc_index is None:
+            from doc_index import DocIndex
+            self.doc_index = DocIndex(
+                self.get_repo_root(),
+                self.context_dir / "doc_index.json",
+                self.config["retrieval_sources"]
             )
 
-            # Write output to log file
-            with open(log_file, 'w') as f:
-                f.write(f"Task {task.id}: {task.title}\n")
-                f.write(f"{'='*60}\n\n")
-                f.write(f"INSTRUCTION:\n{task.instruction}\n\n")
-                f.write(f"{'='*60}\n\n")
-                f.write(f"OUTPUT:\n{stdout}\n\n")
+        self.doc_index.refresh()
+
+        query = ' '.join([task.title, task.description, task.type, *task.acceptance_criteria])
+        results = self.doc_index.search(query, top_k=self.config["retrieval_top_k"], exclude=set(exclude))
+        return [name for name, score in results]
+
+    def format_relevant_docs(self, names):
+        """Render retrieved docs for the prompt, within the retrieval budget"""
+        from context_builder import render_docs
+        return (
+            "# Relevant Documentation\n\nThese docs were selected as relevant to this task.\n"
+            + render_docs(self.get_repo_root(), names, self.config["retrieval_max_chars"])
+        )
+
+    def _run_claude(self, task, log_file, on_output=None, cwd=None):
+        """Run Claude for a task, writing its output to the log file"""
+        # Build Claude command
+        # echo "instruction" | claude -p "execute this following project conventions"
+        claude_cmd = f'{self.config["claude_command"]} {self.config["claude_flags"]} "Execute this task following all project conventions and documentation"'
+        if self.config["output_format"] == "stream-json":
+            claude_cmd += ' --output-format stream-json --verbose'
+
+        parser = None
+        process = None
+
+        try:
+            prompt, context_docs = self.build_prompt(task)
+
+            # Output is written to the log as it arrives so partial output
+            # survives timeouts and can be streamed to remote listeners
+            with open(log_file, 'w') as log:
+                log.write(f"Task {task.id}: {task.title}\n")
+                log.write(f"Type: {task.type}\n")
+                log.write(f"Session: {self.session_id}\n")
+                log.write(f"{'='*60}\n\n")
+                log.write(f"INSTRUCTION:\n{task.instruction}\n\n")
+                if context_docs:
+                    log.write(f"CONTEXT: {', '.join(context_docs)}\n\n")
+                log.write(f"{'='*60}\n\n")
+                log.write("OUTPUT:\n")
+                log.flush()
+
+                # Execute using subprocess with piped input
+                parser = StreamParser()
+                process = subprocess.Popen(
+                    claude_cmd,
+                    shell=True,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    cwd=cwd,
+                    # Own process group, so cancelling stops everything Claude started
+                    start_new_session=True
+                )
+
+                # Send task instruction as input
+                stdout, stderr = self._stream_process(
+                    process, prompt, log, self.get_timeout(task), on_output, parser,
+                    cancelled=lambda: task.id in self.cancel_requests
+                )
+
+                log.write("\n\n")
                 if stderr:
-                    f.write(f"{'='*60}\n\n")
-                    f.write(f"ERRORS:\n{stderr}\n")
+                    log.write(f"{'='*60}\n\n")
+                    log.write(f"ERRORS:\n{stderr}\n")
+
+            self.record_metrics(task, parser, process)
 
             # Check result
             if process.returncode == 0:
@@ -312,8 +775,9 @@ class Orchestrator:
                 task.result = "success"
                 task.completed_at = datetime.now().isoformat()
 
-                print(f"\n Task {task.id} completed successfully!")
+                print(f"\n Task {task.id} completed successfully!")
                 print(f"=� Log: {log_file}")
+                self.print_metrics(task)
             else:
                 task.status = "failed"
                 task.result = "error"
@@ -326,18 +790,41 @@ class Orchestrator:
                 return False
 
         except subprocess.TimeoutExpired:
+            self.record_metrics(task, parser, process)
             task.status = "failed"
             task.result = "timeout"
             task.completed_at = datetime.now().isoformat()
 
-            print(f"\n�  Task {task.id} timed out after {self.config['timeout']} seconds")
+            print(f"\n�  Task {task.id} timed out after {self.get_timeout(task)} seconds")
+
+            with open(log_file, 'a') as f:
+                f.write(f"\n\nTIMEOUT: Task exceeded {self.get_timeout(task)} seconds\n")
+
+            return False
+
+        except TaskCancelled:
+            self.record_metrics(task, parser, process)
+            reason = self.cancel_requests.pop(task.id, "cancel")
+            task.completed_at = datetime.now().isoformat()
+
+            if reason == "pause":
+                # Back in the queue; the interrupted attempt doesn't use up a retry
+                task.status = "pending"
+                task.result = "paused"
+                task.attempts -= 1
+            else:
+                task.status = "skipped"
+                task.result = "cancelled"
+
+            print(f"\n⏹️  Task {task.id} stopped ({reason}); partial output kept in {log_file}")
 
             with open(log_file, 'a') as f:
-                f.write(f"\n\nTIMEOUT: Task exceeded {self.config['timeout']} seconds")
+                f.write(f"\n\nCANCELLED: Stopped by a {reason} request; output above is partial\n")
 
             return False
 
         except Exception as e:
+            self.record_metrics(task, parser, process)
             task.status = "failed"
             task.result = "exception"
             task.completed_at = datetime.now().isoformat()
@@ -345,12 +832,301 @@ class Orchestrator:
             print(f"\nL Task {task.id} failed with exception: {str(e)}")
 
             with open(log_file, 'a') as f:
-                f.write(f"\n\nEXCEPTION: {str(e)}")
+                f.write(f"\n\nEXCEPTION: {str(e)}\n")
 
             return False
 
         return True
 
+    def record_metrics(self, task, parser, process=None):
+        """
+        Store a run's metrics on the task (also for failed and timed-out runs),
+        with the process tree's resource usage once the process was collected
+        """
+        if not parser:
+            return
+        if parser.wall_seconds is None:
+            parser.finish()
+        task.metrics = parser.metrics()
+        if getattr(process, 'rusage', None):
+            task.metrics.update(usage_from_rusage(process.rusage))
+
+    def print_metrics(self, task):
+        """One-line summary of a task's metrics"""
+        metrics = task.metrics or {}
+        parts = [f"{metrics.get('wall_seconds')}s"]
+        if metrics.get('input_tokens') is not None:
+            parts.append(f"{metrics['input_tokens']} in / {metrics['output_tokens']} out tokens")
+        if metrics.get('tool_calls') is not None:
+            parts.append(f"{metrics['tool_calls']} tool calls")
+        if metrics.get('cost_usd') is not None:
+            parts.append(f"${metrics['cost_usd']:.4f}")
+        if metrics.get('cpu_user_seconds') is not None:
+            parts.append(f"{metrics['cpu_user_seconds'] + metrics['cpu_system_seconds']:.1f}s CPU")
+            parts.append(f"{metrics['max_rss_mb']:.0f} MB peak")
+        print(f"📊 {', '.join(parts)}")
+
+    def metrics_by_type(self):
+        """
+        Totals of the recorded task metrics per task type, with resource
+        usage (see resource_usage.py) for tasks that have it
+        """
+        totals = {}
+        usage = {}
+        for task in self.tasks:
+            if not task.metrics:
+                continue
+            entry = totals.setdefault(task.type, {
+                "tasks": 0, "input_tokens": 0, "output_tokens": 0,
+                "tool_calls": 0, "wall_seconds": 0, "cost_usd": 0
+            })
+            entry["tasks"] += 1
+            for key in ("input_tokens", "output_tokens", "tool_calls", "wall_seconds", "cost_usd"):
+                entry[key] += task.metrics.get(key) or 0
+            add_usage(usage.setdefault(task.type, {}), task.metrics)
+        for task_type, entry in totals.items():
+            entry["wall_seconds"] = round(entry["wall_seconds"], 2)
+            entry["cost_usd"] = round(entry["cost_usd"], 4)
+            entry.update(summarize_usage(usage[task_type]))
+        return totals
+
+    def _merge_worktree(self, task, worktree, log_file):
+        """
+        Merge a task's worktree changes back into the main working tree
+
+        The patch is always saved next to the log. If it no longer applies
+        (another task changed the same lines meanwhile) the task is marked as
+        a conflict and the patch is left for manual review.
+        """
+        patch = self.worktree_pool.capture(worktree)
+        if not patch:
+            return True
+
+        from conflict_analyzer import files_in_patch
+        task.changed_files = files_in_patch(patch)
+
+        patch_file = Path(str(log_file)[:-len('.log')] + '.patch')
+        with open(patch_file, 'w') as f:
+            f.write(patch)
+
+        if self.worktree_pool.merge(patch):
+            with open(log_file, 'a') as f:
+                f.write(f"\n\nMERGED: {patch_file.name} applied to the working tree\n")
+            return True
+
+        task.status = "failed"
+        task.result = "conflict"
+
+        print(f"\nL Task {task.id} conflicts with changes merged meanwhile")
+        print(f"=� Patch: {patch_file}")
+
+        with open(log_file, 'a') as f:
+            f.write(f"\n\nCONFLICT: {patch_file.name} does not apply to the working tree\n")
+
+        return False
+
+    def record_changes(self, task):
+        """Teach the conflict analyzer which files a task changed (for its footprint)"""
+        analyzer = self.get_conflict_analyzer()
+        if analyzer and task.changed_files:
+            analyzer.record_changes(task, task.changed_files)
+
+    def needs_verification(self, task):
+        """Whether a task that just completed still has checks to pass"""
+        return bool(self.verifier and task.status == "completed" and self.verifier.checks_for(task))
+
+    def dirty_files(self):
+        """Paths git status lists as changed or untracked in the main checkout"""
+        result = subprocess.run(
+            ['git', 'status', '--porcelain', '-z', '--untracked-files=all'],
+            cwd=self.get_repo_root(), capture_output=True, text=True
+        )
+
+        files = []
+        entries = iter(result.stdout.split('\0'))
+        for entry in entries:
+            if len(entry) < 4:
+                continue
+            if entry[0] in 'RC':
+                next(entries, None)  # the rename's source path
+            files.append(entry[3:])
+        return files
+
+    def files_changed_since(self, since, dirty_before):
+        """
+        What a task changed in the main checkout (without worktrees): files
+        that became dirty while it ran, or were written to since it started
+
+        Args:
+            since: time.time() the task started
+            dirty_before: dirty_files() when it started
+        """
+        root = self.get_repo_root()
+        files = []
+        for path in self.dirty_files():
+            full_path = root / path
+            if path not in dirty_before or (full_path.exists() and full_path.stat().st_mtime >= since):
+                files.append(path)
+        return files
+
+    def verification_base(self):
+        """
+        Snapshot commit of the main checkout as it is now, for a task that just
+        finished (with worktrees, the state after the last merge)
+        """
+        if self.worktree_pool:
+            return self.worktree_pool.current_base()
+        return self.verifier.snapshot()
+
+    def verify_task(self, task):
+        """
+        Run the verification checks for a task (in a verification thread)
+
+        The results go to task.verification and the task's log; the run loop
+        decides what happens to the task.
+
+        Returns:
+            True if every check passed
+        """
+        print(f"🔎 Verifying task {task.id} ({len(task.changed_files)} changed files)")
+        try:
+            result = self.verifier.verify(task, task.changed_files, self.verification_bases.pop(task.id))
+        except Exception as e:
+            result = {"status": "failed", "checks": [], "files": task.changed_files, "error": str(e)}
+        task.verification = result
+
+        with open(task.output_log, 'a') as f:
+            f.write(f"\n\n{'='*60}\n\nVERIFICATION: {result['status']}\n")
+            for check in result["checks"]:
+                f.write(f"\n[{check['status']}] {check['name']} ({check['seconds']}s)\n")
+                if check["status"] == "failed":
+                    f.write(f"{check['output']}\n")
+            if result.get("error"):
+                f.write(f"\nEXCEPTION: {result['error']}\n")
+
+        return result["status"] == "passed"
+
+    def _stream_process(self, process, prompt, log, timeout, on_output=None, parser=None, cancelled=None):
+        """
+        Feed the prompt to a Claude process and copy its output to the
+        log as it arrives
+
+        With a StreamParser, each stdout line goes through it and only the
+        readable text it returns is logged and passed to on_output.
+
+        Raises subprocess.TimeoutExpired if it runs longer than timeout
+        seconds, or TaskCancelled once cancelled() returns True - in both
+        cases after stopping its process tree.
+
+        Returns:
+            (stdout, stderr) tuple of the collected output
+        """
+        stdout_chunks = []
+        stderr_chunks = []
+
+        def pump_stdout():
+            for line in process.stdout:
+                stdout_chunks.append(line)
+                if parser:
+                    line = parser.feed(line)
+                    if not line:
+                        continue
+                log.write(line)
+                log.flush()
+                if on_output:
+                    on_output(line)
+
+        def pump_stderr():
+            for line in process.stderr:
+                stderr_chunks.append(line)
+
+        readers = [
+            threading.Thread(target=pump_stdout, daemon=True),
+            threading.Thread(target=pump_stderr, daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+
+        try:
+            process.stdin.write(prompt)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        deadline = time.monotonic() + timeout
+        next_cancel_check = time.monotonic() + CANCEL_POLL_SECONDS
+        try:
+            while not self.collect_process(process):
+                now = time.monotonic()
+                if cancelled and now >= next_cancel_check:
+                    if cancelled():
+                        raise TaskCancelled()
+                    next_cancel_check = now + CANCEL_POLL_SECONDS
+                if now >= deadline:
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+                time.sleep(min(PROCESS_POLL_SECONDS, max(0, deadline - now)))
+        finally:
+            if not self.collect_process(process):
+                self.terminate_process_tree(process)
+            for reader in readers:
+                reader.join(timeout=5)
+            if parser:
+                parser.finish()
+
+        return ''.join(stdout_chunks), ''.join(stderr_chunks)
+
+    def terminate_process_tree(self, process):
+        """
+        Stop a Claude process and everything it started: SIGTERM to its
+        process group, then SIGKILL for whatever is left after
+        config["cancel_grace_seconds"]
+        """
+        # start_new_session made the process a group leader: its pid is the group id
+        deadline = time.monotonic() + self.config["cancel_grace_seconds"]
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            while time.monotonic() < deadline:
+                self.collect_process(process)  # reap the leader, so only live processes count
+                os.killpg(process.pid, 0)
+                time.sleep(PROCESS_POLL_SECONDS)
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass  # the whole group has exited
+        while not self.collect_process(process):
+            time.sleep(PROCESS_POLL_SECONDS)
+
+    def collect_process(self, process):
+        """
+        Reap a Claude process if it has exited, using os.wait4 instead of
+        Popen.wait so its resource usage is kept (process.rusage)
+
+        Returns:
+            True once the process has exited
+        """
+        if process.returncode is not None:
+            return True
+        try:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        except ChildProcessError:
+            # Already collected elsewhere: no usage, Popen sorts out the exit code
+            return process.poll() is not None
+        if pid == 0:
+            return False
+        process.returncode = os.waitstatus_to_exitcode(status)
+        process.rusage = rusage
+        return True
+
+    def cancel_task(self, task, reason):
+        """
+        Stop a running task within CANCEL_POLL_SECONDS plus the grace period
+
+        Args:
+            task: A running task
+            reason: "pause" puts it back in the queue, "cancel" skips it
+        """
+        print(f"⏹️  Stopping task {task.id} ({reason})")
+        self.cancel_requests[task.id] = reason
+
     def next_task(self):
         """Move to the next task"""
         self.current_task_index += 1
@@ -368,71 +1144,663 @@ class Orchestrator:
 
         return task
 
-    def run(self, auto_approve=False):
-        """Run all tasks"""
-        if not self.tasks:
-            print("L No tasks loaded. Use load_tasks() first.")
-            return
-
+    def start_session(self):
+        """Start a new execution session"""
         self.session_id = datetime.now().strftime("%Y%m%d-%H%M%S")
         self.started_at = datetime.now().isoformat()
         self.status = "running"
+        self.mark_changed()
+
+    def mark_changed(self):
+        """
+        Bump the state version, publish a new status snapshot and tell
+        listeners (e.g. long-polling status requests)
+        """
+        self.state_version = next(_state_versions)
+        self.publish_status()
+        for listener in self.change_listeners:
+            listener(self)
+
+    def publish_status(self):
+        """Replace the status snapshot with one of the current state"""
+        with self.snapshot_lock:
+            status = self.get_status()
+            self.status_snapshot = StatusSnapshot(
+                status["version"], MappingProxyType(status), json.dumps(status).encode()
+            )
+
+    def get_repo_root(self):
+        """Root of the git checkout the orchestrator lives in"""
+        if self.repo_root is None:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--show-toplevel'],
+                cwd=self.base_dir, capture_output=True, text=True
+            )
+            self.repo_root = Path(result.stdout.strip()) if result.returncode == 0 else self.base_dir.parent
+        return self.repo_root
+
+    def enable_worktrees(self, size):
+        """Run each task in its own pooled git worktree (required for parallel runs)"""
+        from worktree_pool import WorktreePool
+
+        self.worktree_pool = WorktreePool(
+            self.get_repo_root(),
+            self.worktrees_dir,
+            size,
+            shared_dirs=self.config["worktree_shared_dirs"]
+        )
+
+    def dependencies_finished(self, task):
+        """Whether every task this one depends on has finished (in any way)"""
+        by_id = {t.id: t for t in self.tasks}
+        return all(
+            by_id[dep].status not in ("pending", "running", "verifying")
+            for dep in task.depends_on if dep in by_id
+        )
+
+    def next_pending_task(self, running):
+        """
+        Get the next pending task that is ready to start
+
+        File order with one slot; with several, the longest predicted task
+        that doesn't conflict with a running one goes first (see pick_longest
+        and conflicts_with). Tasks being verified count as running.
+        """
+        now = time.time()
+        running = list(running)
+        running_ids = {t.id for t in running}
+        ready = [
+            task for task in self.tasks
+            if task.status == "pending" and task not in running
+            and not (task.not_before and task.not_before > now)
+            # A running task's status may already read "completed" before it
+            # turns "verifying", so its thread's end is waited for
+            and not running_ids.intersection(task.depends_on)
+            and self.dependencies_finished(task)
+            and not self.needs_approval(task)
+            and not self.conflicts_with(task, running)
+        ]
+        if not ready:
+            return None
+        if self.config["max_parallel"] > 1:
+            return self.pick_longest(ready)
+        return ready[0]
+
+    def get_conflict_analyzer(self):
+        """The conflict analyzer, created on first use (None if disabled)"""
+        if not self.config["conflict_analysis"]:
+            return None
+        if self.conflict_analyzer is None:
+            from conflict_analyzer import ConflictAnalyzer
+            self.conflict_analyzer = ConflictAnalyzer(
+                self.get_repo_root(),
+                self.context_dir / "footprints.json",
+                self.config["conflict_module_roots"],
+                type_paths=self.config["conflict_type_paths"],
+                unknown_exclusive=self.config["conflict_unknown_exclusive"]
+            )
+        return self.conflict_analyzer
+
+    def conflicts_with(self, task, others):
+        """Whether a task may edit the same files as any of the other (running) tasks"""
+        if not others:
+            return False
+        analyzer = self.get_conflict_analyzer()
+        if not analyzer:
+            return False
+        return any(analyzer.conflicts(task, other) for other in others)
 
-        print(f"\n> Orchestrator Starting...")
+    def conflict_graph(self):
+        """Conflicts between unfinished tasks (task id -> conflicting ids), or None if disabled"""
+        analyzer = self.get_conflict_analyzer()
+        if not analyzer:
+            return None
+        return analyzer.graph([t for t in self.tasks if t.status in ("pending", "running", "verifying")])
+
+    def pick_longest(self, ready):
+        """
+        Longest predicted task among those ready to start
+
+        Starting long tasks first keeps short ones for the end, when they
+        fill the gaps, which shortens the total run. Tasks without history
+        count as 0; ties keep file order. Tasks moved to the front of the
+        queue (see prioritize_task) go first regardless.
+        """
+        prioritized = [task for task in ready if task.id in self.prioritized]
+        if prioritized:
+            return min(prioritized, key=lambda task: self.prioritized.index(task.id))
+        if not self.config["longest_first"]:
+            return ready[0]
+        return max(ready, key=lambda task: self.predict_duration(task) or 0)
+
+    def next_retry_delay(self):
+        """Seconds until the earliest delayed retry may start, or None"""
+        delays = [
+            t.not_before - time.time()
+            for t in self.tasks if t.status == "pending" and t.not_before
+        ]
+        return max(0, min(delays)) if delays else None
+
+    def skip_dependents(self, failed_task):
+        """Skip every pending task that (transitively) depends on a failed task"""
+        for task in self.tasks:
+            if failed_task.id in task.depends_on and task.status == "pending":
+                print(f"�  Skipping task {task.id} (depends on failed task {failed_task.id})")
+                task.status = "skipped"
+                task.result = "dependency_failed"
+                self.skip_dependents(task)
+
+    def handle_failure(self, task):
+        """
+        Apply the failure policy to a failed task (never reads stdin)
+
+        Returns:
+            True if the session should halt
+        """
+        if task.result == "timeout" and not task.timeout:
+            # A longer retry timeout builds on the (adaptive) one that expired
+            task.timeout = self.get_timeout(task)
+
+        decision = self.failure_policy.decide(task)
+
+        if decision.action == 'retry':
+            task.status = "pending"
+            task.timeout = decision.timeout
+            task.not_before = time.time() + decision.delay
+
+            print(f"\n= Retrying task {task.id} ({decision.kind}) in {decision.delay:.0f}s"
+                  f" with timeout {self.get_timeout(task)}s")
+            self.send_status_update(
+                'task_retry',
+                f"Retrying Task {task.id} after {decision.kind}: {task.title}",
+                {
+                    'task_id': task.id,
+                    'task_title': task.title,
+                    'failure': decision.kind,
+                    'attempt': task.attempts + 1,
+                    'delay_seconds': round(decision.delay),
+                    'timeout': self.get_timeout(task)
+                }
+            )
+            return False
+
+        self.send_status_update(
+            'task_failed',
+            f"Task {task.id} failed ({decision.kind}): {task.title}",
+            {
+                'task_id': task.id,
+                'task_title': task.title,
+                'failure': decision.kind,
+                'attempts': task.attempts,
+                'action': decision.action
+            }
+        )
+
+        if decision.action == 'skip_dependents':
+            self.skip_dependents(task)
+        elif decision.action == 'halt':
+            print(f"\n=� Orchestrator halted: task {task.id} failed and its policy is 'halt'")
+            return True
+
+        return False
+
+    def update_current_index(self):
+        """Point current_task_index at the first task that is not finished"""
+        self.current_task_index = next(
+            (i for i, t in enumerate(self.tasks) if t.status in ("pending", "running", "verifying")),
+            len(self.tasks)
+        )
+
+    def confirm_task(self, task):
+        """
+        Ask on the console whether to run a task that requires approval
+
+        Returns:
+            'y', 'n' or 'skip'
+        """
+        print(f"\n�  Task {task.id} requires approval")
+        print(f"=� {task.title}")
+        print(f"Type: {task.type}")
+        print(f"\nDescription: {task.description}")
+        print(f"\nAcceptance Criteria:")
+        for criterion in task.acceptance_criteria:
+            print(f"  - {criterion}")
+
+        return input(f"\n�  Execute this task? (y/n/skip): ").lower()
+
+    def needs_approval(self, task):
+        """Whether a task still needs a human decision before it may run"""
+        return task.requires_approval and not self.auto_approve and task.approval != "approved"
+
+    def next_awaiting_approval(self):
+        """Get the first pending task waiting for an approval decision"""
+        for task in self.tasks:
+            if task.status == "pending" and self.needs_approval(task) and task.approval is None:
+                return task
+        return None
+
+    def request_approvals(self):
+        """
+        Ask for approval of the next few tasks that need it, ahead of reaching
+        them, so people can answer while other tasks run
+        """
+        awaiting = [
+            t for t in self.tasks
+            if t.status == "pending" and self.needs_approval(t) and t.approval is None
+        ]
+
+        for task in awaiting[:self.config["approval_lookahead"]]:
+            if task.approval_requested_at:
+                continue
+
+            task.approval_requested_at = datetime.now().isoformat()
+            self.send_status_update(
+                'approval_request',
+                f"Task {task.id} needs approval: {task.title}",
+                {
+                    'task_id': task.id,
+                    'task_title': task.title,
+                    'task_type': task.type,
+                    'description': task.description,
+                    'acceptance_criteria': task.acceptance_criteria
+                }
+            )
+
+    def approve_task(self, task_id):
+        """
+        Record an approval
+
+        Only for the thread that owns the session (the run loop, or whoever
+        applies a control request); other threads send "approve" through
+        send_control().
+
+        Returns:
+            The task, or None if no pending task has that id
+        """
+        return self._decide_approval(task_id, "approved")
+
+    def reject_task(self, task_id):
+        """Record a rejection; the task and its dependents are skipped (same rules as approve_task)"""
+        return self._decide_approval(task_id, "rejected")
+
+    def _decide_approval(self, task_id, decision):
+        task = next((t for t in self.tasks if t.id == task_id and t.status == "pending"), None)
+        if task:
+            task.approval = decision
+            self.mark_changed()
+            self.wakeup.set()
+        return task
+
+    def apply_approval_decisions(self):
+        """Skip rejected tasks (and whatever depends on them)"""
+        for task in self.tasks:
+            if task.status == "pending" and task.approval == "rejected":
+                print(f"�  Skipping task {task.id} (rejected)")
+                task.status = "skipped"
+                task.result = "rejected"
+                self.skip_dependents(task)
+
+    def send_control(self, command, params=None):
+        """
+        Ask the run loop to skip, pause, cancel, prioritize, approve or reject
+        (safe to call from other threads)
+
+        Without an active run loop the request is applied right away.
+
+        Returns:
+            ControlRequest; wait() on it for the result
+        """
+        control = self.controls.send(command, params or {}, self.apply_control_now)
+        self.wakeup.set()
+        return control
+
+    def apply_control_now(self, command, params):
+        """Apply a control request outside of a run loop"""
+        with self.control_lock:
+            result = self.apply_control(command, params)
+            if not result.get("error"):
+                self.save_state()
+        return result
+
+    def apply_controls(self):
+        """Apply the control requests sent since the last step (run loop only)"""
+        controls = self.controls.drain()
+        for control in controls:
+            control.finish(self.apply_control(control.command, control.params))
+        if controls:
+            self.save_state()
+
+    def apply_control(self, command, params):
+        """
+        Apply one control request
+
+        Returns:
+            Result dict with a "message", or an "error"
+        """
+        task_id = params.get("task_id")
+        pending = [t for t in self.tasks if t.status == "pending"]
+
+        if command in ("approve", "reject"):
+            task = self.next_awaiting_approval() if task_id is None else None
+            if task_id is None and not task:
+                return {"error": "No task is awaiting approval"}
+            task = self._decide_approval(task_id if task_id is not None else task.id,
+                                         "approved" if command == "approve" else "rejected")
+            if not task:
+                return {"error": f"Task {task_id} is not pending"}
+            return {
+                "message": f"Task {task.id} {command}d: {task.title}",
+                "task_id": task.id
+            }
+
+        if command == "skip":
+            # Default: the next task that hasn't started
+            task = next((t for t in pending if task_id is None or t.id == task_id), None)
+            if not task:
+                running = any(t.id == task_id and t.status == "running" for t in self.tasks)
+                return {"error": f"Task {task_id} is running (use cancel)" if running else
+                        "No pending task to skip" if task_id is None else f"Task {task_id} is not pending"}
+            print(f"�  Skipping task {task.id} (skipped by request)")
+            task.status = "skipped"
+            task.result = "skipped"
+            self.skip_dependents(task)
+            return {"message": f"Task {task.id} skipped: {task.title}", "task_id": task.id}
+
+        if command == "prioritize":
+            task = next((t for t in pending if t.id == task_id), None)
+            if not task:
+                return {"error": f"Task {task_id} is not pending"}
+            self.prioritize_task(task)
+            return {"message": f"Task {task.id} moved to the front of the queue: {task.title}", "task_id": task.id}
+
+        if command == "pause":
+            self.pause_requested = True
+            if not self.controls.active:
+                self.status = "paused"
+            # Without a run loop "running" tasks are leased to remote workers
+            if not params.get("cancel") or not self.controls.active:
+                return {"message": "Pausing: no new tasks start, running tasks finish"}
+            stopped = [t for t in self.tasks if t.status == "running"]
+            for task in stopped:
+                self.cancel_task(task, "pause")
+            return {
+                "message": "Pausing: no new tasks start, running tasks are stopped and requeued",
+                "task_ids": [t.id for t in stopped]
+            }
+
+        if command == "cancel":
+            if not self.controls.active:
+                return {"error": "No local run is active"}
+            # Default: every running task
+            stopped = [t for t in self.tasks if t.status == "running" and (task_id is None or t.id == task_id)]
+            if not stopped:
+                return {"error": "No task is running" if task_id is None else f"Task {task_id} is not running"}
+            for task in stopped:
+                self.cancel_task(task, "cancel")
+            return {
+                "message": f"Stopping running task(s) {', '.join(str(t.id) for t in stopped)}; skipped once stopped",
+                "task_ids": [t.id for t in stopped]
+            }
+
+        return {"error": f"Unknown control command: {command}"}
+
+    def prioritize_task(self, task):
+        """Move a pending task ahead of every other pending task"""
+        self.tasks.remove(task)
+        first_pending = next((i for i, t in enumerate(self.tasks) if t.status == "pending"), len(self.tasks))
+        self.tasks.insert(first_pending, task)
+
+        if task.id in self.prioritized:
+            self.prioritized.remove(task.id)
+        self.prioritized.insert(0, task.id)
+
+    def run(self, auto_approve=False, interactive=None, watcher=None, resume=False):
+        """
+        Run all tasks
+
+        Up to config["max_parallel"] tasks run at once, each in a worker thread.
+        Parallel runs require worktrees (see enable_worktrees) so tasks don't
+        edit the same checkout.
+
+        Approvals are requested ahead of time (see request_approvals) while
+        already approved or exempt tasks keep running. When interactive (the
+        default when stdin is a terminal) the console is asked only once
+        nothing else can start; otherwise decisions arrive as "approve" and
+        "reject" requests through send_control(), e.g. from the webhook server.
+
+        With a TaskWatcher (daemon mode) the run doesn't end when the queue
+        is empty: new task files are picked up as they appear, until the
+        process is interrupted or a failure policy halts it.
+
+        The loop is the only thread that changes the session while it runs;
+        other threads send skip/pause/cancel/prioritize/approve requests
+        through send_control(), applied here between steps.
+
+        With resume, a paused session (in memory or from load_state) keeps its
+        session id; tasks stopped by a pause run again.
+
+        With config["verification"], a completed task is "verifying" until its
+        checks pass (see verify_task). Verification runs in its own threads and
+        doesn't take a slot, so the next tasks that neither depend on it nor
+        conflict with it start meanwhile.
+        """
+        if not self.tasks and not watcher:
+            print("L No tasks loaded. Use load_tasks() first.")
+            return
+
+        # Raises ValueError for a bad config["failure_policy"], before anything runs
+        self.failure_policy = FailurePolicy(self.config["failure_policy"], base_timeout=self.config["timeout"])
+
+        if interactive is None:
+            interactive = sys.stdin.isatty()
+
+        max_parallel = max(1, self.config["max_parallel"])
+        if max_parallel > 1 and not self.worktree_pool:
+            self.enable_worktrees(max_parallel)
+
+        self.auto_approve = auto_approve
+        self.verifier = None
+        if self.config["verification"]:
+            from verification import Verifier
+            self.verifier = Verifier(
+                self.get_repo_root(),
+                self.config["verification_checks"],
+                self.config["claude_command"],
+                timeout=self.config["verification_timeout"],
+                pool_dir=self.worktrees_dir / "verify",
+                size=max(1, self.config["max_verifications"]),
+                shared_dirs=self.config["worktree_shared_dirs"]
+            )
+        if resume and self.session_id:
+            self.status = "running"
+            self.mark_changed()
+        else:
+            self.start_session()
+
+        print(f"\n> Orchestrator Starting...")
         print(f"Session ID: {self.session_id}")
         print(f"Tasks: {len(self.tasks)}")
-        print(f"Mode: {'Auto-approve' if auto_approve else 'Manual approval'}\n")
-
-        while self.current_task_index < len(self.tasks):
-            task = self.get_current_task()
-
-            # Check if approval required
-            if task.requires_approval and not auto_approve:
-                print(f"\n�  Task {task.id} requires approval")
-                print(f"=� {task.title}")
-                print(f"Type: {task.type}")
-                print(f"\nDescription: {task.description}")
-                print(f"\nAcceptance Criteria:")
-                for criterion in task.acceptance_criteria:
-                    print(f"  - {criterion}")
-
-                response = input(f"\n�  Execute this task? (y/n/skip): ").lower()
-
-                if response == 'n':
-                    print("\n=� Orchestrator stopped by user")
-                    self.status = "paused"
+        print(f"Mode: {'Auto-approve' if auto_approve else 'Manual approval'}")
+        print(f"Parallel: {max_parallel}{' (worktrees)' if self.worktree_pool else ''}")
+        if watcher:
+            print(f"Watching: {watcher.tasks_dir}")
+        print()
+
+        running = {}
+        verifying = {}
+        stopping = None
+        self.wakeup.clear()
+        self.pause_requested = False
+        self.controls.open()
+
+        executor = ThreadPoolExecutor(max_workers=max_parallel)
+        verify_executor = ThreadPoolExecutor(max_workers=max(1, self.config["max_verifications"]))
+
+        def start_verification(task):
+            future = verify_executor.submit(self.verify_task, task)
+            future.add_done_callback(lambda f: self.wakeup.set())
+            verifying[future] = task
+
+        try:
+            # Verification interrupted last time starts over
+            for task in self.tasks:
+                if task.status == "verifying":
+                    if self.verifier:
+                        self.verification_bases[task.id] = self.verification_base()
+                        start_verification(task)
+                    else:
+                        task.status = "completed"
+
+            while True:
+                if watcher and stopping is None and watcher.poll():
+                    self.save_state()
+
+                self.apply_controls()
+                self.apply_approval_decisions()
+
+                if self.pause_requested and stopping is None:
+                    print("\n=� Orchestrator pausing (requested)")
+                    stopping = "paused"
+
+                # Fill free slots with the next approved or exempt tasks
+                while stopping is None and len(running) < max_parallel:
+                    task = self.next_pending_task([*running.values(), *verifying.values()])
+                    if not task:
+                        break
+
+                    # Claim the task before its thread starts
+                    task.status = "running"
+                    self.status = "running"
+                    future = executor.submit(self.execute_task, task)
+                    future.add_done_callback(lambda f: self.wakeup.set())
+                    running[future] = task
+                    self.mark_changed()
+
+                if stopping is None:
+                    self.request_approvals()
+
+                # On the console, only ask once a slot is free and nothing else can start
+                if stopping is None and interactive and len(running) < max_parallel:
+                    task = self.next_awaiting_approval()
+                    if task:
+                        response = self.confirm_task(task)
+
+                        if response == 'n':
+                            print("\n=� Orchestrator stopped by user")
+                            stopping = "paused"
+                        elif response == 'skip':
+                            self.reject_task(task.id)
+                        else:
+                            self.approve_task(task.id)
+                        continue
+
+                self.update_current_index()
+                retry_delay = None if stopping else self.next_retry_delay()
+                awaiting = stopping is None and self.next_awaiting_approval() is not None
+
+                busy = running or verifying
+
+                if not busy and retry_delay is None and not awaiting and (not watcher or stopping):
+                    break
+
+                if not busy and retry_delay is None and awaiting:
+                    # Nothing to do until someone answers
+                    self.status = "waiting_approval"
                     self.save_state()
-                    return
-                elif response == 'skip':
-                    print(f"�  Skipping task {task.id}")
-                    task.status = "skipped"
-                    self.next_task()
-                    continue
-
-            # Execute task
-            success = self.execute_task(task)
-
-            if not success:
-                print(f"\nL Task {task.id} failed. Stop execution? (y/n): ", end='')
-                response = input().lower()
-
-                if response == 'y':
-                    print("\n=� Orchestrator stopped due to task failure")
-                    self.status = "failed"
+                elif not busy and retry_delay is None and self.status != "watching":
+                    # Daemon with an empty queue: wait for new task files
+                    self.status = "watching"
                     self.save_state()
-                    return
 
-            # Move to next task
-            self.next_task()
+                if watcher and stopping is None:
+                    retry_delay = watcher.poll_seconds if retry_delay is None else min(retry_delay, watcher.poll_seconds)
+
+                # Woken by a finished task, an approval decision or a due retry
+                self.wakeup.wait(timeout=retry_delay)
+                self.wakeup.clear()
+                if self.status == "waiting_approval":
+                    self.status = "running"
+
+                for future in [f for f in running if f.done()]:
+                    task = running.pop(future)
+                    success = future.result()
+                    self.mark_changed()
+
+                    if task.status == "verifying":
+                        start_verification(task)
+                        continue
+                    if task.status == "skipped":
+                        # Cancelled while running
+                        self.skip_dependents(task)
+                    elif not success and task.status == "failed" and stopping is None and self.handle_failure(task):
+                        stopping = "failed"
+
+                    # Show progress
+                    completed = sum(1 for t in self.tasks if t.status == "completed")
+                    print(f"\n=� Progress: {completed}/{len(self.tasks)} tasks completed")
+
+                for future in [f for f in verifying if f.done()]:
+                    task = verifying.pop(future)
+                    task.completed_at = datetime.now().isoformat()
+
+                    if future.result():
+                        task.status = "completed"
+                        self.record_duration(task)
+                        print(f"\n Task {task.id} passed verification")
+                    else:
+                        task.status = "failed"
+                        task.result = "verification_failed"
+                        failed = [c["name"] for c in task.verification["checks"] if c["status"] == "failed"]
+                        print(f"\nL Task {task.id} failed verification: {', '.join(failed) or 'error'}")
+                        print(f"=� Log: {task.output_log}")
+
+                    self.record_attempt(task)
+                    self.mark_changed()
+
+                    if task.status == "failed" and stopping is None and self.handle_failure(task):
+                        stopping = "failed"
+
+                    completed = sum(1 for t in self.tasks if t.status == "completed")
+                    print(f"\n=� Progress: {completed}/{len(self.tasks)} tasks completed")
+        except BaseException:
+            # Interrupted (e.g. Ctrl+C): Claude runs in its own session and doesn't
+            # get the terminal's SIGINT, so stop it before waiting for its thread.
+            # Tasks being verified stay "verifying" and are checked again on resume
+            for task in running.values():
+                self.cancel_task(task, "pause")
+            if self.verifier:
+                self.verifier.stop()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+            verify_executor.shutdown(wait=True)
+            # Requests that arrive from now on are applied by their senders
+            for control in self.controls.close():
+                control.finish(self.apply_control(control.command, control.params))
+
+        # Anything still pending waits on a dependency that can never finish
+        for task in self.tasks:
+            if task.status == "pending" and not stopping:
+                print(f"�  Skipping task {task.id} (blocked by its dependencies)")
+                task.status = "skipped"
+                task.result = "blocked"
+
+        self.update_current_index()
 
-            # Show progress
-            completed = sum(1 for t in self.tasks if t.status == "completed")
-            print(f"\n=� Progress: {completed}/{len(self.tasks)} tasks completed")
+        # Whatever is still waiting for a digest goes out now
+        if self.notifier:
+            self.notifier.close()
+
+        if stopping:
+            # Tasks that were already running have finished above
+            self.status = stopping
+            self.save_state()
+            return
 
         # All tasks completed
         self.status = "completed"
         print(f"\n{'='*60}")
-        print(f" All tasks completed!")
+        print(f" All tasks completed!")
         print(f"{'='*60}\n")
 
         self.print_summary()
@@ -465,12 +1833,14 @@ class Orchestrator:
             "status": self.status,
             "tasks": [task.to_dict() for task in self.tasks],
             "started_at": self.started_at,
-            "last_activity": datetime.now().isoformat()
+            "last_activity": datetime.now().isoformat(),
+            "task_sources": self.task_sources
         }
 
         with open(self.state_file, 'w') as f:
             json.dump(state, f, indent=2)
 
+        self.mark_changed()
         print(f"=� State saved to {self.state_file}")
 
     def load_state(self):
@@ -487,25 +1857,16 @@ class Orchestrator:
         self.current_task_index = state.get("current_task_index", 0)
         self.status = state.get("status", "idle")
         self.started_at = state.get("started_at")
+        self.task_sources = state.get("task_sources", {})
 
         # Reconstruct tasks
         self.tasks = []
         for task_data in state.get("tasks", []):
-            task = Task(
-                task_id=task_data["id"],
-                title=task_data["title"],
-                task_type=task_data["type"],
-                priority=task_data["priority"],
-                requires_approval=task_data["requires_approval"],
-                description=task_data["description"],
-                acceptance_criteria=task_data["acceptance_criteria"],
-                instruction=task_data["instruction"]
-            )
-            task.status = task_data.get("status", "pending")
-            task.started_at = task_data.get("started_at")
-            task.completed_at = task_data.get("completed_at")
-            task.result = task_data.get("result")
-            task.output_log = task_data.get("output_log")
+            task = Task.from_dict(task_data)
+
+            # A task that was running when the session stopped starts over
+            if task.status == "running":
+                task.status = "pending"
 
             self.tasks.append(task)
 
@@ -520,15 +1881,26 @@ class Orchestrator:
         """Get current status"""
         current_task = self.get_current_task()
         completed = sum(1 for t in self.tasks if t.status == "completed")
+        awaiting = [
+            t.id for t in self.tasks
+            if t.status == "pending" and self.needs_approval(t) and t.approval is None
+        ]
 
         return {
             "session_id": self.session_id,
+            "version": self.state_version,
             "status": self.status,
             "current_task": self.current_task_index + 1 if current_task else None,
             "total_tasks": len(self.tasks),
             "completed": completed,
             "pending": len(self.tasks) - completed,
-            "current_task_title": current_task.title if current_task else None
+            "current_task_title": current_task.title if current_task else None,
+            "awaiting_approval": awaiting,
+            "metrics_by_type": self.metrics_by_type(),
+            "notifications": self.notifier.stats() if self.notifier else None,
+            # Only once the run loop has created the analyzer
+            "conflicts": self.conflict_graph() if self.conflict_analyzer else None,
+            **{name: view() for name, view in self.status_sections.items()}
         }
 
 
@@ -539,10 +1911,53 @@ def main():
     parser.add_argument('--resume', action='store_true', help='Resume from saved state')
     parser.add_argument('--auto-approve', action='store_true', help='Auto-approve all tasks')
     parser.add_argument('--status', action='store_true', help='Show current status')
+    parser.add_argument('--conflicts', action='store_true', help='With --task-file, show each task\'s estimated footprint and the conflict graph, without running')
+    parser.add_argument('--report', action='store_true', help='Show analytics over all past runs (throughput, durations, failure rates)')
+    parser.add_argument('--json', action='store_true', help='With --report, print the report as JSON instead of tables')
+    parser.add_argument('--parallel', type=int, default=1, help='Run up to N tasks at once, each in its own git worktree')
+    parser.add_argument('--worktrees', action='store_true', help='Run each task in an isolated git worktree')
+    parser.add_argument('--no-context', action='store_true', help='Do not send the cached project-context docs with each task')
+    parser.add_argument('--no-retrieval', action='store_true', help='Do not attach docs picked for each task from the docs index')
+    parser.add_argument('--verify', action='store_true', help='Check each completed task against its acceptance criteria (config["verification_checks"]) while the next tasks run')
+    parser.add_argument('--output-format', choices=['stream-json', 'text'], help='Claude output format (default: stream-json, which records token and tool-call metrics)')
+    parser.add_argument('--daemon', action='store_true', help='Keep running, queueing task files dropped into orchestrator_tasks/')
+    parser.add_argument('--worker', action='store_true', help='Run as a worker pulling tasks from a webhook server')
+    parser.add_argument('--server', help='Webhook server URL for worker mode (e.g. http://localhost:5000)')
+    parser.add_argument('--worker-id', help='Worker name reported to the server (default: hostname-pid)')
 
     args = parser.parse_args()
 
+    if args.worker:
+        if not args.server:
+            parser.error('--worker requires --server URL')
+        if args.parallel > 1:
+            parser.error('--worker runs one task at a time; start several workers instead')
+
+        from worker import Worker
+        try:
+            Worker(args.server, worker_id=args.worker_id).run()
+        except KeyboardInterrupt:
+            print("\n=� Worker stopped")
+        return
+
     orchestrator = Orchestrator()
+    orchestrator.config["max_parallel"] = args.parallel
+    if args.no_context:
+        orchestrator.config["project_context"] = False
+    if args.no_retrieval:
+        orchestrator.config["doc_retrieval"] = False
+    if args.output_format:
+        orchestrator.config["output_format"] = args.output_format
+    if args.verify:
+        orchestrator.config["verification"] = True
+    if args.worktrees:
+        orchestrator.enable_worktrees(max(1, args.parallel))
+
+    try:
+        FailurePolicy(orchestrator.config["failure_policy"])
+    except ValueError as e:
+        print(f"L Invalid failure policy: {e}")
+        sys.exit(1)
 
     if args.status:
         # Show status
@@ -558,14 +1973,57 @@ def main():
             print("No active session")
         return
 
+    if args.report:
+        from run_history import format_report
+        report = orchestrator.get_run_history().report()
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(f"\n=� Run Report\n")
+            print(format_report(report))
+        return
+
+    if args.daemon:
+        from task_watcher import TaskWatcher
+
+        # Continue the queue of a previous daemon (tasks and files already
+        # seen); the state of a one-shot run is not picked up
+        if orchestrator.state_file.exists() and orchestrator.load_state() and not orchestrator.task_sources:
+            orchestrator.tasks = []
+        watcher = TaskWatcher(orchestrator, orchestrator.tasks_dir)
+        try:
+            orchestrator.run(auto_approve=args.auto_approve, watcher=watcher)
+        except KeyboardInterrupt:
+            orchestrator.status = "paused"
+            orchestrator.save_state()
+            if orchestrator.notifier:
+                orchestrator.notifier.close()
+            print("\n=� Daemon stopped")
+        return
+
     if args.resume:
         # Resume from saved state
         if orchestrator.load_state():
-            orchestrator.run(auto_approve=args.auto_approve)
+            orchestrator.run(auto_approve=args.auto_approve, resume=True)
         else:
             print("L No state to resume from")
         return
 
+    if args.task_file and args.conflicts:
+        orchestrator.load_tasks(args.task_file)
+        analyzer = orchestrator.get_conflict_analyzer()
+        if not analyzer:
+            print("L Conflict analysis is disabled")
+            return
+        graph = orchestrator.conflict_graph()
+        for task in orchestrator.tasks:
+            footprint = sorted(analyzer.footprint(task))
+            print(f"\nTask {task.id}: {task.title}")
+            unknown = '(unknown - runs alone)' if analyzer.unknown_exclusive else '(unknown - conflicts with nothing)'
+            print(f"   Footprint: {', '.join(footprint) or unknown}")
+            print(f"   Conflicts with: {', '.join(map(str, graph[task.id])) or 'none'}")
+        return
+
     if args.task_file:
         # Load tasks and run
         orchestrator.load_tasks(args.task_file)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resource Usage - CPU, memory, block I/O and context switches of a task's
+process tree
+
+The orchestrator collects each Claude process with os.wait4() instead of
+Popen.wait(), which returns the process's rusage. That covers the process and
+every descendant it waited for - the shell, Claude, and the tools Claude ran
+(npm, tsc, git, ...). Processes left running in the background and killed
+with the group on cancel/timeout are not counted.
+
+    cpu_user_seconds / cpu_system_seconds - CPU time, summed over the tree
+    max_rss_mb           - peak resident memory of the largest single process
+    block_reads / writes - filesystem blocks read and written
+    voluntary_switches   - waits for I/O, locks, child processes
+    involuntary_switches - preemptions (high when the host is oversubscribed)
+
+Per task type, cpu_per_wall (CPU seconds per wall second) is about how many
+cores one such task keeps busy, and max_rss_mb how much memory to reserve for
+it - the numbers for deciding how many tasks can run at once on a host.
+"""
+
+import sys
+
+# Summed across tasks; max_rss_mb takes the maximum instead
+SUM_KEYS = (
+    'cpu_user_seconds', 'cpu_system_seconds', 'block_reads', 'block_writes',
+    'voluntary_switches', 'involuntary_switches'
+)
+
+# ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+MAXRSS_PER_MB = 1024 * 1024 if sys.platform == 'darwin' else 1024
+
+
+def usage_from_rusage(rusage):
+    """Metrics dict from an os.wait4() rusage"""
+    return {
+        "cpu_user_seconds": round(rusage.ru_utime, 2),
+        "cpu_system_seconds": round(rusage.ru_stime, 2),
+        "max_rss_mb": round(rusage.ru_maxrss / MAXRSS_PER_MB, 1),
+        "block_reads": rusage.ru_inblock,
+        "block_writes": rusage.ru_oublock,
+        "voluntary_switches": rusage.ru_nvcsw,
+        "involuntary_switches": rusage.ru_nivcsw
+    }
+
+
+def add_usage(totals, metrics):
+    """Add one task's usage to per-type totals (no-op without usage)"""
+    if not metrics or metrics.get('cpu_user_seconds') is None:
+        return
+    totals['usage_tasks'] = totals.get('usage_tasks', 0) + 1
+    for key in SUM_KEYS:
+        totals[key] = totals.get(key, 0) + (metrics.get(key) or 0)
+    totals['max_rss_mb'] = max(totals.get('max_rss_mb', 0), metrics.get('max_rss_mb') or 0)
+    totals['usage_wall_seconds'] = totals.get('usage_wall_seconds', 0) + (metrics.get('wall_seconds') or 0)
+
+
+def summarize_usage(totals):
+    """
+    Rounded per-type usage from add_usage() totals, with cpu_per_wall
+
+    Returns:
+        dict, or {} if no task had usage
+    """
+    if not totals.get('usage_tasks'):
+        return {}
+    cpu_seconds = totals['cpu_user_seconds'] + totals['cpu_system_seconds']
+    wall_seconds = totals['usage_wall_seconds']
+    summary = {key: round(totals[key], 2) if isinstance(totals[key], float) else totals[key] for key in SUM_KEYS}
+    summary['max_rss_mb'] = totals['max_rss_mb']
+    summary['cpu_per_wall'] = round(cpu_seconds / wall_seconds, 2) if wall_seconds else None
+    return summary
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run History - Append-only record of task attempts, and the --report analytics
+
+Every finished task attempt (completed, failed, timed out, ...) is appended as
+one JSON line to orchestrator_history/runs.jsonl, across all sessions.
+
+The report keeps running aggregates in orchestrator_history/report_cursor.json
+together with the byte offset it has read up to, so each report only parses
+lines appended since the previous one:
+
+    - throughput per day (attempts, completed, failed)
+    - p50/p95/p99 task duration by type
+    - failure and timeout rates by type
+    - CPU seconds per wall second and peak memory by type (see resource_usage.py)
+    - the slowest tasks
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from duration_history import percentile
+
+CURSOR_VERSION = 2
+
+
+def attempt_seconds(task):
+    """Wall time of a task's last attempt, from its metrics or timestamps"""
+    wall_seconds = (task.metrics or {}).get("wall_seconds")
+    if wall_seconds is not None:
+        return wall_seconds
+    if task.started_at and task.completed_at:
+        started = datetime.fromisoformat(task.started_at)
+        completed = datetime.fromisoformat(task.completed_at)
+        return round((completed - started).total_seconds(), 2)
+    return None
+
+
+def cpu_seconds(task):
+    """User + system CPU seconds of a task's last attempt, or None without usage"""
+    metrics = task.metrics or {}
+    if metrics.get("cpu_user_seconds") is None:
+        return None
+    return round(metrics["cpu_user_seconds"] + metrics["cpu_system_seconds"], 2)
+
+
+class RunHistory:
+    """Task attempts across sessions, with an incrementally updated report"""
+
+    def __init__(self, history_dir, slowest_count=10):
+        self.history_dir = Path(history_dir)
+        self.runs_file = self.history_dir / "runs.jsonl"
+        self.cursor_file = self.history_dir / "report_cursor.json"
+        self.slowest_count = slowest_count
+        self.lock = threading.Lock()
+
+    def record(self, session_id, task):
+        """Append a finished attempt of a task"""
+        record = {
+            "session_id": session_id,
+            "task_id": task.id,
+            "title": task.title,
+            "type": (task.type or '').lower(),
+            "status": task.status,
+            "result": task.result,
+            "attempt": task.attempts,
+            "started_at": task.started_at,
+            "completed_at": task.completed_at or datetime.now().isoformat(),
+            "seconds": attempt_seconds(task),
+            "cpu_seconds": cpu_seconds(task),
+            "max_rss_mb": (task.metrics or {}).get("max_rss_mb"),
+            "log": task.output_log
+        }
+
+        with self.lock:
+            self.history_dir.mkdir(exist_ok=True)
+            with open(self.runs_file, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+
+    def _empty_cursor(self):
+        return {"version": CURSOR_VERSION, "offset": 0, "days": {}, "types": {}, "slowest": []}
+
+    def _load_cursor(self):
+        if not self.cursor_file.exists():
+            return self._empty_cursor()
+        try:
+            with open(self.cursor_file, 'r') as f:
+                cursor = json.load(f)
+        except (OSError, ValueError):
+            return self._empty_cursor()
+        if cursor.get("version") != CURSOR_VERSION:
+            return self._empty_cursor()
+        return cursor
+
+    def _save_cursor(self, cursor):
+        tmp_file = self.cursor_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(cursor, f)
+        tmp_file.replace(self.cursor_file)
+
+    def update(self):
+        """
+        Fold runs appended since the last report into the aggregates
+
+        Returns:
+            (aggregates, number of new runs read)
+        """
+        with self.lock:
+            cursor = self._load_cursor()
+            if not self.runs_file.exists():
+                return cursor, 0
+
+            # The history was truncated or replaced - start over
+            if self.runs_file.stat().st_size < cursor["offset"]:
+                cursor = self._empty_cursor()
+
+            new_runs = 0
+            with open(self.runs_file, 'rb') as f:
+                f.seek(cursor["offset"])
+                for raw in f:
+                    # A partly written last line is read next time
+                    if not raw.endswith(b"\n"):
+                        break
+                    cursor["offset"] += len(raw)
+                    try:
+                        run = json.loads(raw)
+                    except ValueError:
+                        continue
+                    self._add(cursor, run)
+                    new_runs += 1
+
+            if new_runs:
+                self.history_dir.mkdir(exist_ok=True)
+                self._save_cursor(cursor)
+
+            return cursor, new_runs
+
+    def _add(self, cursor, run):
+        day = (run.get("completed_at") or "")[:10] or "unknown"
+        day_entry = cursor["days"].setdefault(day, {"attempts": 0, "completed": 0, "failed": 0})
+        type_entry = cursor["types"].setdefault(run.get("type") or "unknown", {
+            "attempts": 0, "completed": 0, "failed": 0, "timeouts": 0, "durations": [],
+            "cpu_seconds": 0, "cpu_wall_seconds": 0, "max_rss_mb": None
+        })
+
+        for entry in (day_entry, type_entry):
+            entry["attempts"] += 1
+            if run.get("status") == "completed":
+                entry["completed"] += 1
+            elif run.get("status") == "failed":
+                entry["failed"] += 1
+
+        if run.get("result") == "timeout":
+            type_entry["timeouts"] += 1
+
+        seconds = run.get("seconds")
+
+        # Resource usage counts for every attempt: failed ones used the host too
+        if run.get("cpu_seconds") is not None and seconds:
+            type_entry["cpu_seconds"] += run["cpu_seconds"]
+            type_entry["cpu_wall_seconds"] += seconds
+        if run.get("max_rss_mb") is not None:
+            type_entry["max_rss_mb"] = max(type_entry["max_rss_mb"] or 0, run["max_rss_mb"])
+
+        if seconds is None or run.get("status") != "completed":
+            return
+
+        type_entry["durations"].append(seconds)
+
+        slowest = cursor["slowest"]
+        if len(slowest) < self.slowest_count or seconds > slowest[-1]["seconds"]:
+            slowest.append({key: run.get(key) for key in ("session_id", "task_id", "title", "type", "seconds", "completed_at")})
+            slowest.sort(key=lambda item: item["seconds"], reverse=True)
+            del slowest[self.slowest_count:]
+
+    def report(self):
+        """Build the report from the (updated) aggregates"""
+        cursor, new_runs = self.update()
+
+        by_type = {}
+        for task_type, entry in sorted(cursor["types"].items()):
+            durations = entry["durations"]
+            attempts = entry["attempts"]
+            by_type[task_type] = {
+                "attempts": attempts,
+                "completed": entry["completed"],
+                "failure_rate": round(entry["failed"] / attempts, 3) if attempts else 0,
+                "timeout_rate": round(entry["timeouts"] / attempts, 3) if attempts else 0,
+                "p50_seconds": percentile(durations, 50) if durations else None,
+                "p95_seconds": percentile(durations, 95) if durations else None,
+                "p99_seconds": percentile(durations, 99) if durations else None,
+                "cpu_per_wall": (
+                    round(entry["cpu_seconds"] / entry["cpu_wall_seconds"], 2)
+                    if entry["cpu_wall_seconds"] else None
+                ),
+                "max_rss_mb": entry["max_rss_mb"]
+            }
+
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "new_runs": new_runs,
+            "total_runs": sum(entry["attempts"] for entry in cursor["types"].values()),
+            "throughput_by_day": dict(sorted(cursor["days"].items())),
+            "by_type": by_type,
+            "slowest": cursor["slowest"]
+        }
+
+
+def format_report(report):
+    """Plain-text tables for a report"""
+    lines = [f"Runs: {report['total_runs']} ({report['new_runs']} new since the last report)", ""]
+
+    lines.append("Throughput per day")
+    lines.append(f"{'Day':<12}{'Attempts':>10}{'Completed':>11}{'Failed':>8}")
+    for day, entry in report["throughput_by_day"].items():
+        lines.append(f"{day:<12}{entry['attempts']:>10}{entry['completed']:>11}{entry['failed']:>8}")
+
+    def seconds(value):
+        return '-' if value is None else f"{value:.1f}"
+
+    lines.append("")
+    lines.append("By task type")
+    lines.append(
+        f"{'Type':<16}{'Attempts':>10}{'Fail %':>8}{'Timeout %':>11}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}"
+        f"{'CPU/wall':>10}{'Peak MB':>9}"
+    )
+    for task_type, entry in report["by_type"].items():
+        lines.append(
+            f"{task_type:<16}{entry['attempts']:>10}"
+            f"{entry['failure_rate'] * 100:>8.1f}{entry['timeout_rate'] * 100:>11.1f}"
+            f"{seconds(entry['p50_seconds']):>9}{seconds(entry['p95_seconds']):>9}{seconds(entry['p99_seconds']):>9}"
+            f"{'-' if entry['cpu_per_wall'] is None else entry['cpu_per_wall']:>10}"
+            f"{'-' if entry['max_rss_mb'] is None else round(entry['max_rss_mb']):>9}"
+        )
+
+    lines.append("")
+    lines.append("Slowest tasks")
+    lines.append(f"{'Seconds':>9}  {'Session':<16}{'Task':>5}  Title")
+    for run in report["slowest"]:
+        lines.append(f"{seconds(run['seconds']):>9}  {run['session_id'] or '-':<16}{run['task_id']:>5}  {run['title']}")
+
+    return "\n".join(lines)
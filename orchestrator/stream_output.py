@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stream Output - Parses Claude's stream-json output as it arrives
+
+With `--output-format stream-json` Claude prints one JSON event per line
+(system init, assistant messages, tool results and a final result). The
+parser turns each event back into readable text for the task log and keeps
+per-task metrics: tokens in/out (and prompt-cache tokens), tool calls, turns,
+cost, time to the first event and total wall time.
+
+Lines that aren't JSON (plain-text output, CLI warnings) are passed through
+unchanged, so the same parser works in text mode; there it only records the
+timings.
+"""
+
+import json
+import time
+
+USAGE_KEYS = ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')
+
+
+class StreamParser:
+    """Incremental parser for one Claude run"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_event_seconds = None
+        self.wall_seconds = None
+        self.usage_by_message = {}
+        self.tool_calls = set()
+        self.final = None
+
+    def feed(self, line):
+        """
+        Parse one line of Claude's stdout
+
+        Returns:
+            Text to write to the log for this line ('' if there is nothing to show)
+        """
+        if self.first_event_seconds is None:
+            self.first_event_seconds = round(time.monotonic() - self.started, 2)
+
+        stripped = line.strip()
+        if not stripped.startswith('{'):
+            return line
+
+        try:
+            event = json.loads(stripped)
+        except ValueError:
+            return line
+
+        if not isinstance(event, dict):
+            return line
+
+        event_type = event.get('type')
+        if event_type == 'assistant':
+            return self._assistant(event.get('message') or {})
+        if event_type == 'result':
+            self.final = event
+            if event.get('is_error'):
+                return f"\nRESULT ({event.get('subtype', 'error')}): {event.get('result', '')}\n"
+            return ''
+        if event_type == 'system' and event.get('subtype') == 'init':
+            return f"[session {event.get('session_id', '?')}, model {event.get('model', '?')}]\n"
+
+        # Tool results and other events are only counted, not logged
+        return ''
+
+    def _assistant(self, message):
+        # One message can arrive as several events (one per content block),
+        # each repeating the message's usage - keep the latest per message id
+        if message.get('usage'):
+            self.usage_by_message[message.get('id') or len(self.usage_by_message)] = message['usage']
+
+        parts = []
+        for block in message.get('content') or []:
+            if block.get('type') == 'text':
+                parts.append(block.get('text', '') + '\n')
+            elif block.get('type') == 'tool_use':
+                self.tool_calls.add(block.get('id') or len(self.tool_calls))
+                parts.append(f"→ {block.get('name', 'tool')}: {self._summarize(block.get('input'))}\n")
+        return ''.join(parts)
+
+    def _summarize(self, tool_input, limit=200):
+        """Short one-line form of a tool call's input for the log"""
+        if isinstance(tool_input, dict):
+            for key in ('command', 'file_path', 'path', 'pattern', 'url', 'description'):
+                if key in tool_input:
+                    text = str(tool_input[key])
+                    break
+            else:
+                text = json.dumps(tool_input)
+        else:
+            text = str(tool_input or '')
+
+        text = ' '.join(text.split())
+        return text if len(text) <= limit else text[:limit] + '…'
+
+    def finish(self):
+        """Stop the wall clock (call once the process has exited)"""
+        self.wall_seconds = round(time.monotonic() - self.started, 2)
+
+    def metrics(self):
+        """
+        Metrics for the run so far
+
+        Token counts come from the final result event when there is one (it
+        totals the whole run), otherwise from the assistant messages seen.
+        Token fields are None in text mode.
+        """
+        final = self.final or {}
+        usage = final.get('usage')
+        if not usage and self.usage_by_message:
+            usage = {
+                key: sum(u.get(key) or 0 for u in self.usage_by_message.values())
+                for key in USAGE_KEYS
+            }
+        usage = usage or {}
+
+        return {
+            "input_tokens": usage.get('input_tokens'),
+            "output_tokens": usage.get('output_tokens'),
+            "cache_read_tokens": usage.get('cache_read_input_tokens'),
+            "cache_creation_tokens": usage.get('cache_creation_input_tokens'),
+            "tool_calls": len(self.tool_calls) if (self.tool_calls or usage) else None,
+            "turns": final.get('num_turns') or (len(self.usage_by_message) or None),
+            "cost_usd": final.get('total_cost_usd'),
+            "first_event_seconds": self.first_event_seconds,
+            "wall_seconds": self.wall_seconds
+        }
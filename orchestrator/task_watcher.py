@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Task Watcher - Feeds task files dropped into orchestrator_tasks/ to a running
+orchestrator (daemon mode)
+
+Files are polled with stat(); only new or modified files are read. A modified
+file is split into its "## Task N:" sections and only sections whose text
+changed are parsed again:
+
+    - new sections are queued as new tasks
+    - changed sections update their task if it hasn't started yet
+    - removed sections (or files) skip their task if it hasn't started yet
+
+Every file numbers its tasks from 1, so queued tasks get ids that are unique
+across the whole queue; "Depends On" numbers are mapped to those ids within
+the same file. What was seen per file is kept in the orchestrator's
+task_sources, which is saved with the state, so a restarted daemon doesn't
+queue the same tasks again.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+SECTION_PATTERN = re.compile(r'^## Task (\d+):', re.MULTILINE)
+
+
+TRAILING_SEPARATOR = re.compile(r'(\s*---)*\s*$')
+
+
+def split_sections(content):
+    """
+    Task sections of a file by their number in the file
+
+    The "---" separator and blank lines after a section are dropped, so
+    appending a task doesn't make the previous one look changed.
+    """
+    starts = [match.start() for match in SECTION_PATTERN.finditer(content)] + [len(content)]
+    sections = {}
+    for start, end in zip(starts, starts[1:]):
+        text = TRAILING_SEPARATOR.sub('', content[start:end]) + '\n'
+        sections[int(SECTION_PATTERN.match(text).group(1))] = text
+    return sections
+
+
+class TaskWatcher:
+    """Polls a tasks directory and queues new or changed tasks"""
+
+    def __init__(self, orchestrator, tasks_dir, poll_seconds=2, pattern='*.md'):
+        self.orchestrator = orchestrator
+        self.tasks_dir = Path(tasks_dir)
+        self.poll_seconds = poll_seconds
+        self.pattern = pattern
+
+    @property
+    def sources(self):
+        return self.orchestrator.task_sources
+
+    def poll(self):
+        """
+        Pick up new, changed and removed task files
+
+        Returns:
+            Number of tasks queued, updated or skipped
+        """
+        changed = 0
+        seen = set()
+
+        for path in sorted(self.tasks_dir.glob(self.pattern)):
+            if not path.is_file():
+                continue
+
+            seen.add(path.name)
+            stat = path.stat()
+            source = self.sources.get(path.name)
+            if source and source['size'] == stat.st_size and source['mtime_ns'] == stat.st_mtime_ns:
+                continue
+
+            changed += self._load_file(path, stat)
+
+        for name in set(self.sources) - seen:
+            changed += self._remove_file(name)
+
+        return changed
+
+    def _tasks_by_id(self):
+        return {task.id: task for task in self.orchestrator.tasks}
+
+    def _load_file(self, path, stat):
+        source = self.sources.setdefault(path.name, {'sections': {}})
+        source['size'] = stat.st_size
+        source['mtime_ns'] = stat.st_mtime_ns
+
+        # Keys are strings so the mapping survives the JSON state file
+        known = source['sections']
+        sections = {str(number): text for number, text in split_sections(path.read_text(errors='replace')).items()}
+        tasks = self._tasks_by_id()
+        changed = 0
+
+        for number, text in sections.items():
+            digest = hashlib.sha256(text.encode()).hexdigest()[:16]
+            entry = known.get(number)
+            if entry and entry['hash'] == digest:
+                continue
+
+            parsed = self.orchestrator.parse_tasks(text)
+            if not parsed:
+                print(f"⚠️  {path.name}: could not parse Task {number}, waiting for it to change")
+                continue
+
+            task = tasks.get(entry['task_id']) if entry else None
+            if task and task.status != "pending":
+                print(f"⚠️  {path.name}: Task {number} already {task.status}; changes ignored (add a new task instead)")
+                entry['hash'] = digest
+                continue
+
+            new_task = parsed[0]
+            new_task.source = f"{path.name}#{number}"
+            if task:
+                # Not started yet - take the new definition, keep its queue id
+                new_task.id = task.id
+                self.orchestrator.tasks[self.orchestrator.tasks.index(task)] = new_task
+                print(f"🔄 Updated task {new_task.id} from {new_task.source}: {new_task.title}")
+            else:
+                new_task.id = max(tasks, default=0) + 1
+                self.orchestrator.tasks.append(new_task)
+                print(f"📥 Queued task {new_task.id} from {new_task.source}: {new_task.title}")
+
+            tasks[new_task.id] = new_task
+            known[number] = {'hash': digest, 'task_id': new_task.id, 'depends_on': new_task.depends_on}
+            changed += 1
+
+        for number in set(known) - set(sections):
+            changed += self._skip_removed(tasks.get(known.pop(number)['task_id']))
+
+        # Map "Depends On" file numbers to queue ids (also for tasks whose
+        # dependencies were only just added)
+        for number, entry in known.items():
+            task = tasks.get(entry['task_id'])
+            if not task or task.status != "pending":
+                continue
+            task.depends_on = [
+                known[str(dep)]['task_id'] for dep in entry['depends_on'] if str(dep) in known
+            ]
+            missing = [dep for dep in entry['depends_on'] if str(dep) not in known]
+            if missing:
+                print(f"⚠️  {task.source}: depends on Task {', '.join(map(str, missing))}, not in {path.name} (ignored)")
+
+        return changed
+
+    def _remove_file(self, name):
+        source = self.sources.pop(name)
+        tasks = self._tasks_by_id()
+        return sum(self._skip_removed(tasks.get(entry['task_id'])) for entry in source['sections'].values())
+
+    def _skip_removed(self, task):
+        if not task or task.status != "pending":
+            return 0
+        print(f"⏭️  Skipping task {task.id} (removed from {task.source})")
+        task.status = "skipped"
+        task.result = "removed"
+        return 1
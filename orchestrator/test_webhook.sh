@@ -35,6 +35,7 @@ curl -s -X POST $BASE_URL/webhook/command \
   -d "{
     \"command\": \"start\",
     \"secret\": \"$SECRET\",
+    \"wait\": 5,
     \"params\": {
       \"task_file\": \"examples/example-tasks.md\",
       \"auto_approve\": true
@@ -0,0 +1,76 @@
+"""Shared fixtures: the modules live flat in orchestrator/, next to this directory"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+TASKS = """# Tasks
+
+## Task 1: First task
+**Type:** testing
+**Priority:** low
+**Requires Approval:** false
+**Description:** first
+**Acceptance Criteria:**
+- done
+
+**Claude Instruction:**
+Do the first thing
+
+---
+
+## Task 2: Second task
+**Type:** testing
+**Priority:** low
+**Requires Approval:** false
+**Description:** second
+**Acceptance Criteria:**
+- done
+
+**Claude Instruction:**
+Do the second thing
+"""
+
+
+@pytest.fixture
+def task_file(tmp_path):
+    """A task file with two independent tasks"""
+    path = tmp_path / "tasks.md"
+    path.write_text(TASKS)
+    return path
+
+
+@pytest.fixture
+def isolate_orchestrator(tmp_path, monkeypatch):
+    """
+    Make every Orchestrator created in the test keep its state, logs and
+    history under tmp_path, send no notifications and never start Claude
+
+    Returns:
+        list of the orchestrators created
+    """
+    import orchestrator as orchestrator_module
+
+    created = []
+    original_init = orchestrator_module.Orchestrator.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.logs_dir = tmp_path / "logs"
+        self.logs_dir.mkdir(exist_ok=True)
+        self.state_file = tmp_path / "state.json"
+        self.context_dir = tmp_path / "context"
+        self.history_file = tmp_path / "duration_history.json"
+        self.run_history_dir = tmp_path / "history"
+        self.worktrees_dir = tmp_path / "worktrees"
+        self.config["n8n_notify_url"] = None
+        self.config["claude_command"] = "echo"
+        # Tasks without footprint history would otherwise run one at a time
+        self.config["conflict_analysis"] = False
+        created.append(self)
+
+    monkeypatch.setattr(orchestrator_module.Orchestrator, "__init__", init)
+    return created
@@ -0,0 +1,48 @@
+"""CommandQueue ordering, backpressure and error results"""
+
+import threading
+import time
+
+import pytest
+
+from command_queue import CommandQueue, QueueFull
+
+
+def test_commands_run_one_at_a_time_in_order():
+    ran = []
+    queue = CommandQueue(lambda name, params: (ran.append(name) or {'ok': name}, 200))
+
+    commands = [queue.submit(name, {}) for name in ('start', 'pause', 'resume')]
+    for command in commands:
+        assert command.done.wait(5)
+
+    assert ran == ['start', 'pause', 'resume']
+    assert commands[1].result == {'ok': 'pause'}
+    assert commands[1].status_code == 200
+    assert queue.get(commands[1].id) is commands[1]
+
+
+def test_full_queue_raises():
+    release = threading.Event()
+    queue = CommandQueue(lambda name, params: (release.wait(5), 200), maxsize=1)
+    try:
+        running = queue.submit('first', {})
+        while running.state != 'running':
+            time.sleep(0.01)
+        queue.submit('second', {})
+
+        with pytest.raises(QueueFull):
+            queue.submit('third', {})
+        assert queue.retry_after() >= 1
+    finally:
+        release.set()
+
+
+def test_failing_command_gets_500():
+    def execute(name, params):
+        raise RuntimeError('boom')
+
+    command = CommandQueue(execute).submit('start', {})
+    assert command.done.wait(5)
+    assert command.result == {'error': 'boom'}
+    assert command.status_code == 500
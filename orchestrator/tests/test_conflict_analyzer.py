@@ -0,0 +1,64 @@
+"""Footprint conflicts between tasks"""
+
+import subprocess
+
+import pytest
+
+from conflict_analyzer import ConflictAnalyzer
+from orchestrator import Task
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A git repo with a couple of modules under src/lib/actions"""
+    root = tmp_path / "repo"
+    (root / "src/lib/actions").mkdir(parents=True)
+    (root / "src/lib/actions/people.ts").write_text("export {}\n")
+    (root / "src/lib/actions/events.ts").write_text("export {}\n")
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    subprocess.run(['git', 'add', '.'], cwd=root, check=True)
+    return root
+
+
+def task(task_id, instruction, task_type='backend'):
+    return Task(task_id, f"Task {task_id}", task_type, 'low', False, '', [], instruction)
+
+
+def analyzer(repo, tmp_path, **kwargs):
+    return ConflictAnalyzer(repo, tmp_path / "footprints.json", ["src/lib/actions"], **kwargs)
+
+
+def test_tasks_without_a_footprint_run_in_parallel_by_default(repo, tmp_path):
+    a, b = task(1, "Tidy up the wording"), task(2, "Make it faster")
+    assert not analyzer(repo, tmp_path).conflicts(a, b)
+    assert analyzer(repo, tmp_path, unknown_exclusive=True).conflicts(a, b)
+
+
+def test_overlapping_footprints_conflict(repo, tmp_path):
+    conflicts = analyzer(repo, tmp_path).conflicts
+    people = task(1, "Add a filter to the people actions")
+    also_people = task(2, "Fix src/lib/actions/people.ts")
+    events = task(3, "Add paging to the events actions")
+
+    assert conflicts(people, also_people)
+    assert not conflicts(people, events)
+
+
+def test_graph_is_reused_until_tasks_or_history_change(repo, tmp_path, monkeypatch):
+    conflicts = analyzer(repo, tmp_path)
+    tasks = [task(1, "Add a filter to the people actions"), task(2, "Fix src/lib/actions/people.ts")]
+
+    graph = conflicts.graph(tasks)
+    assert graph == {1: [2], 2: [1]}
+    assert conflicts.graph(tasks) is graph
+
+    # A finished task drops out: only the remaining pairs are looked at
+    events = task(3, "Add paging to the events actions")
+    assert conflicts.graph([tasks[0], events]) == {1: [], 3: []}
+    monkeypatch.setattr('conflict_analyzer.paths_overlap', lambda a, b: pytest.fail("pair compared again"))
+    assert conflicts.graph(tasks) == graph
+    monkeypatch.undo()
+
+    # Learned changes give new footprints, and a new graph
+    conflicts.record_changes(events, ["src/lib/actions/people.ts"])
+    assert conflicts.graph([tasks[0], events]) == {1: [3], 3: [1]}
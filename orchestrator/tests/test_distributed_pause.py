@@ -0,0 +1,165 @@
+"""
+Distributed sessions (work queue + webhook server): pause/resume and status
+reads
+"""
+
+import threading
+import time
+
+import pytest
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def server(isolate_orchestrator, monkeypatch):
+    """webhook_server with a fresh session slot, command queue and config"""
+    import webhook_server
+
+    monkeypatch.setattr(webhook_server, "orchestrator", None)
+    monkeypatch.setattr(webhook_server, "orchestrator_thread", None)
+    monkeypatch.setattr(webhook_server, "work_queue", None)
+    monkeypatch.setitem(webhook_server.config, "webhook_secret", SECRET)
+    monkeypatch.setitem(webhook_server.config, "n8n_notify_url", "")
+    webhook_server.init_command_handling()
+    yield webhook_server
+
+    if webhook_server.work_queue:
+        webhook_server.work_queue.stop()
+
+
+def command(client, name, **params):
+    response = client.post("/webhook/command", json={
+        "command": name, "secret": SECRET, "params": params, "wait": 5
+    })
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def lease(client, worker_id="worker-1"):
+    response = client.post("/webhook/work/lease", json={"secret": SECRET, "worker_id": worker_id})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_pause_stops_leasing(server, task_file):
+    client = server.app.test_client()
+    command(client, "start", task_file=str(task_file), distributed=True)
+
+    first = lease(client)
+    assert first["task"]["id"] == 1
+
+    command(client, "pause")
+    body = lease(client)
+    assert body["task"] is None
+    assert body["paused"] is True
+    assert body["finished"] is False
+
+    # The leased task still completes while paused
+    response = client.post("/webhook/work/complete", json={
+        "secret": SECRET, "lease_id": first["lease_id"], "status": "completed", "result": "success"
+    })
+    assert response.status_code == 200
+    body = lease(client)
+    assert body["task"] is None
+    assert body["paused"] is True
+
+
+def test_resume_leases_from_the_same_queue(server, task_file):
+    client = server.app.test_client()
+    command(client, "start", task_file=str(task_file), distributed=True)
+    session = server.orchestrator
+
+    first = lease(client)
+    command(client, "pause")
+    assert lease(client)["task"] is None
+
+    result = command(client, "resume")
+    assert result["status"] == "ok"
+
+    # Same session, not a second one loaded from state.json running task 1 again
+    assert server.orchestrator is session
+    assert server.orchestrator_thread is None
+    assert session.status == "running"
+
+    second = lease(client)
+    assert second["task"]["id"] == 2
+    assert second["lease_id"] != first["lease_id"]
+    assert {t.id: t.status for t in session.tasks} == {1: "running", 2: "running"}
+
+
+def test_controls_wait_for_the_queue_lock(isolate_orchestrator, task_file):
+    from orchestrator import Orchestrator
+    from work_queue import WorkQueue
+
+    session = Orchestrator()
+    session.load_tasks(str(task_file))
+    session.start_session()
+    queue = WorkQueue(session, auto_approve=True)
+
+    # A skip from another thread waits while a lease holds the queue lock
+    results = []
+    with queue.lock:
+        thread = threading.Thread(target=lambda: results.append(session.send_control("skip").wait(5)))
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive()
+        assert session.tasks[0].status == "pending"
+
+    thread.join(5)
+    assert results[0]["task_id"] == 1
+    lease, task = queue.lease("worker-1")
+    assert task["id"] == 2
+
+
+def status(client, **headers):
+    return client.post("/webhook/status", json={"secret": SECRET}, headers=headers)
+
+
+def test_status_does_not_wait_for_the_queue_lock(server, task_file):
+    client = server.app.test_client()
+    command(client, "start", task_file=str(task_file), distributed=True)
+    lease(client)
+
+    results = []
+    with server.work_queue.lock:
+        thread = threading.Thread(target=lambda: results.append(status(client)))
+        thread.start()
+        thread.join(2)
+        assert not thread.is_alive()
+
+    body = results[0].get_json()
+    assert [lease['task_id'] for lease in body['work_queue']['leases']] == [1]
+    assert body['work_queue']['queued'] == 1
+
+
+def test_heartbeat_changes_the_etag(server, task_file):
+    client = server.app.test_client()
+    command(client, "start", task_file=str(task_file), distributed=True)
+    leased = lease(client)
+
+    etag = status(client).headers['ETag']
+    assert status(client, **{'If-None-Match': etag}).status_code == 304
+
+    client.post("/webhook/work/heartbeat", json={"secret": SECRET, "lease_id": leased['lease_id']})
+    response = status(client, **{'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_expired_leases_are_requeued_by_the_timer(server, task_file, monkeypatch):
+    monkeypatch.setitem(server.config, "lease_seconds", 0)
+    monkeypatch.setitem(server.config, "lease_expiry_check_seconds", 0.05)
+    client = server.app.test_client()
+    command(client, "start", task_file=str(task_file), distributed=True)
+    lease(client)
+
+    # No worker asks for work; the timer re-queues and publishes
+    deadline = time.time() + 5
+    body = status(client).get_json()
+    while body['work_queue']['leases'] and time.time() < deadline:
+        time.sleep(0.05)
+        body = status(client).get_json()
+
+    assert body['work_queue']['leases'] == []
+    assert body['work_queue']['queued'] == 2
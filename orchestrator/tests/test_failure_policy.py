@@ -0,0 +1,74 @@
+"""FailurePolicy retry, backoff and on_failure decisions"""
+
+import pytest
+
+from failure_policy import FailurePolicy
+from orchestrator import Task
+
+
+def failed_task(task_type='backend', result='error', attempts=1, timeout=None):
+    task = Task(1, 'Task', task_type, 'low', False, '', [], 'Do it')
+    task.status = 'failed'
+    task.result = result
+    task.attempts = attempts
+    task.timeout = timeout
+    return task
+
+
+def test_retries_with_exponential_backoff():
+    policy = FailurePolicy({'default': {'jitter': 0, 'retries': {'error': 2}}})
+
+    first = policy.decide(failed_task(attempts=1))
+    second = policy.decide(failed_task(attempts=2))
+    assert (first.action, first.kind, first.delay) == ('retry', 'error', 10)
+    assert (second.action, second.delay) == ('retry', 20)
+
+    assert policy.decide(failed_task(attempts=3)).action == 'continue'
+
+
+def test_backoff_is_capped():
+    policy = FailurePolicy({'default': {'jitter': 0, 'max_backoff_seconds': 15, 'retries': {'error': 5}}})
+    assert policy.decide(failed_task(attempts=4)).delay == 15
+
+
+def test_timeout_retry_gets_a_longer_timeout():
+    policy = FailurePolicy(base_timeout=300)
+
+    assert policy.decide(failed_task(result='timeout')).timeout == 600
+    assert policy.decide(failed_task(result='timeout', timeout=100)).timeout == 200
+    assert policy.decide(failed_task(result='error', timeout=100)).timeout == 100
+
+
+def test_task_type_overrides_default():
+    policy = FailurePolicy({
+        'default': {'on_failure': 'skip_dependents'},
+        'database': {'on_failure': 'halt', 'retries': {'error': 0}}
+    })
+
+    assert policy.decide(failed_task('database')).action == 'halt'
+    decision = policy.decide(failed_task('backend', attempts=2))
+    assert (decision.action, decision.kind) == ('skip_dependents', 'error')
+
+
+@pytest.mark.parametrize('result, kind', [
+    ('timeout', 'timeout'),
+    ('conflict', 'conflict'),
+    ('exception', 'exception'),
+    ('verification_failed', 'verification'),
+    ('error', 'error')
+])
+def test_failures_are_classified_by_result(result, kind):
+    assert FailurePolicy().decide(failed_task(result=result, attempts=9)).kind == kind
+
+
+@pytest.mark.parametrize('policies', [
+    {'default': {'on_failre': 'halt'}},
+    {'default': {'on_failure': 'stop'}},
+    {'default': {'retries': {'timout': 1}}},
+    {'default': {'retries': {'error': -1}}},
+    {'default': {'backoff_seconds': 'ten'}},
+    {'database': 'halt'}
+])
+def test_invalid_policy_is_rejected_when_built(policies):
+    with pytest.raises(ValueError):
+        FailurePolicy(policies)
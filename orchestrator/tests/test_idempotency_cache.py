@@ -0,0 +1,39 @@
+"""IdempotencyCache: retried deliveries get the original command back"""
+
+import pytest
+
+from command_queue import IdempotencyCache, QueueFull
+
+
+def test_idempotency_key_returns_the_original_command():
+    cache = IdempotencyCache()
+    created = []
+
+    first, new = cache.get_or_create('delivery-1', lambda: created.append(1) or 'command-1')
+    again, repeated = cache.get_or_create('delivery-1', lambda: created.append(2) or 'command-2')
+
+    assert (first, new) == ('command-1', True)
+    assert (again, repeated) == ('command-1', False)
+    assert created == [1]
+
+
+def test_idempotency_entries_expire_and_are_bounded():
+    expired = IdempotencyCache(ttl_seconds=0)
+    expired.get_or_create('key', lambda: 'old')
+    assert expired.get_or_create('key', lambda: 'new') == ('new', True)
+
+    bounded = IdempotencyCache(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        bounded.get_or_create(key, lambda: key)
+    assert list(bounded.entries) == ['b', 'c']
+
+
+def test_failed_create_stores_nothing():
+    cache = IdempotencyCache()
+
+    def create():
+        raise QueueFull()
+
+    with pytest.raises(QueueFull):
+        cache.get_or_create('key', create)
+    assert cache.get_or_create('key', lambda: 'command') == ('command', True)
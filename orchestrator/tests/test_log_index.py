@@ -0,0 +1,77 @@
+"""LogIndex: incremental refresh and lines written without a trailing newline"""
+
+import os
+import time
+
+import pytest
+
+from log_index import LogIndex
+
+HEADER = "Task 3: Slow task\nType: backend\nSession: 20260101-120000\n"
+
+
+@pytest.fixture
+def logs(tmp_path):
+    logs_dir = tmp_path / "logs"
+    logs_dir.mkdir()
+    return logs_dir
+
+
+def write(path, text, age=0):
+    """Append to a log and backdate its mtime by age seconds"""
+    with open(path, 'a') as f:
+        f.write(text)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def texts(index, query):
+    matches, _ = index.search(query, context=0)
+    return [m['text'] for m in matches]
+
+
+def test_appended_lines_are_indexed(logs, tmp_path):
+    index = LogIndex(logs, tmp_path / "index.db")
+    log = logs / "task-3-20260101-120000.log"
+
+    write(log, HEADER + "OUTPUT:\nfirst line\n")
+    assert index.refresh() == 5
+    write(log, "second line\n")
+    assert index.refresh() == 1
+
+    matches, _ = index.search("line", task_type="backend")
+    assert [(m['line'], m['text']) for m in matches] == [(5, "first line"), (6, "second line")]
+    assert matches[0]['task_id'] == 3
+    assert matches[0]['session_id'] == "20260101-120000"
+
+
+def test_unfinished_last_line_waits_until_the_log_settles(logs, tmp_path):
+    index = LogIndex(logs, tmp_path / "index.db", settle_seconds=5)
+    log = logs / "task-3-20260101-120000.log"
+
+    # Still being written: held back
+    write(log, HEADER + "\n\nTIMEOUT: Task exceeded 300 seconds")
+    index.refresh()
+    assert texts(index, "TIMEOUT") == []
+
+    # Unchanged for a refresh interval: a finished log's end-of-task marker
+    write(log, "", age=10)
+    index.refresh()
+    assert texts(index, "TIMEOUT") == ["TIMEOUT: Task exceeded 300 seconds"]
+
+
+def test_indexed_partial_line_is_replaced_when_the_log_grows(logs, tmp_path):
+    index = LogIndex(logs, tmp_path / "index.db", settle_seconds=5)
+    log = logs / "task-3-20260101-120000.log"
+
+    write(log, HEADER + "progress 50%", age=10)
+    index.refresh()
+    assert texts(index, "progress") == ["progress 50%"]
+
+    write(log, " then 100%\ndone\n")
+    index.refresh()
+    assert texts(index, "progress") == ["progress 50% then 100%"]
+
+    matches, _ = index.search("done", context=1)
+    assert matches[0]['line'] == 5
+    assert matches[0]['before'] == ["progress 50% then 100%"]
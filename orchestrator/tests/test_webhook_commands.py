@@ -0,0 +1,54 @@
+"""/webhook/command and /webhook/command/result request validation"""
+
+import pytest
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def server(isolate_orchestrator, monkeypatch):
+    import webhook_server
+
+    monkeypatch.setattr(webhook_server, "orchestrator", None)
+    monkeypatch.setattr(webhook_server, "orchestrator_thread", None)
+    monkeypatch.setattr(webhook_server, "work_queue", None)
+    monkeypatch.setitem(webhook_server.config, "webhook_secret", SECRET)
+    monkeypatch.setitem(webhook_server.config, "n8n_notify_url", "")
+    webhook_server.init_command_handling()
+    return webhook_server
+
+
+@pytest.mark.parametrize('wait', ['x', [5], 'nan'])
+def test_invalid_wait_is_rejected_before_queueing(server, task_file, wait):
+    client = server.app.test_client()
+
+    response = client.post("/webhook/command", json={
+        "command": "start", "secret": SECRET, "wait": wait,
+        "params": {"task_file": str(task_file), "distributed": True}
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid wait')
+    assert server.command_queue.depth() == 0
+    assert not server.command_queue.commands
+    assert server.orchestrator is None
+
+
+def test_command_result_rejects_invalid_wait(server, task_file):
+    client = server.app.test_client()
+    response = client.post("/webhook/command", json={
+        "command": "start", "secret": SECRET, "wait": 5,
+        "params": {"task_file": str(task_file), "distributed": True}
+    })
+    command_id = response.get_json()['command_id']
+
+    response = client.post("/webhook/command/result", json={
+        "secret": SECRET, "command_id": command_id, "wait": "soon"
+    })
+    assert response.status_code == 400
+
+    response = client.post("/webhook/command/result", json={
+        "secret": SECRET, "command_id": command_id, "wait": "1"
+    })
+    assert response.status_code == 200
+    assert response.get_json()['state'] == 'done'
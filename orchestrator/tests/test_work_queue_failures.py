@@ -0,0 +1,91 @@
+"""Failure policy for tasks that workers report as failed"""
+
+import pytest
+
+from orchestrator import Orchestrator
+from work_queue import WorkQueue
+
+
+@pytest.fixture
+def session(isolate_orchestrator, tmp_path):
+    """A distributed session: task 2 depends on task 1, task 3 is independent"""
+    path = tmp_path / "chain.md"
+    path.write_text('\n---\n'.join(
+        f"""## Task {n}: Task {n}
+**Type:** {task_type}
+**Priority:** low
+**Requires Approval:** false
+{depends}**Description:** task {n}
+**Acceptance Criteria:**
+- done
+
+**Claude Instruction:**
+Do thing {n}
+""" for n, task_type, depends in (
+            (1, 'database', ''), (2, 'backend', '**Depends On:** 1\n'), (3, 'backend', '')
+        )
+    ))
+    orchestrator = Orchestrator()
+    orchestrator.load_tasks(str(path))
+    orchestrator.start_session()
+    return orchestrator
+
+
+def fail(queue, lease, result='error'):
+    assert queue.complete(lease.id, {'status': 'failed', 'result': result})
+
+
+def test_failed_task_is_retried_after_its_backoff(session):
+    session.config["failure_policy"] = {"default": {"retries": {"error": 1}, "on_failure": "continue"}}
+    queue = WorkQueue(session, auto_approve=True)
+
+    lease, task = queue.lease('worker-1')
+    assert (task['id'], task['attempts']) == (1, 0)
+    fail(queue, lease)
+
+    first = session.tasks[0]
+    assert (first.status, first.attempts) == ("pending", 1)
+    assert first.not_before is not None
+
+    # Backing off: the dependent waits, the independent task goes first
+    lease, task = queue.lease('worker-1')
+    assert task['id'] == 3
+    assert queue.get_status()['queued'] == 0
+
+    first.not_before = None
+    lease, task = queue.lease('worker-1')
+    assert (task['id'], task['attempts']) == (1, 1)
+
+
+def test_halt_stops_leasing_and_ends_the_session(session):
+    session.config["failure_policy"] = {"database": {"retries": {"error": 0}, "on_failure": "halt"}}
+    queue = WorkQueue(session, auto_approve=True)
+
+    lease, task = queue.lease('worker-1')
+    running, _ = queue.lease('worker-2')
+    fail(queue, lease)
+
+    assert queue.halted
+    assert queue.lease('worker-1') == (None, None)
+    assert not queue.is_finished()
+
+    assert queue.complete(running.id, {'status': 'completed', 'result': 'success'})
+    assert queue.is_finished()
+    assert session.status == "failed"
+    assert session.tasks[1].status == "pending"
+
+
+def test_skip_dependents(session):
+    session.config["failure_policy"] = {"default": {"retries": {"timeout": 0}, "on_failure": "skip_dependents"}}
+    queue = WorkQueue(session, auto_approve=True)
+
+    lease, _ = queue.lease('worker-1')
+    fail(queue, lease, result='timeout')
+
+    assert [t.status for t in session.tasks] == ["failed", "skipped", "pending"]
+
+
+def test_invalid_policy_is_rejected(session):
+    session.config["failure_policy"] = {"default": {"on_failure": "stop"}}
+    with pytest.raises(ValueError):
+        WorkQueue(session)
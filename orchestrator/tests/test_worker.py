@@ -0,0 +1,65 @@
+"""Workers run their tasks in their own worktree"""
+
+import subprocess
+
+import pytest
+
+import orchestrator as orchestrator_module
+from worker import Worker
+
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch, isolate_orchestrator):
+    """A committed git checkout the workers are started in"""
+    root = tmp_path / "checkout"
+    root.mkdir()
+    (root / "README.md").write_text("readme\n")
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    subprocess.run(['git', 'add', '.'], cwd=root, check=True)
+    subprocess.run(
+        ['git', '-c', 'user.name=test', '-c', 'user.email=test@localhost', 'commit', '-q', '-m', 'init'],
+        cwd=root, check=True
+    )
+    monkeypatch.setattr(orchestrator_module.Orchestrator, "get_repo_root", lambda self: root)
+    return root
+
+
+def worker(worker_id, command):
+    w = Worker("http://server", worker_id=worker_id)
+    w.orchestrator.config["claude_command"] = command
+    w.orchestrator.config["project_context"] = False
+    w.orchestrator.config["doc_retrieval"] = False
+    return w
+
+
+def run_lease(w, task_id, monkeypatch):
+    """Execute a task as if leased from the server; returns the reported result"""
+    reported = {}
+
+    def post(endpoint, payload):
+        if endpoint == 'complete':
+            reported.update(payload)
+        return 200, {}
+
+    monkeypatch.setattr(w, "post", post)
+    task = orchestrator_module.Task(task_id, f"Task {task_id}", 'testing', 'low', False, '', [], "Do it")
+    w.execute_lease("lease", task.to_dict(), 120)
+    return reported
+
+
+def test_workers_on_one_checkout_report_only_their_own_changes(checkout, monkeypatch):
+    first = worker("w1", "cat > /dev/null; echo one > one.txt; true")
+    second = worker("w2", "cat > /dev/null; echo two > two.txt; true")
+    assert first.orchestrator.worktree_pool.pool_dir != second.orchestrator.worktree_pool.pool_dir
+
+    # Left over in the checkout, e.g. by a worker without worktrees
+    (checkout / "stray.txt").write_text("stray\n")
+
+    assert run_lease(first, 1, monkeypatch)['changed_files'] == ["one.txt"]
+    result = run_lease(second, 2, monkeypatch)
+    assert result['status'] == "completed"
+    assert result['changed_files'] == ["two.txt"]
+
+    # Both results were applied to the checkout
+    assert (checkout / "one.txt").read_text() == "one\n"
+    assert (checkout / "two.txt").read_text() == "two\n"
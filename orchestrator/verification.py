@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verification - Checks a finished task's changes against its acceptance
+criteria, while the next tasks already run
+
+Each check in config["verification_checks"] is either a shell command or a
+short Claude prompt:
+
+    {"name": "lint", "command": "npx eslint {files}", "files": ["*.ts", "*.tsx"]}
+    {"name": "acceptance criteria", "claude": true, "types": ["frontend"]}
+
+    - {files} is replaced by the task's changed files that match "files"
+      (all changed files without it)
+    - a check is skipped when none of the changed files match its "files",
+      or when it uses {files} and the task changed nothing
+    - "types" limits a check to some task types
+    - a Claude check gets the task, its acceptance criteria and the diff,
+      and must end its answer with VERIFIED or FAILED: <reason>
+
+Checks don't run in the main checkout, which the next tasks already edit.
+When a task finishes, the main working tree is snapshotted (see
+WorktreePool.snapshot_main) and its checks run in a pooled worktree checked
+out at that snapshot, with node_modules and the like shared in as for task
+worktrees. A task only counts as completed once every check passed; a failed
+check fails the task itself (result "verification_failed"), which then goes
+through its failure policy like any other failure.
+"""
+
+import fnmatch
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+
+from worktree_pool import WorktreePool
+
+# Output kept per check (the end, where the errors usually are)
+OUTPUT_CHARS = 2000
+
+# Diff sent to a Claude check
+MAX_DIFF_CHARS = 20000
+
+CLAUDE_PROMPT = """Check whether the changes made for this task meet its acceptance criteria.
+Read the changed files as needed. Do not modify anything.
+
+# Task {id}: {title}
+
+{description}
+
+## Acceptance Criteria
+
+{criteria}
+
+## Changed Files
+
+{files}
+
+## Diff
+
+{diff}
+
+End your answer with a line that is exactly VERIFIED if every criterion is
+met, or FAILED: <the criteria that are not met> otherwise.
+"""
+
+
+class Verifier:
+    """Runs the configured checks for finished tasks"""
+
+    def __init__(self, repo_root, checks, claude_command, timeout=600,
+                 pool_dir=None, size=1, shared_dirs=None):
+        """
+        Args:
+            pool_dir: Where the verification worktrees live
+            size: Verification worktrees (one per concurrent verification)
+            shared_dirs: Dependency dirs copied into them (see WorktreePool)
+        """
+        self.repo_root = repo_root
+        self.checks = checks
+        self.claude_command = claude_command
+        self.timeout = timeout
+        self.pool = WorktreePool(repo_root, pool_dir, size, shared_dirs=shared_dirs)
+
+        # Check processes running right now, so stop() can kill them
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.stopped = threading.Event()
+
+    def checks_for(self, task):
+        """Checks that apply to a task's type"""
+        task_type = (task.type or '').lower()
+        return [
+            check for check in self.checks
+            if not check.get("types") or task_type in [t.lower() for t in check["types"]]
+        ]
+
+    def snapshot(self):
+        """Snapshot commit of the main working tree as it is now, to verify against later"""
+        return self.pool.snapshot_main()
+
+    def verify(self, task, files, base):
+        """
+        Run every check for a task
+
+        Args:
+            task: The finished task
+            files: Repo paths the task changed
+            base: snapshot() taken when the task finished
+
+        Returns:
+            dict with "status" ("passed" or "failed"), the "checks" results,
+            the "files" and the total "seconds"
+        """
+        started = time.monotonic()
+        worktree = self.pool.acquire(base)
+        try:
+            results = [self.run_check(check, task, files, worktree.path) for check in self.checks_for(task)]
+        finally:
+            self.pool.release(worktree)
+        return {
+            "status": "failed" if any(r["status"] == "failed" for r in results) else "passed",
+            "checks": results,
+            "files": files,
+            "seconds": round(time.monotonic() - started, 2)
+        }
+
+    def run_check(self, check, task, files, cwd):
+        """
+        Run one check in a checkout of the task's result
+
+        Returns:
+            dict with "name", "status" (passed, failed or skipped), "seconds"
+            and the end of its "output"
+        """
+        name = check.get("name") or check.get("command") or "claude"
+        patterns = check.get("files")
+        matching = [f for f in files if not patterns or any(fnmatch.fnmatch(f, p) for p in patterns)]
+
+        uses_files = check.get("claude") or "{files}" in check.get("command", "")
+        if (patterns or uses_files) and not matching:
+            return {"name": name, "status": "skipped", "seconds": 0, "output": "no matching changed files"}
+
+        started = time.monotonic()
+        if check.get("claude"):
+            command = f'{self.claude_command} "Verify this task against its acceptance criteria"'
+            returncode, output = self._run(command, cwd, self.claude_prompt(task, matching, cwd))
+            verdict = next((line.strip() for line in reversed(output.splitlines()) if line.strip()), "")
+            passed = returncode == 0 and verdict == "VERIFIED"
+        else:
+            command = check["command"].replace("{files}", ' '.join(shlex.quote(f) for f in matching))
+            returncode, output = self._run(command, cwd)
+            passed = returncode == 0
+
+        return {
+            "name": name,
+            "status": "passed" if passed else "failed",
+            "seconds": round(time.monotonic() - started, 2),
+            "output": output[-OUTPUT_CHARS:]
+        }
+
+    def claude_prompt(self, task, files, cwd):
+        # The snapshot's parent is the main checkout's HEAD
+        diff = subprocess.run(
+            ['git', 'diff', 'HEAD^', 'HEAD', '--', *files], cwd=cwd, capture_output=True, text=True
+        ).stdout
+        if len(diff) > MAX_DIFF_CHARS:
+            diff = diff[:MAX_DIFF_CHARS] + "\n[... diff truncated ...]"
+
+        return CLAUDE_PROMPT.format(
+            id=task.id,
+            title=task.title,
+            description=task.description,
+            criteria='\n'.join(f"- {c}" for c in task.acceptance_criteria) or "(none given)",
+            files='\n'.join(f"- {f}" for f in files),
+            diff=diff or "(no diff)"
+        )
+
+    def _run(self, command, cwd, stdin=None):
+        """
+        Run a check command in a checkout (stdout and stderr combined)
+
+        Returns:
+            (exit code, output); a timed-out command's process group is killed
+            and counts as failed
+        """
+        if self.stopped.is_set():
+            return -1, "STOPPED: verification was interrupted"
+
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            cwd=cwd,
+            start_new_session=True
+        )
+        with self.lock:
+            self.processes.add(process)
+        try:
+            output, _ = process.communicate(stdin, timeout=self.timeout)
+            return process.returncode, output
+        except subprocess.TimeoutExpired:
+            self._kill(process)
+            output, _ = process.communicate()
+            return -1, f"{output}\nTIMEOUT: check exceeded {self.timeout} seconds"
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+
+    def _kill(self, process):
+        # start_new_session made the check its own process group
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def stop(self):
+        """Kill the running checks and fail the rest (the run was interrupted)"""
+        self.stopped.set()
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            self._kill(process)
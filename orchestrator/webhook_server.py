@@ -9,6 +9,10 @@ remotely (from n8n, Telegram, etc.)
 
 import os
 import sys
+import argparse
+import json
+import math
+import sqlite3
 import threading
 import time
 from pathlib import Path
@@ -20,17 +24,93 @@ import yaml
 
 # Import orchestrator
 from orchestrator import Orchestrator
+from work_queue import WorkQueue
+from command_queue import CommandQueue, IdempotencyCache, QueueFull, RateLimiter
+from log_index import LogIndex
 
 # Load environment variables
 load_dotenv()
 
+
+class MeasuredLock:
+    """
+    threading.Lock that keeps contention statistics
+
+    The counters are only updated while the lock is held, so they need no
+    lock of their own.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.acquired_at = None
+        self.reset()
+
+    def reset(self):
+        """Zero the statistics (call while holding the lock)"""
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.held_seconds = 0.0
+        self.max_held_seconds = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        waited = 0.0
+        if not self.lock.acquire(blocking=False):
+            if not blocking:
+                return False
+            started = time.perf_counter()
+            if not self.lock.acquire(timeout=timeout):
+                return False
+            waited = time.perf_counter() - started
+            self.contended += 1
+
+        self.acquisitions += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.acquired_at = time.perf_counter()
+        return True
+
+    def release(self):
+        held = time.perf_counter() - self.acquired_at
+        self.held_seconds += held
+        self.max_held_seconds = max(self.max_held_seconds, held)
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self):
+        """Contention statistics since the last reset"""
+        acquisitions = self.acquisitions or 1
+        return {
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'contention_rate': round(self.contended / acquisitions, 4),
+            'avg_wait_ms': round(self.wait_seconds / acquisitions * 1000, 3),
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+            'avg_held_ms': round(self.held_seconds / acquisitions * 1000, 3),
+            'max_held_ms': round(self.max_held_seconds * 1000, 3)
+        }
+
+
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
 
 # Global orchestrator instance
 orchestrator = None
 orchestrator_thread = None
-orchestrator_lock = threading.Lock()
+orchestrator_lock = MeasuredLock()
+
+# Work queue for distributed sessions (remote workers lease tasks)
+work_queue = None
+
+# Notified whenever the orchestrator's state version changes (long-polling)
+status_changed = threading.Condition()
 
 # Configuration
 config = {
@@ -38,7 +118,21 @@ config = {
     'n8n_notify_url': os.getenv('N8N_NOTIFY_URL', ''),
     'host': os.getenv('HOST', '0.0.0.0'),
     'port': int(os.getenv('PORT', 5000)),
-    'debug': os.getenv('DEBUG', 'false').lower() == 'true'
+    'debug': os.getenv('DEBUG', 'false').lower() == 'true',
+    'lease_seconds': int(os.getenv('LEASE_SECONDS', 120)),
+    # Seconds between checks for expired worker leases
+    'lease_expiry_check_seconds': 5,
+    'command_queue_size': int(os.getenv('COMMAND_QUEUE_SIZE', 100)),
+    'command_wait_max': 30,
+    'rate_limit_per_second': float(os.getenv('RATE_LIMIT_PER_SECOND', 5)),
+    'rate_limit_burst': int(os.getenv('RATE_LIMIT_BURST', 20)),
+    'idempotency_cache_size': int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 1000)),
+    'idempotency_ttl_seconds': int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 3600)),
+    'status_wait_max': 60,
+    # Seconds between background refreshes of the log search index
+    'log_index_refresh_seconds': 5,
+    # Seconds a control command waits for the run loop to apply it (else 202)
+    'control_wait': 10
 }
 
 
@@ -54,6 +148,22 @@ def load_config():
                 config.update(yaml_config.get('webhooks', {}))
 
 
+def parse_wait(request_data, limit):
+    """
+    Seconds from a request's optional "wait", capped at limit
+
+    Returns:
+        The seconds, or None if "wait" isn't a number
+    """
+    try:
+        wait = float(request_data.get('wait', 0) or 0)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(wait):
+        return None
+    return max(0, min(wait, limit))
+
+
 def verify_secret(request_data):
     """Verify webhook secret"""
     secret = request_data.get('secret', '')
@@ -79,6 +189,35 @@ def notify_n8n(message, message_type='info'):
         print(f"Failed to notify n8n: {e}")
 
 
+def on_orchestrator_change(source):
+    """Wake long-polling status requests"""
+    with status_changed:
+        status_changed.notify_all()
+
+
+def create_orchestrator():
+    """Create a new session's orchestrator, wired up for change notifications"""
+    instance = Orchestrator()
+    instance.change_listeners.append(on_orchestrator_change)
+    on_orchestrator_change(instance)
+    return instance
+
+
+def current_version():
+    """State version of the current session (0 when idle)"""
+    return orchestrator.state_version if orchestrator else 0
+
+
+def is_running():
+    """
+    Whether a session is active - including a run thread that is still
+    starting up and hasn't created its orchestrator yet
+    """
+    if orchestrator_thread and orchestrator_thread.is_alive():
+        return True
+    return orchestrator is not None and orchestrator.status == 'running'
+
+
 def run_orchestrator_async(task_file, auto_approve=False):
     """Run orchestrator in background thread"""
     global orchestrator
@@ -89,13 +228,13 @@ def run_orchestrator_async(task_file, auto_approve=False):
                 notify_n8n("Orchestrator is already running", "warning")
                 return
 
-            orchestrator = Orchestrator()
+            orchestrator = create_orchestrator()
             orchestrator.load_tasks(task_file)
 
         notify_n8n(f"Starting orchestrator with {len(orchestrator.tasks)} tasks", "info")
 
         # Run orchestrator
-        orchestrator.run(auto_approve=auto_approve)
+        orchestrator.run(auto_approve=auto_approve, interactive=False)
 
         notify_n8n(f"Orchestrator completed all tasks", "success")
 
@@ -113,12 +252,19 @@ def index():
         'status': 'running',
         'endpoints': [
             'POST /webhook/command',
+            'POST /webhook/command/result',
             'POST /webhook/status',
             'POST /webhook/approve',
             'POST /webhook/pause',
             'POST /webhook/resume',
             'POST /webhook/skip',
             'POST /webhook/logs',
+            'POST /webhook/logs/search',
+            'POST /webhook/metrics',
+            'POST /webhook/work/lease',
+            'POST /webhook/work/heartbeat',
+            'POST /webhook/work/log',
+            'POST /webhook/work/complete',
             'GET /health'
         ]
     })
@@ -133,19 +279,38 @@ def health():
     })
 
 
+COMMANDS = ('start', 'status', 'approve', 'reject', 'pause', 'resume', 'skip', 'cancel', 'prioritize', 'answer')
+
+
 @app.route('/webhook/command', methods=['POST'])
 def handle_command():
     """
     Handle commands from Telegram/n8n
 
+    Commands other than status are queued and run one at a time by the command
+    loop. The response is 202 with a command_id (poll /webhook/command/result),
+    or the command's own result if it finishes within the optional "wait"
+    seconds. A full queue or an exhausted rate limit gives 429 + Retry-After.
+
+    Deliveries carrying an idempotency_key (field or Idempotency-Key header)
+    already seen recently are not run again: they get the original command's
+    id, or its result once finished.
+
     Expected payload:
     {
-        "command": "start" | "status" | "approve" | "pause" | "resume" | "skip" | "answer",
+        "command": "start" | "status" | "approve" | "reject" | "pause" | "resume" | "skip" | "cancel" | "prioritize" | "answer",
         "secret": "webhook_secret",
+        "wait": 5,                             # optional, seconds to wait for the result
+        "idempotency_key": "n8n-execution-id", # optional, dedupes retried deliveries
         "params": {
             "task_file": "path/to/tasks.md",  # for start command
             "auto_approve": true/false,        # for start command
-            "response": "user's answer"        # for answer command
+            "distributed": true/false,         # for start command (remote workers)
+            "response": "user's answer",       # for answer command
+            "task_id": 3,                      # for approve/reject (default: next awaiting),
+                                               # skip (default: next pending), cancel (default:
+                                               # all running) and prioritize
+            "cancel": true/false               # for pause: also stop running tasks (requeued)
         }
     }
     """
@@ -158,25 +323,164 @@ def handle_command():
 
         command = data.get('command', '').lower()
         params = data.get('params', {})
+        idempotency_key = data.get('idempotency_key') or request.headers.get('Idempotency-Key')
 
-        # Route to appropriate handler
-        if command == 'start':
-            return handle_start(params)
-        elif command == 'status':
-            return handle_status()
-        elif command == 'approve':
-            return handle_approve()
-        elif command == 'pause':
-            return handle_pause()
-        elif command == 'resume':
-            return handle_resume(params)
-        elif command == 'skip':
-            return handle_skip()
-        elif command == 'answer':
-            return handle_answer(params)
-        else:
+        if command not in COMMANDS:
             return jsonify({'error': f'Unknown command: {command}'}), 400
 
+        # Checked before anything is queued, so a bad value can't fail a command that runs anyway
+        wait = parse_wait(data, config['command_wait_max'])
+        if wait is None:
+            return jsonify({'error': f"Invalid wait: {data.get('wait')}"}), 400
+
+        # Reads don't change anything, so they skip the queue
+        if command == 'status':
+            return handle_status()
+
+        def submit():
+            retry_after = rate_limiter.allow(data.get('secret', ''))
+            if retry_after:
+                raise RateLimited(retry_after)
+            return command_queue.submit(command, params)
+
+        try:
+            if idempotency_key:
+                queued, created = idempotency_cache.get_or_create(idempotency_key, submit)
+            else:
+                queued, created = submit(), True
+        except RateLimited as e:
+            return too_many_requests('Rate limit exceeded', e.retry_after)
+        except QueueFull:
+            return too_many_requests('Command queue is full', command_queue.retry_after())
+
+        if queued.name != command:
+            return jsonify({
+                'error': f"idempotency_key already used for '{queued.name}'",
+                'command_id': queued.id
+            }), 422
+
+        if queued.done.is_set() or (wait and queued.done.wait(wait)):
+            response = jsonify(dict(queued.result, command_id=queued.id))
+            response.headers['Idempotent-Replay'] = str(not created).lower()
+            return response, queued.status_code
+
+        response = jsonify({
+            'status': 'accepted',
+            'command_id': queued.id,
+            'duplicate': not created,
+            'queue_depth': command_queue.depth()
+        })
+        response.headers['Idempotent-Replay'] = str(not created).lower()
+        return response, 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+class RateLimited(Exception):
+    """A secret has used up its rate limit"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def too_many_requests(message, retry_after):
+    """429 response with a Retry-After header (whole seconds)"""
+    seconds = max(1, int(retry_after + 0.999))
+    response = jsonify({'error': message, 'retry_after': seconds})
+    response.headers['Retry-After'] = str(seconds)
+    return response, 429
+
+
+def dispatch_command(command, params):
+    """Route a command to its handler (runs on the command loop thread)"""
+    if command == 'start':
+        return handle_start(params)
+    elif command == 'status':
+        return handle_status()
+    elif command == 'approve':
+        return handle_approve(params)
+    elif command == 'reject':
+        return handle_approve(params, approve=False)
+    elif command == 'pause':
+        return handle_pause(params)
+    elif command == 'resume':
+        return handle_resume(params)
+    elif command == 'skip':
+        return handle_skip(params)
+    elif command == 'cancel':
+        return handle_cancel(params)
+    elif command == 'prioritize':
+        return handle_prioritize(params)
+    elif command == 'answer':
+        return handle_answer(params)
+    else:
+        return jsonify({'error': f'Unknown command: {command}'}), 400
+
+
+def execute_queued_command(command, params):
+    """
+    Run a queued command outside of any request
+
+    Returns:
+        (result dict, status code)
+    """
+    with app.app_context():
+        response = dispatch_command(command, params)
+
+    status_code = None
+    if isinstance(response, tuple):
+        response, status_code = response
+    return response.get_json(), status_code or response.status_code
+
+
+# Built by init_command_handling() once config.yaml is loaded
+command_queue = None
+rate_limiter = None
+idempotency_cache = None
+
+
+def init_command_handling():
+    """Create the command queue, rate limiter and idempotency cache from the loaded config"""
+    global command_queue, rate_limiter, idempotency_cache
+
+    command_queue = CommandQueue(execute_queued_command, maxsize=config['command_queue_size'])
+    rate_limiter = RateLimiter(config['rate_limit_per_second'], config['rate_limit_burst'])
+    idempotency_cache = IdempotencyCache(config['idempotency_cache_size'], config['idempotency_ttl_seconds'])
+
+
+@app.route('/webhook/command/result', methods=['POST'])
+def command_result():
+    """
+    Get the state and result of a queued command
+
+    Expected payload:
+    {
+        "secret": "webhook_secret",
+        "command_id": "...",
+        "wait": 5                # optional, seconds to wait for it to finish
+    }
+    """
+    try:
+        data = request.get_json()
+
+        # Verify secret
+        if not verify_secret(data):
+            return jsonify({'error': 'Invalid secret'}), 401
+
+        queued = command_queue.get(data.get('command_id'))
+        if not queued:
+            return jsonify({'error': 'Unknown command_id'}), 404
+
+        wait = parse_wait(data, config['command_wait_max'])
+        if wait is None:
+            return jsonify({'error': f"Invalid wait: {data.get('wait')}"}), 400
+        if wait:
+            queued.done.wait(wait)
+
+        return jsonify(queued.to_dict())
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -193,12 +497,15 @@ def handle_start(params):
 
     # Check if already running
     with orchestrator_lock:
-        if orchestrator and orchestrator.status == 'running':
+        if is_running():
             return jsonify({
                 'status': 'error',
                 'message': 'Orchestrator is already running'
             }), 400
 
+    if params.get('distributed'):
+        return start_distributed(task_file, auto_approve)
+
     # Start in background thread
     orchestrator_thread = threading.Thread(
         target=run_orchestrator_async,
@@ -215,69 +522,203 @@ def handle_start(params):
     })
 
 
-def handle_status():
-    """Get orchestrator status"""
-    with orchestrator_lock:
-        if not orchestrator:
-            return jsonify({
-                'status': 'idle',
-                'message': 'No active session'
-            })
-
-        status = orchestrator.get_status()
-        return jsonify(status)
+def start_distributed(task_file, auto_approve):
+    """Load tasks into the work queue for remote workers instead of running them here"""
+    global orchestrator, work_queue
 
+    with orchestrator_lock:
+        session = create_orchestrator()
+        session.load_tasks(task_file)
+        try:
+            queue = WorkQueue(session, auto_approve=auto_approve, lease_seconds=config['lease_seconds'])
+        except ValueError as e:
+            return jsonify({'error': f'Invalid failure policy: {e}'}), 400
+        session.start_session()
+        session.save_state()
+        if work_queue:
+            work_queue.stop()
+        queue.start(config['lease_expiry_check_seconds'])
+        orchestrator, work_queue = session, queue
+
+    notify_n8n(f"Distributed session queued {len(orchestrator.tasks)} tasks for workers", "info")
 
-def handle_approve():
-    """Approve current task and continue"""
-    # Note: This is simplified for auto-approve mode
-    # In manual mode, would need more sophisticated inter-thread communication
     return jsonify({
         'status': 'ok',
-        'message': 'Task approved (auto-approve mode)'
+        'message': 'Tasks queued for workers',
+        'task_file': task_file,
+        'auto_approve': auto_approve,
+        'session_id': orchestrator.session_id
     })
 
 
-def handle_pause():
-    """Pause orchestrator"""
+def handle_status(since_version=None, wait=0, if_none_match=None):
+    """
+    Get orchestrator status
+
+    Served from the orchestrator's latest status snapshot without taking
+    orchestrator_lock, so status reads never wait on (or hold up) a run.
+
+    Args:
+        since_version: Long-poll - hold the request until the state version is
+            greater than this (or wait seconds pass)
+        wait: Maximum seconds to hold a long-poll request
+        if_none_match: ETag from a previous response; 304 if nothing changed
+    """
+    if since_version is not None and wait > 0:
+        with status_changed:
+            status_changed.wait_for(lambda: current_version() > since_version, timeout=wait)
+
+    current = orchestrator
+    if not current:
+        response = jsonify({
+            'status': 'idle',
+            'version': 0,
+            'message': 'No active session'
+        })
+        response.headers['ETag'] = '"0"'
+        return response
+
+    snapshot = current.status_snapshot
+    etag = f'"{snapshot.version}"'
+
+    if if_none_match == etag:
+        response = app.response_class(status=304)
+        response.headers['ETag'] = etag
+        return response
+
+    # A distributed session's work queue is part of the snapshot
+    response = app.response_class(snapshot.body, mimetype='application/json')
+    response.headers['ETag'] = etag
+    return response
+
+
+def send_control(command, params=None):
+    """
+    Hand a control command to the orchestrator's run loop and wait (up to
+    control_wait seconds) for it to be applied
+
+    Returns:
+        Flask response: the result, 202 if the run loop hasn't applied it
+        yet, 404 for a task_id that doesn't fit the command
+    """
+    params = params or {}
+
     with orchestrator_lock:
         if not orchestrator:
             return jsonify({'error': 'No active session'}), 400
+        current = orchestrator
+        control = current.send_control(command, params)
 
-        orchestrator.status = 'paused'
-        orchestrator.save_state()
+    result = control.wait(config['control_wait'])
+    if result is None:
+        return jsonify({
+            'status': 'accepted',
+            'message': f"'{command}' is applied at the run loop's next step"
+        }), 202
+
+    if result.get('error'):
+        return jsonify(result), 404 if params.get('task_id') is not None else 400
+
+    return jsonify(dict(
+        result,
+        status='ok',
+        awaiting_approval=current.status_snapshot.status['awaiting_approval']
+    ))
+
+
+def get_task_id(params, required=False):
+    """
+    task_id from command params as an int (None when optional and missing)
+
+    Raises:
+        ValueError: for a missing required or non-integer task_id
+    """
+    task_id = params.get('task_id')
+    if task_id is None and not required:
+        return None
+    try:
+        return int(task_id)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid task_id: {task_id}')
+
+
+def handle_approve(params, approve=True):
+    """
+    Approve or reject a task that requires approval
+
+    Decisions can arrive at any time - the orchestrator requests approvals
+    ahead of reaching the tasks and keeps running other work meanwhile.
+    Without a task_id the first task awaiting a decision is used.
+    """
+    try:
+        task_id = get_task_id(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return send_control('approve' if approve else 'reject', {'task_id': task_id})
 
-    return jsonify({
-        'status': 'ok',
-        'message': 'Orchestrator paused'
-    })
+
+def handle_pause(params):
+    """
+    Pause orchestrator: no new tasks start. Running tasks finish, or with
+    "cancel" are stopped and go back to the queue for resume
+    """
+    return send_control('pause', {'cancel': bool(params.get('cancel'))})
+
+
+def handle_cancel(params):
+    """Stop a running task (default: all of them); stopped tasks are skipped"""
+    try:
+        task_id = get_task_id(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return send_control('cancel', {'task_id': task_id})
 
 
 def handle_resume(params):
-    """Resume orchestrator from saved state"""
+    """
+    Resume orchestrator
+
+    A session paused in this server continues from memory (caches, worktrees
+    and queue order intact); a paused distributed session lets its workers
+    lease again; otherwise the saved state is loaded.
+    """
     global orchestrator_thread
 
     auto_approve = params.get('auto_approve', True)
 
     # Check if already running
     with orchestrator_lock:
-        if orchestrator and orchestrator.status == 'running':
+        if is_running():
             return jsonify({
                 'status': 'error',
                 'message': 'Orchestrator is already running'
             }), 400
 
+        paused = orchestrator is not None and orchestrator.status == 'paused'
+
+        # Its tasks stay in the work queue (and on the workers holding leases)
+        if paused and work_queue and work_queue.orchestrator is orchestrator:
+            work_queue.resume()
+            notify_n8n("Resuming distributed session", "info")
+            return jsonify({
+                'status': 'ok',
+                'message': 'Distributed session resumed'
+            })
+
     def resume_async():
         global orchestrator
         try:
-            with orchestrator_lock:
-                orchestrator = Orchestrator()
-                if not orchestrator.load_state():
-                    notify_n8n("No state to resume from", "error")
-                    return
+            if not paused:
+                with orchestrator_lock:
+                    orchestrator = create_orchestrator()
+                    if not orchestrator.load_state():
+                        notify_n8n("No state to resume from", "error")
+                        return
 
             notify_n8n("Resuming orchestrator", "info")
-            orchestrator.run(auto_approve=auto_approve)
+            orchestrator.run(auto_approve=auto_approve, interactive=False, resume=True)
             notify_n8n("Orchestrator completed", "success")
 
         except Exception as e:
@@ -289,26 +730,28 @@ def handle_resume(params):
 
     return jsonify({
         'status': 'ok',
-        'message': 'Orchestrator resumed'
+        'message': 'Orchestrator resumed' + (' from memory' if paused else '')
     })
 
 
-def handle_skip():
-    """Skip current task"""
-    with orchestrator_lock:
-        if not orchestrator:
-            return jsonify({'error': 'No active session'}), 400
+def handle_skip(params):
+    """Skip a pending task (default: the next one) and the tasks depending on it"""
+    try:
+        task_id = get_task_id(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        current_task = orchestrator.get_current_task()
-        if current_task:
-            current_task.status = 'skipped'
-            orchestrator.next_task()
-            orchestrator.save_state()
+    return send_control('skip', {'task_id': task_id})
 
-    return jsonify({
-        'status': 'ok',
-        'message': 'Task skipped'
-    })
+
+def handle_prioritize(params):
+    """Move a pending task to the front of the queue"""
+    try:
+        task_id = get_task_id(params, required=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return send_control('prioritize', {'task_id': task_id})
 
 
 def handle_answer(params):
@@ -334,7 +777,19 @@ def handle_answer(params):
 
 @app.route('/webhook/status', methods=['POST'])
 def webhook_status():
-    """Dedicated status endpoint"""
+    """
+    Dedicated status endpoint
+
+    Expected payload:
+    {
+        "secret": "webhook_secret",
+        "since_version": 42,   # optional, long-poll until the version is newer
+        "wait": 30             # optional, max seconds to hold the long-poll
+    }
+
+    Responses carry an ETag; sending it back in If-None-Match gives an empty
+    304 when nothing has changed (also after a long-poll that timed out).
+    """
     try:
         data = request.get_json()
 
@@ -342,7 +797,49 @@ def webhook_status():
         if not verify_secret(data):
             return jsonify({'error': 'Invalid secret'}), 401
 
-        return handle_status()
+        since_version = data.get('since_version')
+        try:
+            since_version = int(since_version) if since_version is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Invalid since_version: {since_version}'}), 400
+        wait = parse_wait(data, config['status_wait_max'])
+        if wait is None:
+            return jsonify({'error': f"Invalid wait: {data.get('wait')}"}), 400
+
+        return handle_status(
+            since_version=since_version,
+            wait=wait,
+            if_none_match=request.headers.get('If-None-Match')
+        )
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/webhook/approve', methods=['POST'])
+def webhook_approve():
+    """
+    Dedicated approval endpoint
+
+    Expected payload:
+    {
+        "secret": "webhook_secret",
+        "task_id": 3,                      # optional, default: next awaiting
+        "decision": "approve" | "reject"   # optional, default: approve
+    }
+    """
+    try:
+        data = request.get_json()
+
+        # Verify secret
+        if not verify_secret(data):
+            return jsonify({'error': 'Invalid secret'}), 401
+
+        decision = data.get('decision', 'approve').lower()
+        if decision not in ('approve', 'reject'):
+            return jsonify({'error': f'Unknown decision: {decision}'}), 400
+
+        return handle_approve(data, approve=decision == 'approve')
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -386,6 +883,228 @@ def webhook_logs():
         return jsonify({'error': str(e)}), 500
 
 
+log_index = None
+log_index_lock = threading.Lock()
+
+
+def get_log_index():
+    """The task log search index, created (and its background refresh started) on first use"""
+    global log_index
+    with log_index_lock:
+        if log_index is None:
+            base_dir = Path(__file__).parent
+            log_index = LogIndex(base_dir / 'orchestrator_logs', base_dir / 'orchestrator_context' / 'log_index.db')
+            log_index.start(config['log_index_refresh_seconds'])
+        return log_index
+
+
+@app.route('/webhook/logs/search', methods=['POST'])
+def webhook_logs_search():
+    """
+    Full-text search over all task logs
+
+    Expected payload:
+    {
+        "secret": "webhook_secret",
+        "query": "\"permission denied\" OR EACCES",  # FTS5 syntax
+        "session_id": "20250101-120000",  # optional filters
+        "task_id": 3,
+        "type": "database",
+        "since": "2025-01-01T00:00:00",    # log start time, ISO
+        "until": "2025-02-01T00:00:00",
+        "context": 2,                      # lines before/after each match
+        "limit": 20,
+        "offset": 0
+    }
+    """
+    try:
+        data = request.get_json()
+
+        # Verify secret
+        if not verify_secret(data):
+            return jsonify({'error': 'Invalid secret'}), 401
+
+        query = (data.get('query') or '').strip()
+        if not query:
+            return jsonify({'error': 'query is required'}), 400
+
+        numbers = {}
+        for name, default in (('limit', 20), ('offset', 0), ('context', 2), ('task_id', None)):
+            value = data.get(name, default)
+            try:
+                numbers[name] = int(value) if value is not None else None
+            except (TypeError, ValueError):
+                return jsonify({'error': f'Invalid {name}: {value}'}), 400
+
+        limit = max(1, min(numbers['limit'], 200))
+        offset = max(0, numbers['offset'])
+
+        started = time.monotonic()
+        index = get_log_index()
+        # Searches what is indexed so far; lines written since show up shortly
+        index.refresh_soon()
+
+        try:
+            matches, has_more = index.search(
+                query,
+                session_id=data.get('session_id'),
+                task_id=numbers['task_id'],
+                task_type=data.get('type'),
+                since=data.get('since'),
+                until=data.get('until'),
+                context=max(0, min(numbers['context'], 20)),
+                limit=limit,
+                offset=offset
+            )
+        except sqlite3.OperationalError as e:
+            return jsonify({'error': f'Invalid query: {e}'}), 400
+
+        return jsonify({
+            'query': query,
+            'results': matches,
+            'offset': offset,
+            'limit': limit,
+            'has_more': has_more,
+            'next_offset': offset + limit if has_more else None,
+            'indexed_at': index.refreshed_at,
+            'took_ms': round((time.monotonic() - started) * 1000, 1)
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/webhook/metrics', methods=['POST'])
+def webhook_metrics():
+    """
+    Server internals for load testing: orchestrator_lock contention and
+    command queue depth
+
+    Expected payload:
+    {
+        "secret": "webhook_secret",
+        "reset": false   # optional, zero the lock statistics after reading
+    }
+    """
+    try:
+        data = request.get_json()
+
+        # Verify secret
+        if not verify_secret(data):
+            return jsonify({'error': 'Invalid secret'}), 401
+
+        with orchestrator_lock:
+            lock_stats = orchestrator_lock.stats()
+            if data.get('reset'):
+                orchestrator_lock.reset()
+
+        return jsonify({
+            'orchestrator_lock': lock_stats,
+            'command_queue': {
+                'depth': command_queue.depth(),
+                'average_seconds': round(command_queue.average_seconds, 4)
+            },
+            'idempotency_keys': len(idempotency_cache.entries),
+            'running': is_running()
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def get_work_request():
+    """
+    Parse and authenticate a work queue request
+
+    Returns:
+        (data, None) on success or (None, error response) on failure
+    """
+    data = request.get_json() or {}
+
+    if not verify_secret(data):
+        return None, (jsonify({'error': 'Invalid secret'}), 401)
+
+    if not work_queue:
+        return None, (jsonify({'error': 'No distributed session'}), 404)
+
+    return data, None
+
+
+@app.route('/webhook/work/lease', methods=['POST'])
+def work_lease():
+    """Lease the next ready task to a worker"""
+    try:
+        data, error = get_work_request()
+        if error:
+            return error
+
+        worker_id = data.get('worker_id') or request.remote_addr
+        lease, task = work_queue.lease(worker_id)
+
+        if not lease:
+            return jsonify({'task': None, 'finished': work_queue.is_finished(), 'paused': work_queue.is_paused()})
+
+        return jsonify({
+            'lease_id': lease.id,
+            'lease_seconds': work_queue.lease_seconds,
+            'task': task
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/webhook/work/heartbeat', methods=['POST'])
+def work_heartbeat():
+    """Extend a worker's lease"""
+    try:
+        data, error = get_work_request()
+        if error:
+            return error
+
+        if not work_queue.heartbeat(data.get('lease_id')):
+            return jsonify({'error': 'Lease expired or unknown'}), 409
+
+        return jsonify({'status': 'ok'})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/webhook/work/log', methods=['POST'])
+def work_log():
+    """Append a chunk of worker output to the task log"""
+    try:
+        data, error = get_work_request()
+        if error:
+            return error
+
+        if not work_queue.append_log(data.get('lease_id'), data.get('log', '')):
+            return jsonify({'error': 'Lease expired or unknown'}), 409
+
+        return jsonify({'status': 'ok'})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/webhook/work/complete', methods=['POST'])
+def work_complete():
+    """Record a worker's task result"""
+    try:
+        data, error = get_work_request()
+        if error:
+            return error
+
+        if not work_queue.complete(data.get('lease_id'), data):
+            return jsonify({'error': 'Lease expired or unknown'}), 409
+
+        return jsonify({'status': 'ok', 'finished': work_queue.is_finished()})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.errorhandler(404)
 def not_found(error):
     """404 handler"""
@@ -404,8 +1123,17 @@ def main():
     print("🌐 Orchestrator Webhook Server")
     print("=" * 60)
 
+    parser = argparse.ArgumentParser(description="Orchestrator webhook server")
+    parser.add_argument('--port', type=int, help='Port to listen on (overrides config.yaml)')
+    args = parser.parse_args()
+
     # Load config
     load_config()
+    if args.port:
+        config['port'] = args.port
+    init_command_handling()
+    # Index the logs now, so the first search doesn't find an empty index
+    get_log_index()
 
     print(f"\nServer configuration:")
     print(f"  Host: {config['host']}")
@@ -422,9 +1150,14 @@ def main():
     print("\nEndpoints:")
     print("  GET  /              - Server info")
     print("  GET  /health        - Health check")
-    print("  POST /webhook/command - Execute commands")
+    print("  POST /webhook/command - Queue commands (202 + command_id)")
+    print("  POST /webhook/command/result - Result of a queued command")
     print("  POST /webhook/status  - Get status")
+    print("  POST /webhook/approve - Approve/reject a task by id")
     print("  POST /webhook/logs    - Get logs")
+    print("  POST /webhook/logs/search - Search all task logs")
+    print("  POST /webhook/metrics - Lock contention and queue depth")
+    print("  POST /webhook/work/*  - Work queue for --worker processes")
     print("\nPress Ctrl+C to stop")
     print("=" * 60)
 
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Work Queue - Leases orchestrator tasks to remote workers
+
+The webhook server holds one WorkQueue per distributed session. Workers lease
+ready tasks, heartbeat while they run, stream log chunks back and report the
+result. Leases that stop heartbeating expire and their task is re-queued (checked
+on every lease request and by a timer, see start()).
+
+The queue's view (leases, workers) is part of the orchestrator's status
+snapshot and is published whenever a lease changes, so status reads never
+take the queue lock.
+
+Failed results go through the session's failure policy, as in a local run:
+retries wait out their backoff before they can be leased again, and after a
+'halt' no new task is leased and the session ends once the running ones report.
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from failure_policy import FailurePolicy
+
+
+class Lease:
+    """A task handed out to a worker"""
+
+    def __init__(self, task, worker_id, lease_seconds):
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.worker_id = worker_id
+        self.leased_at = datetime.now().isoformat()
+        self.expires_at = time.time() + lease_seconds
+
+    def to_dict(self):
+        """Convert lease to dictionary for JSON serialization"""
+        return {
+            "lease_id": self.id,
+            "task_id": self.task.id,
+            "task_title": self.task.title,
+            "worker_id": self.worker_id,
+            "leased_at": self.leased_at,
+            "expires_at": datetime.fromtimestamp(self.expires_at).isoformat(timespec='seconds')
+        }
+
+
+class WorkQueue:
+    """Thread-safe queue of an orchestrator's tasks, leased to remote workers"""
+
+    def __init__(self, orchestrator, auto_approve=False, lease_seconds=120):
+        """
+        Raises:
+            ValueError: for an invalid config["failure_policy"]
+        """
+        self.orchestrator = orchestrator
+        self.orchestrator.auto_approve = auto_approve
+        # Failed results go through the failure policy, as in a local run
+        self.orchestrator.failure_policy = FailurePolicy(
+            orchestrator.config["failure_policy"], base_timeout=orchestrator.config["timeout"]
+        )
+        # Set once a failed task's policy is 'halt': nothing new is leased
+        self.halted = False
+        self.stopped = threading.Event()
+
+        self.orchestrator.status_sections["work_queue"] = self.get_status
+        self.lease_seconds = lease_seconds
+        self.leases = {}
+        self.workers = {}
+        self.lock = threading.Lock()
+        # Control requests (pause, skip, prioritize, ...) change the task list
+        # from other threads; they are applied under this same lock
+        self.orchestrator.control_lock = self.lock
+
+    def is_paused(self):
+        """Whether the session is paused (no new leases until it resumes)"""
+        return self.orchestrator.pause_requested or self.orchestrator.status == "paused"
+
+    def _is_leasable(self, task):
+        """Whether a task may be handed to a worker"""
+        if task.status != "pending":
+            return False
+        # A retry waits out its backoff
+        if task.not_before and task.not_before > time.time():
+            return False
+        if not self.orchestrator.dependencies_finished(task):
+            return False
+        return not self.orchestrator.needs_approval(task)
+
+    def resume(self):
+        """Continue a paused session: workers lease tasks again"""
+        with self.lock:
+            self.orchestrator.pause_requested = False
+            self.orchestrator.status = "running"
+            self.orchestrator.save_state()
+
+    def start(self, interval=5):
+        """Re-queue expired leases every interval seconds, also while no worker asks for work"""
+        def expire_loop():
+            while not self.stopped.wait(interval):
+                self.requeue_expired()
+
+        threading.Thread(target=expire_loop, daemon=True, name="lease-expiry").start()
+
+    def stop(self):
+        """Stop the expiry timer (the session was replaced)"""
+        self.stopped.set()
+
+    def _touch_worker(self, worker_id):
+        self.workers[worker_id] = datetime.now().isoformat()
+
+    def _get_live_lease(self, lease_id):
+        """Return the lease if it exists and has not expired"""
+        lease = self.leases.get(lease_id)
+        if not lease or lease.expires_at < time.time():
+            return None
+        return lease
+
+    def requeue_expired(self):
+        """
+        Put tasks whose lease has expired back in the queue
+
+        Returns:
+            List of re-queued task ids
+        """
+        with self.lock:
+            return self._requeue_expired()
+
+    def _requeue_expired(self):
+        now = time.time()
+        requeued = []
+
+        for lease_id, lease in list(self.leases.items()):
+            if lease.expires_at >= now:
+                continue
+
+            del self.leases[lease_id]
+            task = lease.task
+            task.status = "pending"
+            task.started_at = None
+            self._append_log(task, f"\n\nLEASE EXPIRED: worker {lease.worker_id} stopped heartbeating\n")
+            requeued.append(task.id)
+
+            print(f"⚠️  Lease for task {task.id} expired (worker {lease.worker_id}), re-queued")
+
+        if requeued:
+            self.orchestrator.save_state()
+
+        return requeued
+
+    def lease(self, worker_id):
+        """
+        Lease the next ready task to a worker
+
+        Returns:
+            (Lease, task dict) or (None, None) if nothing is ready
+        """
+        with self.lock:
+            self._touch_worker(worker_id)
+            self._requeue_expired()
+            self.orchestrator.apply_approval_decisions()
+            self.orchestrator.request_approvals()
+            if self.halted or self.is_paused():
+                return None, None
+
+            leased = [lease.task for lease in self.leases.values()]
+            ready = [
+                t for t in self.orchestrator.tasks
+                if self._is_leasable(t) and not self.orchestrator.conflicts_with(t, leased)
+            ]
+            if not ready:
+                return None, None
+            task = self.orchestrator.pick_longest(ready)
+
+            lease = Lease(task, worker_id, self.lease_seconds)
+            self.leases[lease.id] = lease
+
+            task.status = "running"
+            task.started_at = datetime.now().isoformat()
+            task.attempts += 1
+
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            retry = f"-retry{task.attempts - 1}" if task.attempts > 1 else ""
+            log_file = self.orchestrator.logs_dir / f"task-{task.id}-{timestamp}{retry}.log"
+            task.output_log = str(log_file)
+            with open(log_file, 'w') as f:
+                f.write(f"Task {task.id}: {task.title}\n")
+                f.write(f"Type: {task.type}\n")
+                f.write(f"Session: {self.orchestrator.session_id}\n")
+                f.write(f"Worker: {worker_id}\n")
+                f.write(f"{'='*60}\n\n")
+                f.write(f"INSTRUCTION:\n{task.instruction}\n\n")
+                f.write(f"{'='*60}\n\n")
+                f.write("OUTPUT:\n")
+
+            self.orchestrator.save_state()
+
+        self.orchestrator.send_status_update(
+            'task_start',
+            f"Starting Task {task.id}/{len(self.orchestrator.tasks)} on {worker_id}: {task.title}",
+            {
+                'task_id': task.id,
+                'task_title': task.title,
+                'task_type': task.type,
+                'worker_id': worker_id,
+                'total_tasks': len(self.orchestrator.tasks)
+            }
+        )
+
+        # The worker has no runtime history; it enforces the server's timeout
+        task_data = task.to_dict()
+        task_data['timeout'] = self.orchestrator.get_timeout(task)
+        # The worker's execute_task counts this attempt itself
+        task_data['attempts'] = task.attempts - 1
+        return lease, task_data
+
+    def heartbeat(self, lease_id):
+        """
+        Extend a lease
+
+        Returns:
+            False if the lease is unknown or already expired
+        """
+        with self.lock:
+            lease = self._get_live_lease(lease_id)
+            if not lease:
+                return False
+
+            lease.expires_at = time.time() + self.lease_seconds
+            self._touch_worker(lease.worker_id)
+            self.orchestrator.mark_changed()
+            return True
+
+    def append_log(self, lease_id, chunk):
+        """Append a chunk of worker output to the task log (also extends the lease)"""
+        with self.lock:
+            lease = self._get_live_lease(lease_id)
+            if not lease:
+                return False
+
+            lease.expires_at = time.time() + self.lease_seconds
+            self._touch_worker(lease.worker_id)
+            self._append_log(lease.task, chunk)
+            self.orchestrator.mark_changed()
+            return True
+
+    def _append_log(self, task, chunk):
+        if not chunk or not task.output_log:
+            return
+        with open(task.output_log, 'a') as f:
+            f.write(chunk)
+
+    def complete(self, lease_id, result):
+        """
+        Record the result reported by a worker
+
+        Args:
+            lease_id: The lease the worker holds
+            result: Dict with status, result, completed_at, metrics, changed_files
+                and optional log
+
+        Returns:
+            False if the lease is unknown or expired (the task was re-queued)
+        """
+        with self.lock:
+            lease = self._get_live_lease(lease_id)
+            if not lease:
+                return False
+
+            del self.leases[lease_id]
+            self._touch_worker(lease.worker_id)
+
+            task = lease.task
+            self._append_log(task, result.get('log', ''))
+            task.status = result.get('status', 'failed')
+            task.result = result.get('result')
+            task.completed_at = result.get('completed_at') or datetime.now().isoformat()
+            task.metrics = result.get('metrics')
+            task.changed_files = result.get('changed_files') or []
+            self.orchestrator.record_changes(task)
+            if task.status == "completed":
+                self.orchestrator.record_duration(task)
+            self.orchestrator.record_attempt(task)
+
+            # Retried (pending again, after a backoff), given up on, or halts the
+            # session; the policy sends the notification
+            if task.status == "failed" and self.orchestrator.handle_failure(task):
+                self.halted = True
+
+            finished = self._is_finished()
+            if finished:
+                self.orchestrator.status = "failed" if self.halted else "completed"
+            self.orchestrator.save_state()
+
+        if task.status == "completed":
+            self.orchestrator.send_status_update(
+                'task_complete',
+                f"Task {task.id} completed on {lease.worker_id}: {task.title}",
+                {'task_id': task.id, 'task_title': task.title, 'worker_id': lease.worker_id}
+            )
+
+        if finished and self.halted:
+            self.orchestrator.send_status_update('error', "Distributed session halted by the failure policy")
+        elif finished:
+            self.orchestrator.send_status_update('success', "Distributed session completed all tasks")
+
+        return True
+
+    def _is_finished(self):
+        """True when nothing is leased and no task is waiting to run"""
+        if self.leases:
+            return False
+        if self.halted:
+            return True
+        self.orchestrator.apply_approval_decisions()
+        return not any(t.status == "pending" for t in self.orchestrator.tasks)
+
+    def is_finished(self):
+        """Whether every leasable task has been processed"""
+        with self.lock:
+            return self._is_finished()
+
+    def get_status(self):
+        """
+        Queue view for the status snapshot (see Orchestrator.status_sections)
+
+        Called on every publish - also while this queue's lock is held, so it
+        takes no lock and only copies.
+        """
+        return {
+            "lease_seconds": self.lease_seconds,
+            "paused": self.is_paused(),
+            "halted": self.halted,
+            "queued": sum(1 for t in list(self.orchestrator.tasks) if self._is_leasable(t)),
+            "leases": [lease.to_dict() for lease in list(self.leases.values())],
+            "workers": dict(self.workers)
+        }
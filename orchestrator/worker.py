@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker - Pulls tasks from a webhook server and executes them with Claude CLI
+
+Started with `python3 orchestrator.py --worker --server URL`. Several workers
+(on one machine or many) can share a single distributed session. Each worker
+runs its tasks in its own git worktree and applies the result to the checkout
+it was started in, so workers sharing a checkout keep their changes apart.
+"""
+
+import os
+import socket
+import threading
+import time
+
+import requests
+
+from orchestrator import Orchestrator, Task
+from worktree_pool import GitError
+
+
+class Worker:
+    """Leases tasks from the webhook server work queue and runs them"""
+
+    def __init__(self, server_url, secret=None, worker_id=None, poll_interval=5):
+        self.server_url = server_url.rstrip('/')
+        self.secret = secret or os.getenv('WEBHOOK_SECRET', 'changeme')
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+
+        # The server sends task notifications; the worker only executes
+        self.orchestrator = Orchestrator()
+        self.orchestrator.config['n8n_notify_url'] = ''
+
+        # Runtime and run history are kept by the server, which also sets each timeout
+        self.orchestrator.config['duration_history'] = False
+        self.orchestrator.config['run_history'] = False
+
+        # Local copies of the logs, kept apart from the server's when both
+        # run on the same machine
+        self.orchestrator.logs_dir = self.orchestrator.logs_dir / f"worker-{self.worker_id}"
+        self.orchestrator.logs_dir.mkdir(parents=True, exist_ok=True)
+
+        # The checkout itself would mix this worker's changes with those of
+        # other workers on it, and report them as this task's changed files
+        self.orchestrator.worktrees_dir = self.orchestrator.worktrees_dir / f"worker-{self.worker_id}"
+        try:
+            self.orchestrator.enable_worktrees(1)
+        except GitError as e:
+            print(f"⚠️  No worktree, tasks run in the checkout itself: {e}")
+            print("   Start only one worker on this checkout")
+
+    def post(self, endpoint, payload):
+        """POST to a work queue endpoint and return (status code, JSON body)"""
+        payload = dict(payload, secret=self.secret, worker_id=self.worker_id)
+        response = requests.post(f"{self.server_url}/webhook/work/{endpoint}", json=payload, timeout=30)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        return response.status_code, body
+
+    def run(self):
+        """Lease and execute tasks until interrupted"""
+        print(f"\n> Worker {self.worker_id} polling {self.server_url}")
+
+        while True:
+            try:
+                status_code, body = self.post('lease', {})
+            except requests.RequestException as e:
+                print(f"⚠️  Failed to reach server: {e}")
+                time.sleep(self.poll_interval)
+                continue
+
+            if status_code != 200:
+                print(f"⚠️  Lease request failed ({status_code}): {body.get('error')}")
+                time.sleep(self.poll_interval)
+                continue
+
+            if not body.get('task'):
+                time.sleep(self.poll_interval)
+                continue
+
+            self.execute_lease(body['lease_id'], body['task'], body.get('lease_seconds', 120))
+
+    def execute_lease(self, lease_id, task_data, lease_seconds):
+        """Execute a leased task, heartbeating and streaming its log meanwhile"""
+        task = Task.from_dict(task_data)
+        buffer = []
+        buffer_lock = threading.Lock()
+        done = threading.Event()
+
+        def on_output(chunk):
+            with buffer_lock:
+                buffer.append(chunk)
+
+        def drain():
+            with buffer_lock:
+                chunk = ''.join(buffer)
+                buffer.clear()
+            return chunk
+
+        def keep_alive():
+            # Logs also extend the lease, so only heartbeat when there is no output
+            interval = max(1, lease_seconds / 3)
+            while not done.wait(interval):
+                chunk = drain()
+                try:
+                    if chunk:
+                        status_code, _ = self.post('log', {'lease_id': lease_id, 'log': chunk})
+                    else:
+                        status_code, _ = self.post('heartbeat', {'lease_id': lease_id})
+                except requests.RequestException as e:
+                    print(f"⚠️  Heartbeat failed: {e}")
+                    continue
+
+                if status_code == 409:
+                    print(f"⚠️  Lease for task {task.id} expired on the server; result will be discarded")
+
+        heartbeat = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat.start()
+
+        try:
+            if self.orchestrator.worktree_pool:
+                # Start from what other workers on this checkout merged meanwhile
+                self.orchestrator.worktree_pool.refresh()
+            self.orchestrator.execute_task(task, on_output=on_output)
+        finally:
+            done.set()
+            heartbeat.join()
+
+        result = {
+            'lease_id': lease_id,
+            'status': task.status,
+            'result': task.result,
+            'started_at': task.started_at,
+            'completed_at': task.completed_at,
+            'metrics': task.metrics,
+            'changed_files': task.changed_files,
+            'log': drain()
+        }
+
+        try:
+            status_code, body = self.post('complete', result)
+            if status_code != 200:
+                print(f"⚠️  Server rejected result for task {task.id}: {body.get('error')}")
+        except requests.RequestException as e:
+            print(f"⚠️  Failed to report result for task {task.id}: {e}")
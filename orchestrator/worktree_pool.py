@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worktree Pool - Isolated git worktrees for concurrently running tasks
+
+Each running task gets its own `git worktree` (sharing the repository's object
+store). Worktrees are recycled between tasks and kept across sessions, and
+dependency directories such as node_modules are copied in once with
+copy-on-write (or hardlinks), so the setup cost is paid once per slot.
+
+Results are merged back as patches applied to the main working tree - never
+as commits (see GIT_SAFETY.md). A patch that no longer applies is reported as a
+conflict and kept next to the task log for manual review.
+
+Worktrees start from a snapshot of the main working tree, uncommitted and
+untracked changes included: a commit object written with a temporary index,
+not on any branch. The snapshot is taken again after every merge, so a
+recycled worktree checks out the merged state directly.
+"""
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+
+class GitError(Exception):
+    """A git command failed"""
+
+
+class Worktree:
+    """A pooled worktree checkout"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.synced_tree = None
+
+
+class WorktreePool:
+    """Pool of recycled git worktrees so concurrent tasks never share a checkout"""
+
+    def __init__(self, repo_root, pool_dir, size, shared_dirs=None):
+        self.repo_root = Path(repo_root)
+        self.pool_dir = Path(pool_dir)
+        self.size = size
+        self.shared_dirs = shared_dirs if shared_dirs is not None else ['node_modules']
+        self.base = self.snapshot_main()
+
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+
+    def git(self, *args, cwd=None, input=None, env=None):
+        """Run a git command and return its stdout"""
+        result = subprocess.run(
+            ['git', *args],
+            cwd=cwd or self.repo_root,
+            input=input,
+            capture_output=True,
+            text=True,
+            env=env
+        )
+        if result.returncode != 0:
+            raise GitError(f"git {' '.join(args)}: {result.stderr.strip()}")
+        return result.stdout
+
+    def acquire(self, base=None):
+        """
+        Get a worktree synced to the main working tree as of the last merge
+        (or to the given snapshot commit)
+
+        Blocks until a worktree is free when all slots are in use.
+        """
+        try:
+            worktree = self.idle.get_nowait()
+        except queue.Empty:
+            worktree = None
+            with self.lock:
+                if self.created < self.size:
+                    worktree = self._create(self.created)
+                    self.created += 1
+            if worktree is None:
+                worktree = self.idle.get()
+
+        self.sync(worktree, base)
+        return worktree
+
+    def release(self, worktree):
+        """Return a worktree to the pool for the next task"""
+        self.idle.put(worktree)
+
+    def _create(self, slot):
+        path = self.pool_dir / f"wt-{slot}"
+
+        # Slots survive between sessions; only build the ones that are missing
+        if not (path / '.git').exists():
+            if path.exists():
+                shutil.rmtree(path)
+            self.git('worktree', 'prune')
+            self.git('worktree', 'add', '--detach', str(path), self.base)
+            print(f"🌳 Created worktree {path}")
+
+        for name in self.shared_dirs:
+            self._share_dir(name, path)
+
+        return Worktree(path)
+
+    def _share_dir(self, name, path):
+        """Copy a dependency directory into a worktree without duplicating its data"""
+        source = self.repo_root / name
+        target = path / name
+        if not source.is_dir() or target.exists():
+            return
+
+        # Copy-on-write where the filesystem supports it, hardlinks otherwise
+        for flags in (['-a', '--reflink=always'], ['-al']):
+            result = subprocess.run(['cp', *flags, str(source), str(target)], capture_output=True)
+            if result.returncode == 0:
+                return
+            shutil.rmtree(target, ignore_errors=True)
+
+        shutil.copytree(source, target, symlinks=True)
+
+    def sync(self, worktree, base=None):
+        """Reset a worktree to the latest snapshot of the main working tree (or to base)"""
+        cwd = worktree.path
+        if base is None:
+            base = self.current_base()
+        self.git('checkout', '--detach', '--force', base, cwd=cwd)
+        self.git('reset', '--hard', '-q', cwd=cwd)
+        # Without -x so ignored build caches and shared dirs survive recycling
+        keep = [arg for name in self.shared_dirs for arg in ('-e', name)]
+        self.git('clean', '-fdq', *keep, cwd=cwd)
+
+        worktree.synced_tree = self._snapshot(worktree)
+
+    def current_base(self):
+        """Snapshot commit of the main working tree as of the last merge"""
+        with self.lock:
+            return self.base
+
+    def refresh(self):
+        """Snapshot the main working tree again (it was changed outside this pool)"""
+        with self.lock:
+            self.base = self.snapshot_main()
+
+    def snapshot_main(self):
+        """
+        Commit object of the main working tree as it is now, uncommitted and
+        untracked (not ignored) files included
+
+        A temporary index is used, so the real index, HEAD and branches are
+        left alone; the commit is only referenced by the worktrees' HEADs.
+        """
+        excludes = self._excludes()
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, 'GIT_INDEX_FILE': str(Path(tmp) / 'index')}
+            # Start from the real index so unchanged files aren't hashed again
+            index = Path(self.git('rev-parse', '--git-path', 'index').strip())
+            if not index.is_absolute():
+                index = self.repo_root / index
+            if index.exists():
+                shutil.copy(index, env['GIT_INDEX_FILE'])
+            else:
+                self.git('read-tree', 'HEAD', env=env)
+            self.git('add', '-A', '--', '.', *excludes, env=env)
+            tree = self.git('write-tree', env=env).strip()
+
+        return self.git(
+            '-c', 'user.name=orchestrator', '-c', 'user.email=orchestrator@localhost',
+            'commit-tree', tree, '-p', 'HEAD', '-m', 'Orchestrator worktree base (working tree snapshot)'
+        ).strip()
+
+    def _snapshot(self, worktree):
+        """Write the worktree's current contents as a tree object (no commit)"""
+        self.git('add', '-A', '--', '.', *self._excludes(worktree.path), cwd=worktree.path)
+        tree = self.git('write-tree', cwd=worktree.path).strip()
+        self.git('reset', '-q', cwd=worktree.path)
+        return tree
+
+    def _excludes(self, cwd=None):
+        """
+        Pathspecs leaving the shared dependency dirs out of a snapshot (they
+        are never part of a task's result); git refuses to add even an
+        exclude for a path it ignores, so ignored dirs need none
+        """
+        excludes = []
+        for name in self.shared_dirs:
+            ignored = subprocess.run(['git', 'check-ignore', '-q', name], cwd=cwd or self.repo_root)
+            if ignored.returncode != 0:
+                excludes.append(f':(exclude){name}')
+        return excludes
+
+    def capture(self, worktree):
+        """Return the binary patch of everything a task changed in its worktree"""
+        tree = self._snapshot(worktree)
+        if tree == worktree.synced_tree:
+            return ''
+        return self.git('diff', '--binary', worktree.synced_tree, tree, cwd=worktree.path)
+
+    def merge(self, patch):
+        """
+        Apply a task's patch to the main working tree
+
+        Returns:
+            False if the patch conflicts with changes merged since the task started
+        """
+        if not patch.strip():
+            return True
+
+        with self.lock:
+            try:
+                self.git('apply', '--check', '--binary', '-', input=patch)
+            except GitError:
+                return False
+
+            self.git('apply', '--binary', '-', input=patch)
+            # Worktrees acquired from now on start from the merged state
+            self.base = self.snapshot_main()
+            return True